@@ -0,0 +1,161 @@
+"""
+artifacts.py — 生成产物写入工具
+内容未变化时跳过写入，变化时通过临时文件 + rename 原子替换，并统计写入/未变/删除数量
+"""
+import hashlib
+import os
+import stat
+import tempfile
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import IO, Callable, Dict, Iterable, Iterator, List, Optional
+
+CHUNK_SIZE = 1 << 16
+
+_mode_lock = threading.Lock()
+_new_file_mode: Optional[int] = None
+
+
+def _read_umask() -> int:
+    """当前 umask：Linux 从 /proc 读取；其他平台只能设置后再恢复（进程级状态，由调用方保证只执行一次）"""
+    try:
+        with open("/proc/self/status", encoding="ascii") as fh:
+            for line in fh:
+                if line.startswith("Umask:"):
+                    return int(line.split()[1], 8)
+    except (OSError, ValueError):
+        pass
+    umask = os.umask(0o077)
+    os.umask(umask)
+    return umask
+
+
+def new_file_mode() -> int:
+    """新建产物的权限（按 umask 计算的常规权限）；首次使用时在锁内读取一次 umask"""
+    global _new_file_mode
+    with _mode_lock:
+        if _new_file_mode is None:
+            _new_file_mode = 0o666 & ~_read_umask()
+        return _new_file_mode
+
+
+def _replace(tmp: Path, path: Path) -> None:
+    """mkstemp 创建的临时文件权限为 0600：替换已有文件时沿用其权限，新文件按 umask 计算，再原子替换"""
+    try:
+        mode = stat.S_IMODE(os.stat(path).st_mode)
+    except OSError:
+        mode = new_file_mode()
+    os.chmod(tmp, mode)
+    os.replace(tmp, path)
+
+
+def sha256_bytes(data: bytes) -> str:
+    """计算字节内容的 sha256"""
+    return hashlib.sha256(data).hexdigest()
+
+
+def sha256_file(path: Path) -> Optional[str]:
+    """分块计算文件 sha256，文件不存在时返回 None"""
+    h = hashlib.sha256()
+    try:
+        with open(path, "rb") as fh:
+            for chunk in iter(lambda: fh.read(CHUNK_SIZE), b""):
+                h.update(chunk)
+    except OSError:
+        return None
+    return h.hexdigest()
+
+
+class ArtifactWriter:
+    """按内容哈希跳过未变化文件的原子写入器"""
+
+    def __init__(self) -> None:
+        self.written: List[Path] = []
+        self.unchanged: List[Path] = []
+        self.deleted: List[Path] = []
+        self.hashes: Dict[Path, str] = {}
+
+    def write_bytes(self, path: Path, data: bytes) -> bool:
+        """写入字节内容，返回是否实际写入"""
+        path = Path(path)
+        digest = sha256_bytes(data)
+        self.hashes[path] = digest
+        if path.is_file() and path.stat().st_size == len(data) and sha256_file(path) == digest:
+            self.unchanged.append(path)
+            return False
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(prefix=f".{path.name}.", suffix=".tmp", dir=str(path.parent))
+        try:
+            with os.fdopen(fd, "wb") as fh:
+                fh.write(data)
+            _replace(Path(tmp), path)
+        except BaseException:
+            _unlink_quietly(Path(tmp))
+            raise
+        self.written.append(path)
+        return True
+
+    def write_text(self, path: Path, content: str) -> bool:
+        """写入 UTF-8 文本，返回是否实际写入"""
+        return self.write_bytes(path, content.encode("utf-8"))
+
+    @contextmanager
+    def open(self, path: Path, binary: bool = False) -> Iterator[IO]:
+        """流式写入：先写临时文件，关闭时与已有文件比对哈希后决定替换或丢弃"""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_name = tempfile.mkstemp(prefix=f".{path.name}.", suffix=".tmp", dir=str(path.parent))
+        tmp = Path(tmp_name)
+        try:
+            if binary:
+                fh = os.fdopen(fd, "wb")
+            else:
+                fh = os.fdopen(fd, "w", encoding="utf-8", newline="")
+            with fh:
+                yield fh
+            digest = sha256_file(tmp)
+            self.hashes[path] = digest or ""
+            if path.is_file() and path.stat().st_size == tmp.stat().st_size and sha256_file(path) == digest:
+                tmp.unlink()
+                self.unchanged.append(path)
+            else:
+                _replace(tmp, path)
+                self.written.append(path)
+        except BaseException:
+            _unlink_quietly(tmp)
+            raise
+
+    def prune(
+        self,
+        directory: Path,
+        pattern: str,
+        keep: Iterable[Path],
+        is_generated: Optional[Callable[[Path], bool]] = None,
+    ) -> List[Path]:
+        """删除目录中不再生成的孤儿文件（仅删除 is_generated 判定为生成产物的文件）"""
+        directory = Path(directory)
+        if not directory.is_dir():
+            return []
+        keep_set = {Path(p).resolve() for p in keep}
+        removed: List[Path] = []
+        for fp in sorted(directory.glob(pattern)):
+            if not fp.is_file() or fp.resolve() in keep_set:
+                continue
+            if is_generated is not None and not is_generated(fp):
+                continue
+            fp.unlink()
+            removed.append(fp)
+        self.deleted.extend(removed)
+        return removed
+
+    def summary(self) -> str:
+        """统计摘要"""
+        return f"写入 {len(self.written)}，未变 {len(self.unchanged)}，删除 {len(self.deleted)}"
+
+
+def _unlink_quietly(path: Path) -> None:
+    try:
+        path.unlink()
+    except OSError:
+        pass
@@ -0,0 +1,289 @@
+"""
+bench_corpus.py — 基准测试用的合成前端项目生成器
+按指定规模生成 React / Vue / 小程序项目：文件数、每个文件的调用点数、7 种扫描模式的比例、压缩打包文件（单行 bundle）；
+同一组参数与随机种子总是生成完全相同的项目，便于不同版本之间对比
+"""
+import json
+import random
+import shutil
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+from scan import TEXT_EXT
+
+KINDS = ["react", "vue", "miniprogram"]
+
+# scan.py 的 7 种匹配模式
+PATTERNS = ["axios", "axios-config", "fetch", "request", "react-query", "swr", "wx"]
+
+DEFAULT_MIX: Dict[str, Dict[str, int]] = {
+    "react": {"axios": 3, "axios-config": 1, "fetch": 2, "request": 3, "react-query": 1, "swr": 2, "wx": 0},
+    "vue": {"axios": 3, "axios-config": 1, "fetch": 1, "request": 3, "react-query": 1, "swr": 2, "wx": 0},
+    "miniprogram": {"axios": 0, "axios-config": 0, "fetch": 0, "request": 3, "react-query": 0, "swr": 0, "wx": 6},
+}
+
+MODULES = [
+    "user", "order", "product", "cart", "payment", "message", "report", "auth",
+    "file", "config", "coupon", "address", "review", "stock", "shop", "search",
+]
+RESOURCES = ["list", "detail", "item", "stats", "export", "batch", "status", "record", "tag", "setting"]
+METHODS = ["GET", "GET", "GET", "POST", "PUT", "PATCH", "DELETE"]
+
+
+@dataclass
+class CorpusSpec:
+    """合成项目的规模参数"""
+    kind: str = "react"
+    files: int = 200
+    calls_per_file: int = 5
+    mix: Dict[str, int] = field(default_factory=dict)
+    minified: int = 2
+    bundle_calls: int = 200
+    filler_lines: int = 30
+    endpoints: int = 0
+    seed: int = 1
+
+    def resolved_mix(self) -> Dict[str, int]:
+        mix = dict(DEFAULT_MIX[self.kind])
+        mix.update(self.mix)
+        return {p: w for p, w in mix.items() if w > 0}
+
+
+@dataclass
+class CorpusStats:
+    """生成结果：源文件数（扫描范围内的文件，含 bundle）、调用点数、源文件字节数、接口池大小"""
+    files: int = 0
+    bundles: int = 0
+    call_sites: int = 0
+    bytes: int = 0
+    endpoints: int = 0
+    patterns: Dict[str, int] = field(default_factory=dict)
+
+
+def parse_mix(raw: str) -> Dict[str, int]:
+    """解析 "axios=3,fetch=1,wx=0" 形式的模式比例"""
+    mix: Dict[str, int] = {}
+    for part in filter(None, (p.strip() for p in raw.split(","))):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in PATTERNS:
+            raise ValueError(f"未知扫描模式：{name}（可选：{', '.join(PATTERNS)}）")
+        try:
+            mix[name] = int(weight or 1)
+        except ValueError:
+            raise ValueError(f"模式比例必须是整数：{part}") from None
+    return mix
+
+
+# =====================================================
+# 接口池与调用点
+# =====================================================
+
+def endpoint_pool(rnd: random.Random, size: int) -> List[Tuple[str, str]]:
+    """(method, URL 模板)；约三分之一的路径带 ${id} 路径参数"""
+    pool: List[Tuple[str, str]] = []
+    seen = set()
+    while len(pool) < size:
+        module = rnd.choice(MODULES)
+        resource = rnd.choice(RESOURCES)
+        suffix = f"{resource}{rnd.randrange(size // 8 + 1)}"
+        url = f"/api/{module}/{suffix}"
+        if rnd.random() < 0.35:
+            url += "/${id}"
+        method = rnd.choice(METHODS)
+        if (method, url) in seen:
+            continue
+        seen.add((method, url))
+        pool.append((method, url))
+    return pool
+
+
+def _quote(url: str) -> str:
+    return f"`{url}`" if "${" in url else f"'{url}'"
+
+
+def render_call(pattern: str, method: str, url: str, name: str, kind: str) -> str:
+    """一个调用点的代码（单行，便于拼接为压缩 bundle）"""
+    m = method.lower()
+    q = _quote(url)
+    payload = "{ params }" if method == "GET" else "data"
+    if pattern == "axios":
+        return f"export const {name} = (id, params, data) => axios.{m}({q}, {payload})"
+    if pattern == "axios-config":
+        return f"export const {name} = (id, data) => axios({{ url: {q}, method: '{m}', data }})"
+    if pattern == "fetch":
+        if method == "GET":
+            return f"export const {name} = (id) => fetch({q}).then((res) => res.json())"
+        return (
+            f"export const {name} = (id, data) => fetch({q}, {{ method: '{method}', "
+            f"headers: {{ 'Content-Type': 'application/json' }}, body: JSON.stringify(data) }})"
+        )
+    if pattern == "request":
+        if kind == "miniprogram" or method != "GET":
+            return f"export const {name} = (id, data) => request({{ url: {q}, method: '{method}', data }})"
+        return f"export const {name} = (id, params) => http.get({q}, {{ params }})"
+    if pattern == "react-query":
+        return (
+            f"export const {name} = (id) => useQuery({{ queryKey: ['{name}', id], "
+            f"queryFn: () => client.{m}({q}).then((r) => r.data) }})"
+        )
+    if pattern == "swr":
+        hook = "useRequest" if kind == "vue" else "useSWR"
+        return f"export const {name} = (id) => {hook}({q}, fetcher)"
+    if pattern == "wx":
+        return (
+            f"export const {name} = (id, data) => new Promise((resolve, reject) => "
+            f"wx.request({{ url: {q}, method: '{method}', data, success: resolve, fail: reject }}))"
+        )
+    raise ValueError(f"未知扫描模式：{pattern}")
+
+
+FILLER = [
+    "const total = items.reduce((sum, item) => sum + item.price * item.count, 0)",
+    "if (!visible) {{ return null }}",
+    "const [loading, setLoading] = useState(false)",
+    "const columns = [{{ title: '名称', dataIndex: 'name' }}, {{ title: '状态', dataIndex: 'status' }}]",
+    "console.debug('[{name}] render', {{ page, pageSize }})",
+    "export function format{name}(value) {{ return String(value).padStart(2, '0') }}",
+    "const options = Object.keys(STATUS_MAP).map((key) => ({{ label: STATUS_MAP[key], value: key }}))",
+    "watchEffect(() => {{ selected.value = list.value.filter((x) => x.checked) }})",
+]
+
+
+class CorpusBuilder:
+    """按 CorpusSpec 生成单个项目"""
+
+    def __init__(self, spec: CorpusSpec):
+        if spec.kind not in KINDS:
+            raise ValueError(f"未知项目类型：{spec.kind}（可选：{', '.join(KINDS)}）")
+        self.spec = spec
+        self.rnd = random.Random(f"{spec.kind}:{spec.seed}")
+        self.mix = spec.resolved_mix()
+        if not self.mix:
+            raise ValueError("模式比例全部为 0，无法生成调用点")
+        size = spec.endpoints or max(20, spec.files * spec.calls_per_file // 3)
+        self.pool = endpoint_pool(self.rnd, size)
+        self.get_pool = [ep for ep in self.pool if ep[0] == "GET"] or self.pool
+        self.stats = CorpusStats(endpoints=len(self.pool))
+        self.counter = 0
+
+    def call(self) -> str:
+        pattern = self.rnd.choices(list(self.mix), weights=list(self.mix.values()))[0]
+        method, url = self.rnd.choice(self.get_pool if pattern == "swr" else self.pool)
+        self.counter += 1
+        self.stats.call_sites += 1
+        self.stats.patterns[pattern] = self.stats.patterns.get(pattern, 0) + 1
+        return render_call(pattern, method, url, f"api{self.counter}", self.spec.kind)
+
+    def filler(self, name: str) -> List[str]:
+        return [self.rnd.choice(FILLER).format(name=name) for _ in range(self.spec.filler_lines)]
+
+    def write(self, path: Path, content: str, bundle: bool = False) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        data = content.encode("utf-8")
+        path.write_bytes(data)
+        if path.suffix in TEXT_EXT:
+            self.stats.bytes += len(data)
+            self.stats.files += 1
+            self.stats.bundles += bundle
+
+    # ---- 各类项目的文件布局 ----
+
+    def source_file(self, i: int) -> Tuple[str, str]:
+        """第 i 个源文件的 (相对路径, 内容)"""
+        kind = self.spec.kind
+        module = MODULES[i % len(MODULES)]
+        name = f"{module.capitalize()}{i}"
+        calls = [self.call() for _ in range(self.spec.calls_per_file)]
+        filler = self.filler(name)
+        half = len(filler) // 2
+        body = "\n".join(filler[:half] + calls + filler[half:])
+        imports = "import axios from 'axios'\nimport request, { http, client } from '@/utils/request'\n"
+        if kind == "react":
+            if i % 2 == 0:
+                return f"src/api/{module}/{name}.ts", imports + body + "\n"
+            return (
+                f"src/pages/{module}/{name}.tsx",
+                imports + "import useSWR from 'swr'\nimport { useQuery } from '@tanstack/react-query'\n"
+                + body + f"\nexport default function {name}Page() {{ return <div className=\"{module}\" /> }}\n",
+            )
+        if kind == "vue":
+            if i % 2 == 0:
+                return f"src/api/{module}/{name}.js", imports + body + "\n"
+            return (
+                f"src/views/{module}/{name}.vue",
+                f"<template>\n  <div class=\"{module}\">{{{{ title }}}}</div>\n</template>\n\n"
+                f"<script setup>\n{imports}import {{ useRequest }} from 'vue-request'\n{body}\n</script>\n",
+            )
+        if i % 3 == 2:
+            return f"utils/{module}/{name}.js", "import request from '../request'\n" + body + "\n"
+        return f"pages/{module}/{name.lower()}/index.js", "import request from '../../utils/request'\n" + body + "\n"
+
+    def bundle(self, i: int) -> Tuple[str, str]:
+        """压缩打包文件：全部代码在一行内"""
+        parts = []
+        for j in range(self.spec.bundle_calls):
+            parts.append(self.call().replace("export const ", "var ").replace("\n", " "))
+            parts.append(self.rnd.choice(FILLER).format(name=f"b{i}_{j}"))
+        base = "src/static" if self.spec.kind != "miniprogram" else "lib"
+        return f"{base}/vendor-{i}.min.js", "!function(){\"use strict\";" + ";".join(parts) + "}();\n"
+
+    def project_files(self) -> Dict[str, str]:
+        kind = self.spec.kind
+        if kind == "react":
+            return {
+                "package.json": json.dumps({"name": "bench-react", "dependencies": {
+                    "react": "^18.2.0", "axios": "^1.6.0", "swr": "^2.2.0", "@tanstack/react-query": "^5.0.0"}}, indent=2),
+                "vite.config.ts": "export default { server: { proxy: { '/api': 'http://localhost:8080' } } }\n",
+                ".env": "VITE_API_BASE=https://api.example.com\n",
+                "src/utils/request.ts": (
+                    "import axios from 'axios'\nexport const http = axios.create({ baseURL: import.meta.env.VITE_API_BASE })\n"
+                    "http.interceptors.request.use((c) => { c.headers.Authorization = `Bearer ${token()}`; return c })\n"
+                    "export const client = http\nexport default http\n"
+                ),
+            }
+        if kind == "vue":
+            return {
+                "package.json": json.dumps({"name": "bench-vue", "dependencies": {
+                    "vue": "^3.4.0", "axios": "^1.6.0", "vue-request": "^2.0.0"}}, indent=2),
+                "vue.config.js": "module.exports = { devServer: { proxy: 'http://localhost:8080' } }\n",
+                ".env": "VUE_APP_API_BASE=https://api.example.com\n",
+                "src/utils/request.js": (
+                    "import axios from 'axios'\nexport const http = axios.create({ baseURL: process.env.VUE_APP_API_BASE })\n"
+                    "http.interceptors.request.use((c) => { c.headers.Authorization = `Bearer ${token()}`; return c })\n"
+                    "export const client = http\nexport default http\n"
+                ),
+            }
+        return {
+            "app.json": json.dumps({"pages": ["pages/index/index"]}, indent=2),
+            "project.config.json": json.dumps({"compileType": "miniprogram"}, indent=2),
+            "utils/request.js": (
+                "const API_BASE = 'https://api.example.com'\n"
+                "export default function request(opts) { return new Promise((resolve, reject) => wx.request({ ...opts, "
+                "url: API_BASE + opts.url, header: { Authorization: 'Bearer ' + wx.getStorageSync('token') }, "
+                "success: resolve, fail: reject })) }\n"
+            ),
+            "pages/index/index.wxml": "<view class=\"container\"><text>{{title}}</text></view>\n",
+        }
+
+    def build(self, root: Path) -> CorpusStats:
+        if root.exists():
+            shutil.rmtree(root)
+        root.mkdir(parents=True)
+        for rel, content in self.project_files().items():
+            self.write(root / rel, content)
+        for i in range(self.spec.files):
+            rel, content = self.source_file(i)
+            self.write(root / rel, content)
+        for i in range(self.spec.minified):
+            rel, content = self.bundle(i)
+            self.write(root / rel, content, bundle=True)
+        manifest = {"spec": asdict(self.spec), "stats": asdict(self.stats)}
+        (root / "bench-corpus.json").write_text(json.dumps(manifest, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
+        return self.stats
+
+
+def generate(spec: CorpusSpec, root: Path) -> CorpusStats:
+    """在 root 下生成项目（已存在时先清空）；返回生成统计，同时写出 bench-corpus.json 清单"""
+    return CorpusBuilder(spec).build(root)
@@ -0,0 +1,343 @@
+#!/usr/bin/env python3
+"""
+benchmark.py — 端到端基准测试
+用 bench_corpus.py 生成 React / Vue / 小程序合成项目，以 run_workflow.py --force 完整运行 scan.py 至 check_consistency.py 的全部阶段，
+按阶段记录耗时、CPU、峰值内存与吞吐量（文件/秒、接口/秒），多次运行取中位数写入 JSON；
+compare 将结果与保存的基线对比，超过阈值的回退返回非零退出码，可直接用于 CI
+
+  benchmark.py run [--kinds react,vue,miniprogram] [--files 200] [--calls-per-file 5] [--repeat 3] [--output bench.json] [--baseline base.json]
+  benchmark.py compare base.json bench.json [--threshold 0.2]
+  benchmark.py generate ./corpus --kind vue --files 1000 --mix axios=1,swr=3
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+from dataclasses import asdict
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import tracing
+from artifacts import ArtifactWriter
+from bench_corpus import KINDS, CorpusSpec, generate, parse_mix
+from metrics import spawn
+from scan import SCAN_CACHE_ENV, parse_csv
+
+BENCH_VERSION = 1
+LOG_TAIL_LINES = 20
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    corpus = argparse.ArgumentParser(add_help=False)
+    corpus.add_argument("--files", type=int, default=200, help="每个项目的源文件数")
+    corpus.add_argument("--calls-per-file", type=int, default=5, help="每个源文件的 API 调用点数")
+    corpus.add_argument("--mix", default="", help="扫描模式比例，覆盖项目类型的默认值，如 axios=3,fetch=1,wx=0")
+    corpus.add_argument("--minified", type=int, default=2, help="压缩打包文件（单行 bundle）个数")
+    corpus.add_argument("--bundle-calls", type=int, default=200, help="每个压缩打包文件中的调用点数")
+    corpus.add_argument("--filler-lines", type=int, default=30, help="每个源文件中与接口无关的代码行数")
+    corpus.add_argument("--endpoints", type=int, default=0, help="接口池大小（默认：调用点数的三分之一）")
+    corpus.add_argument("--seed", type=int, default=1, help="随机种子")
+
+    parser = argparse.ArgumentParser(description="端到端基准测试")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    gen = sub.add_parser("generate", parents=[corpus], help="只生成合成项目")
+    gen.add_argument("output", help="项目目录（已存在时清空）")
+    gen.add_argument("--kind", choices=KINDS, default="react", help="项目类型")
+
+    run = sub.add_parser("run", parents=[corpus], help="生成项目并运行完整工作流")
+    run.add_argument("--kinds", default=",".join(KINDS), help="项目类型，逗号分隔")
+    run.add_argument("--repeat", type=int, default=3, help="每个项目的运行次数（取中位数）")
+    run.add_argument("--in-process", action="store_true", help="各阶段在工作流进程内运行（默认为子进程，便于按阶段统计内存）")
+    run.add_argument("--workdir", default="", help="项目与输出目录（默认使用临时目录并在结束后删除）")
+    run.add_argument("--output", default="bench-results.json", help="结果 JSON 路径")
+    run.add_argument("--baseline", default="", help="运行后与该基线对比，回退超过阈值时返回 1")
+    run.add_argument("--threshold", type=float, default=0.2, help="回退阈值（相对变化，0.2 即 20%%）")
+    run.add_argument("--min-seconds", type=float, default=0.05, help="耗时差小于该值（秒）时不视为回退")
+    run.add_argument("--min-memory-mb", type=float, default=8, help="峰值内存差小于该值（MB）时不视为回退")
+
+    cmp = sub.add_parser("compare", help="与基线对比")
+    cmp.add_argument("baseline", help="基线结果 JSON")
+    cmp.add_argument("current", help="本次结果 JSON")
+    cmp.add_argument("--threshold", type=float, default=0.2, help="回退阈值（相对变化，0.2 即 20%%）")
+    cmp.add_argument("--min-seconds", type=float, default=0.05, help="耗时差小于该值（秒）时不视为回退")
+    cmp.add_argument("--min-memory-mb", type=float, default=8, help="峰值内存差小于该值（MB）时不视为回退")
+    return parser.parse_args(argv)
+
+
+def corpus_spec(args: argparse.Namespace, kind: str) -> CorpusSpec:
+    return CorpusSpec(
+        kind=kind,
+        files=args.files,
+        calls_per_file=args.calls_per_file,
+        mix=parse_mix(args.mix),
+        minified=args.minified,
+        bundle_calls=args.bundle_calls,
+        filler_lines=args.filler_lines,
+        endpoints=args.endpoints,
+        seed=args.seed,
+    )
+
+
+# =====================================================
+# 运行
+# =====================================================
+
+def run_once(config_path: Path, output_dir: Path, in_process: bool, log_path: Path) -> Tuple[int, str, Dict[str, Any]]:
+    """清空输出目录后完整运行一次工作流；返回 (退出码, 输出, 资源占用)"""
+    if output_dir.exists():
+        shutil.rmtree(output_dir)
+    cmd = [
+        sys.executable, str(Path(__file__).resolve().parent / "run_workflow.py"),
+        "--config", str(config_path), "--force", "--no-interactive", "--jobs", "1",
+    ]
+    if in_process:
+        cmd.append("--in-process")
+    # 扫描缓存与追踪会改变被测的工作量，基准运行中关闭
+    env = {k: v for k, v in os.environ.items() if k not in (SCAN_CACHE_ENV, tracing.TRACE_ENV)}
+    code, output, usage = spawn(cmd, capture=True, env=env)
+    log_path.write_text(output, encoding="utf-8")
+    return code, output, usage
+
+
+def _rate(count: Optional[int], seconds: float) -> Optional[float]:
+    return round(count / seconds, 1) if count and seconds > 0 else None
+
+
+def summarize(runs: List[Dict[str, Any]], usages: List[Dict[str, Any]], files: int) -> Dict[str, Any]:
+    """多次运行的中位数耗时 / CPU 与最大峰值内存，及由中位数耗时计算的吞吐量"""
+    stages = []
+    for first in runs[0]["stages"]:
+        samples = [next(s for s in r["stages"] if s["name"] == first["name"]) for r in runs]
+        wall = statistics.median(s["wall_s"] for s in samples)
+        endpoints = first["endpoints"]
+        stages.append({
+            "name": first["name"],
+            "label": first["label"],
+            "wall_s": round(wall, 3),
+            "cpu_s": round(statistics.median(s["cpu_s"] for s in samples), 3),
+            "peak_rss_kb": max(s["peak_rss_kb"] for s in samples),
+            "endpoints": endpoints,
+            "files_per_s": _rate(files, wall) if first["name"] == "scan" else None,
+            "endpoints_per_s": _rate(endpoints, wall),
+        })
+    wall = statistics.median(r["wall_s"] for r in runs)
+    endpoints = next((s["endpoints"] for s in stages if s["name"] == "contract"), None)
+    return {
+        "wall_s": round(wall, 3),
+        "cpu_s": round(statistics.median(u.get("cpu", 0.0) for u in usages), 3),
+        "peak_rss_kb": max(int(u.get("peak_rss_kb", 0)) for u in usages),
+        "endpoints": endpoints,
+        "matches": next((s["endpoints"] for s in stages if s["name"] == "scan"), None),
+        "files_per_s": _rate(files, wall),
+        "endpoints_per_s": _rate(endpoints, wall),
+        "runs_wall_s": [r["wall_s"] for r in runs],
+        "stages": stages,
+    }
+
+
+def bench_case(spec: CorpusSpec, workdir: Path, repeat: int, in_process: bool) -> Dict[str, Any]:
+    """生成一个项目并运行 repeat 次"""
+    case_dir = workdir / spec.kind
+    project_root = case_dir / "project"
+    output_dir = case_dir / "out"
+    stats = generate(spec, project_root)
+    print(
+        f"[benchmark] {spec.kind}：{stats.files} 个文件（bundle {stats.bundles}），{stats.call_sites} 个调用点，"
+        f"{stats.bytes / 1024:.0f} KB，接口池 {stats.endpoints}"
+    )
+    config_path = case_dir / "config.json"
+    config = {
+        "project_root": str(project_root),
+        "output_dir": str(output_dir),
+        "project_name": f"bench-{spec.kind}",
+        "contract_history": False,
+        "in_process": in_process,
+    }
+    config_path.write_text(json.dumps(config, ensure_ascii=False, indent=2), encoding="utf-8")
+
+    case: Dict[str, Any] = {"name": spec.kind, "spec": asdict(spec), "corpus": asdict(stats), "status": "ok"}
+    runs, usages = [], []
+    for i in range(repeat):
+        log_path = case_dir / f"run-{i + 1}.log"
+        code, output, usage = run_once(config_path, output_dir, in_process, log_path)
+        if code != 0:
+            case.update({
+                "status": "failed", "exitCode": code, "log": str(log_path),
+                "error": "\n".join(output.rstrip().splitlines()[-LOG_TAIL_LINES:]),
+            })
+            print(f"[benchmark] ❌ {spec.kind} 第 {i + 1} 次运行失败（退出码 {code}）：\n{case['error']}")
+            return case
+        runs.append(json.loads((output_dir / "reports" / "workflow-metrics.json").read_text(encoding="utf-8")))
+        usages.append(usage)
+        print(f"[benchmark]   第 {i + 1}/{repeat} 次：{runs[-1]['wall_s']:.2f}s")
+    case.update(summarize(runs, usages, stats.files))
+    return case
+
+
+def _fmt_rate(v: Optional[float]) -> str:
+    return "—" if v is None else f"{v:,.0f}"
+
+
+def print_case(case: Dict[str, Any]) -> None:
+    if case["status"] != "ok":
+        return
+    print(
+        f"[benchmark] {case['name']}：总耗时 {case['wall_s']:.2f}s，{_fmt_rate(case['files_per_s'])} 文件/s，"
+        f"{_fmt_rate(case['endpoints_per_s'])} 接口/s，峰值内存 {case['peak_rss_kb'] / 1024:.1f} MB，接口 {case['endpoints']}"
+    )
+    for s in case["stages"]:
+        rates = [f"{_fmt_rate(s['files_per_s'])} 文件/s"] if s["files_per_s"] else []
+        rates += [f"{_fmt_rate(s['endpoints_per_s'])} 接口/s"] if s["endpoints_per_s"] else []
+        print(
+            f"    {s['name']:<9} {s['wall_s']:>7.3f}s  CPU {s['cpu_s']:>7.3f}s  "
+            f"内存 {s['peak_rss_kb'] / 1024:>6.1f} MB  {'，'.join(rates)}"
+        )
+
+
+def run_bench(args: argparse.Namespace) -> int:
+    kinds = parse_csv(args.kinds)
+    unknown = [k for k in kinds if k not in KINDS]
+    if unknown or not kinds:
+        print(f"[benchmark] ❌ 未知项目类型：{', '.join(unknown) or '（空）'}（可选：{', '.join(KINDS)}）")
+        return 2
+    specs = [corpus_spec(args, k) for k in kinds]
+    workdir = Path(args.workdir).resolve() if args.workdir else Path(tempfile.mkdtemp(prefix="api-bench-"))
+    mode = "in-process" if args.in_process else "subprocess"
+    try:
+        cases = []
+        for spec in specs:
+            case = bench_case(spec, workdir, max(1, args.repeat), args.in_process)
+            print_case(case)
+            cases.append(case)
+    finally:
+        if not args.workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    result = {
+        "version": BENCH_VERSION,
+        "generatedAt": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "mode": mode,
+        "repeat": max(1, args.repeat),
+        "cases": cases,
+    }
+    output = Path(args.output)
+    ArtifactWriter().write_text(output, json.dumps(result, ensure_ascii=False, indent=2) + "\n")
+    print(f"[benchmark] 结果：{output}")
+
+    code = 1 if any(c["status"] != "ok" for c in cases) else 0
+    if args.baseline:
+        code = max(code, compare_files(Path(args.baseline), output, args))
+    return code
+
+
+# =====================================================
+# 基线对比
+# =====================================================
+
+def _mb(kb: int) -> float:
+    return round(kb / 1024, 1)
+
+
+def compare_results(
+    baseline: Dict[str, Any], current: Dict[str, Any], threshold: float, min_seconds: float, min_memory_mb: float
+) -> Tuple[List[Dict[str, Any]], List[str]]:
+    """逐用例、逐阶段对比耗时、峰值内存与吞吐量；返回 (对比行, 无法对比的原因)"""
+    rows: List[Dict[str, Any]] = []
+    problems: List[str] = []
+    if baseline.get("mode") != current.get("mode"):
+        problems.append(f"执行模式不同：基线 {baseline.get('mode')}，本次 {current.get('mode')}")
+    base_cases = {c["name"]: c for c in baseline.get("cases", [])}
+
+    def add(case: str, metric: str, old: Optional[float], new: Optional[float], higher_better: bool, floor: float) -> None:
+        if not old or new is None:
+            return
+        change = (new - old) / old
+        worse = -change if higher_better else change
+        regressed = worse > threshold and (higher_better or new - old >= floor)
+        rows.append({"case": case, "metric": metric, "baseline": old, "current": new,
+                     "change": round(change, 4), "regressed": regressed})
+
+    for cur in current.get("cases", []):
+        base = base_cases.get(cur["name"])
+        if base is None:
+            problems.append(f"基线中没有用例 {cur['name']}")
+            continue
+        if base.get("spec") != cur.get("spec"):
+            problems.append(f"用例 {cur['name']} 的合成项目参数与基线不同")
+            continue
+        if "failed" in (base["status"], cur["status"]):
+            problems.append(f"用例 {cur['name']} 运行失败，无法对比")
+            continue
+        name = cur["name"]
+        add(name, "总耗时 (s)", base["wall_s"], cur["wall_s"], False, min_seconds)
+        add(name, "峰值内存 (MB)", _mb(base["peak_rss_kb"]), _mb(cur["peak_rss_kb"]), False, min_memory_mb)
+        # 吞吐量只在总耗时足够长、计时可信时参与判断
+        if min(base["wall_s"], cur["wall_s"]) >= min_seconds:
+            add(name, "文件/s", base["files_per_s"], cur["files_per_s"], True, 0)
+            add(name, "接口/s", base["endpoints_per_s"], cur["endpoints_per_s"], True, 0)
+        base_stages = {s["name"]: s for s in base["stages"]}
+        for s in cur["stages"]:
+            old = base_stages.get(s["name"])
+            if old is None:
+                continue
+            add(name, f"{s['name']} 耗时 (s)", old["wall_s"], s["wall_s"], False, min_seconds)
+            add(name, f"{s['name']} 峰值内存 (MB)", _mb(old["peak_rss_kb"]), _mb(s["peak_rss_kb"]), False, min_memory_mb)
+    return rows, problems
+
+
+def compare_files(baseline_path: Path, current_path: Path, args: argparse.Namespace) -> int:
+    try:
+        baseline = json.loads(baseline_path.read_text(encoding="utf-8"))
+        current = json.loads(current_path.read_text(encoding="utf-8"))
+    except (OSError, ValueError) as e:
+        print(f"[benchmark] ❌ 无法读取结果：{e}")
+        return 2
+    rows, problems = compare_results(baseline, current, args.threshold, args.min_seconds, args.min_memory_mb)
+    print(f"[benchmark] 对比基线 {baseline_path}（{baseline.get('generatedAt', '?')[:19]}），阈值 {args.threshold:.0%}")
+    for r in rows:
+        mark = "❌" if r["regressed"] else "  "
+        print(
+            f"  {mark} {r['case']:<12} {r['metric']:<20} {r['baseline']:>10,.3f} → {r['current']:>10,.3f}  {r['change']:+.1%}"
+        )
+    for p in problems:
+        print(f"[benchmark] ⚠️ {p}")
+    regressed = [r for r in rows if r["regressed"]]
+    if problems:
+        return 2
+    if regressed:
+        print(f"[benchmark] ❌ {len(regressed)} 项性能回退超过 {args.threshold:.0%}")
+        return 1
+    print("[benchmark] ✅ 未发现超过阈值的性能回退")
+    return 0
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    try:
+        if args.command == "generate":
+            spec = corpus_spec(args, args.kind)
+            stats = generate(spec, Path(args.output))
+            print(
+                f"[benchmark] 已生成 {args.output}：{stats.files} 个文件（bundle {stats.bundles}），"
+                f"{stats.call_sites} 个调用点，{stats.bytes / 1024:.0f} KB；模式分布 {stats.patterns}"
+            )
+            return 0
+        if args.command == "run":
+            return run_bench(args)
+        return compare_files(Path(args.baseline), Path(args.current), args)
+    except ValueError as e:
+        print(f"[benchmark] ❌ {e}")
+        return 2
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
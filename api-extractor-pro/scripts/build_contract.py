@@ -10,6 +10,9 @@ from datetime import datetime, timezone
 from pathlib import Path
 from typing import Any, Dict, List, Optional, Tuple
 
+import tracing
+from artifacts import ArtifactWriter
+
 
 HTTP_METHODS = {"GET", "POST", "PUT", "PATCH", "DELETE"}
 
@@ -23,13 +26,14 @@ def needs_auth_by_path(path: str) -> bool:
     return not any(kw in path_lower for kw in NO_AUTH_KEYWORDS)
 
 
-def parse_args() -> argparse.Namespace:
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
     parser = argparse.ArgumentParser(description="从扫描结果生成接口契约")
     parser.add_argument("--scan-result", required=True, help="scan_result.json 路径")
     parser.add_argument("--auth-mode", default="bearer", help="认证方式：bearer / cookie / custom")
     parser.add_argument("--output", default="contract.json", help="输出文件路径")
     parser.add_argument("--strict-mode", action="store_true", help="严格模式")
-    return parser.parse_args()
+    parser.add_argument("--trace", default="", help=f"输出 Chrome trace 追踪文件（也可用环境变量 {tracing.TRACE_ENV}）")
+    return parser.parse_args(argv)
 
 
 def endpoint_name(method: str, path: str) -> Tuple[str, str]:
@@ -116,8 +120,27 @@ def build_success_response(path: str) -> Dict:
     """构建成功响应模板"""
     has_path_param = bool(re.search(r"[:{]", path))
     is_list = (any(kw in path.lower() for kw in ["list", "search"]) or path.rstrip("/").endswith("s")) and not has_path_param
+    data_schema: Dict[str, Any] = {"type": "object"}
     if is_list:
         data = {"list": [], "total": 0, "page": 1, "pageSize": 10}
+        # 列表项结构为推断值，Mock 数据生成器据此合成分页数据
+        data_schema["properties"] = {
+            "list": {
+                "type": "array",
+                "items": {
+                    "type": "object",
+                    "properties": {
+                        "id": {"type": "integer"},
+                        "name": {"type": "string"},
+                        "status": {"type": "string"},
+                        "createdAt": {"type": "string", "format": "date-time"},
+                    },
+                },
+            },
+            "total": {"type": "integer"},
+            "page": {"type": "integer"},
+            "pageSize": {"type": "integer"},
+        }
     else:
         data = {}
     return {
@@ -127,7 +150,7 @@ def build_success_response(path: str) -> Dict:
             "type": "object",
             "properties": {
                 "code": {"type": "integer", "example": 200},
-                "data": {"type": "object"},
+                "data": data_schema,
                 "message": {"type": "string", "example": "success"},
             },
         },
@@ -195,24 +218,53 @@ def build_contract_endpoint(match: Dict, auth_mode: str) -> Dict:
     }
 
 
-def main() -> int:
-    args = parse_args()
-    scan_result = json.loads(Path(args.scan_result).read_text(encoding="utf-8"))
+def keep_generated_at(contract: Dict, output_path: Path) -> None:
+    """除生成时间外与已有契约完全相同时沿用原生成时间，使文件保持不变（下游阶段据此跳过）"""
+    try:
+        previous = json.loads(output_path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return
+    old_meta = dict(previous.get("meta", {}))
+    generated_at = old_meta.pop("generatedAt", None)
+    new_meta = {k: v for k, v in contract["meta"].items() if k != "generatedAt"}
+    if generated_at and old_meta == new_meta and previous.get("endpoints") == contract["endpoints"]:
+        contract["meta"]["generatedAt"] = generated_at
+
 
-    matches = scan_result.get("matches", [])
+def build_endpoints(matches: List[Dict], auth_mode: str, reuse: Optional[Dict[str, Dict]] = None) -> List[Dict]:
+    """从扫描匹配构建契约端点（同一 method + path 只取首个匹配）
+
+    reuse 为 匹配内容 → 端点 的缓存（--watch 模式跨轮次保留）：内容未变的匹配直接复用上次构建的端点，
+    只为新增或变化的匹配重新构建；调用结束后缓存只保留本次用到的条目
+    """
     # 过滤无法识别的匹配
     valid_matches = [m for m in matches if m.get("method") != "UNKNOWN" or m.get("path") != "[需要 AI 分析]"]
 
     endpoints = []
     seen = set()
+    used: Dict[str, Dict] = {}
     for m in valid_matches:
         key = (m.get("method", "GET").upper(), normalize_path_format(m.get("path", "/")))
         if key in seen:
             continue
         seen.add(key)
-        endpoints.append(build_contract_endpoint(m, args.auth_mode))
-
-    contract = {
+        memo_key = json.dumps(m, sort_keys=True, ensure_ascii=False) if reuse is not None else ""
+        ep = reuse.get(memo_key) if reuse is not None else None
+        if ep is None:
+            with tracing.span("contract.endpoint", method=key[0], path=key[1]):
+                ep = build_contract_endpoint(m, auth_mode)
+        used[memo_key] = ep
+        endpoints.append(ep)
+    if reuse is not None:
+        reuse.clear()
+        reuse.update(used)
+    return endpoints
+
+
+def assemble_contract(args: argparse.Namespace, scan_result: Dict, reuse: Optional[Dict[str, Dict]] = None) -> Dict:
+    """由扫描结果构建契约（不写文件）；reuse 见 build_endpoints()"""
+    endpoints = build_endpoints(scan_result.get("matches", []), args.auth_mode, reuse)
+    return {
         "meta": {
             "generatedAt": datetime.now(timezone.utc).isoformat(),
             "projectRoot": scan_result.get("projectRoot", str(Path(args.scan_result).parent.resolve())),
@@ -225,10 +277,28 @@ def main() -> int:
         "endpoints": endpoints,
     }
 
-    output_path = Path(args.output)
-    output_path.write_text(json.dumps(contract, ensure_ascii=False, indent=2), encoding="utf-8")
+
+def write_contract(contract: Dict, output_path: Path) -> None:
+    with tracing.span("contract.write"):
+        keep_generated_at(contract, output_path)
+        ArtifactWriter().write_text(output_path, json.dumps(contract, ensure_ascii=False, indent=2))
     print(f"[build-contract] 输出：{output_path}")
-    print(f"[build-contract] 接口数量：{len(endpoints)}")
+    print(f"[build-contract] 接口数量：{len(contract['endpoints'])}")
+
+
+def run(args: argparse.Namespace, scan_result: Optional[Dict] = None) -> Dict:
+    """生成并写出 contract.json，返回契约；scan_result 已在内存中时不再读取文件"""
+    if scan_result is None:
+        scan_result = json.loads(Path(args.scan_result).read_text(encoding="utf-8"))
+    contract = assemble_contract(args, scan_result)
+    write_contract(contract, Path(args.output))
+    return contract
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    with tracing.session(args.trace, "build_contract"):
+        run(args)
     return 0
 
 
@@ -8,17 +8,30 @@ import json
 import re
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Dict, List, Set, Tuple
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
 
+import tracing
+from deep_check import compare, contract_models, iter_spec_path_items, spec_models
+from fingerprint import MANIFEST_NAME, endpoint_fingerprint, endpoint_key, load_manifest, verified_files
+from lint_rules import RULES, LintCache, LintResult, lint_endpoints, load_plugins, ruleset_signature, select_rules
 
-def parse_args() -> argparse.Namespace:
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
     parser = argparse.ArgumentParser(description="校验契约、OpenAPI 和 MSW handlers 一致性")
     parser.add_argument("--contract", required=True, help="contract.json 路径")
-    parser.add_argument("--openapi", required=True, help="openapi.yaml 路径")
+    parser.add_argument("--openapi", required=True, help="openapi.yaml / openapi.json(.gz) 路径")
     parser.add_argument("--handlers", required=True, help="mock/handlers/ 目录路径")
     parser.add_argument("--report", required=True, help="报告输出路径")
+    parser.add_argument("--deep", action="store_true", help="结构级校验：比较参数、请求体、响应与错误（哈希树定位差异）")
+    parser.add_argument("--no-manifest", action="store_true", help="忽略生成清单，始终解析 OpenAPI 与 handler 文件")
+    parser.add_argument("--lint-rules", default="", help="额外启用的可选质量规则 id，逗号分隔（all 为全部）")
+    parser.add_argument("--skip-rules", default="", help="跳过的质量规则 id，逗号分隔")
+    parser.add_argument("--lint-plugins", default="", help="团队规则插件文件（.py，使用 @rule 注册），逗号分隔")
+    parser.add_argument("--lint-jobs", type=int, default=1, help="质量规则并行进程数（接口较多时使用）")
+    parser.add_argument("--no-lint-cache", action="store_true", help="不读写质量规则结果缓存")
     parser.add_argument("--strict-mode", action="store_true", help="严格模式，失败返回非零退出码")
-    return parser.parse_args()
+    parser.add_argument("--trace", default="", help=f"输出 Chrome trace 追踪文件（也可用环境变量 {tracing.TRACE_ENV}）")
+    return parser.parse_args(argv)
 
 
 def extract_contract_pairs(contract: Dict) -> Set[Tuple[str, str]]:
@@ -31,40 +44,36 @@ def extract_contract_pairs(contract: Dict) -> Set[Tuple[str, str]]:
     return pairs
 
 
-def extract_openapi_pairs(yaml_text: str) -> Set[Tuple[str, str]]:
-    """从 OpenAPI YAML 解析 method+path"""
-    pairs: Set[Tuple[str, str]] = set()
-    current_path = None
-    in_paths = False
-    path_indent = None
-
-    for line in yaml_text.splitlines():
-        stripped = line.strip()
-
-        if stripped == "paths:":
-            in_paths = True
-            path_indent = len(line) - len(line.lstrip(" "))
-            continue
-
-        if not in_paths or not stripped:
-            continue
-
-        indent = len(line) - len(line.lstrip(" "))
+HTTP_METHODS = {"get", "post", "put", "patch", "delete"}
 
-        # 退出 paths 块
-        if indent <= path_indent and stripped.endswith(":") and not stripped.startswith("/"):
-            break
 
-        # 路径行
-        if stripped.startswith("/") and stripped.endswith(":"):
-            current_path = stripped[:-1].strip().strip('"').strip("'")
+def extract_openapi_pairs(path_items: Iterable[Tuple[str, Any]], refs: Dict[str, str]) -> Set[Tuple[str, str]]:
+    """从 (path, path item) 序列提取 method+path；以 $ref 指向外部片段的路径记入 refs"""
+    pairs: Set[Tuple[str, str]] = set()
+    for path, item in path_items:
+        if not isinstance(item, dict):
             continue
+        ref = str(item.get("$ref", ""))
+        if ref and not ref.startswith("#"):
+            refs[path] = ref.split("#", 1)[0]
+        pairs.update((str(m).upper(), path) for m in item if m in HTTP_METHODS)
+    return pairs
 
-        # HTTP 方法行
-        m = re.match(r"^(get|post|put|patch|delete):$", stripped)
-        if m and current_path:
-            pairs.add((m.group(1).upper(), current_path))
 
+def load_openapi_pairs(openapi_path: Path) -> Set[Tuple[str, str]]:
+    """读取 OpenAPI 的 method+path（YAML 流式读取，或 JSON）；拆分模式下跟随 $ref 读取各模块片段"""
+    refs: Dict[str, str] = {}
+    pairs = extract_openapi_pairs(iter_spec_path_items(openapi_path), refs)
+    fragments: Dict[str, Set[Tuple[str, str]]] = {}
+    for path, ref in refs.items():
+        if ref not in fragments:
+            fragment_path = openapi_path.parent / ref
+            if fragment_path.is_file():
+                fragments[ref] = extract_openapi_pairs(iter_spec_path_items(fragment_path), {})
+            else:
+                print(f"[consistency] 警告：OpenAPI 片段不存在 {fragment_path}")
+                fragments[ref] = set()
+        pairs.update((m, p) for m, p in fragments[ref] if p == path)
     return pairs
 
 
@@ -82,20 +91,95 @@ def extract_handler_pairs(handlers_dir: Path) -> Set[Tuple[str, str]]:
     for fp in files:
         if fp.name in ("index.js", "index.ts"):
             continue
-        try:
-            content = fp.read_text(encoding="utf-8", errors="ignore")
-        except OSError:
-            continue
+        pairs |= parse_handler_file(fp)
+
+    return pairs
+
+
+def parse_handler_file(fp: Path) -> Set[Tuple[str, str]]:
+    """正则提取单个 handler 文件中的 method+path"""
+    pairs: Set[Tuple[str, str]] = set()
+    try:
+        content = fp.read_text(encoding="utf-8", errors="ignore")
+    except OSError:
+        return pairs
+
+    for m in re.finditer(r"http\.(get|post|put|patch|delete)\s*\(\s*'([^']+)'", content):
+        method = m.group(1).upper()
+        # 将 :id 转为 {id} 以便与契约对比
+        path = re.sub(r":(\w+)", r"{\1}", m.group(2))
+        pairs.add((method, path))
+    return pairs
 
-        for m in re.finditer(r"http\.(get|post|put|patch|delete)\s*\(\s*'([^']+)'", content):
-            method = m.group(1).upper()
-            # 将 :id 转为 {id} 以便与契约对比
-            path = re.sub(r":(\w+)", r"{\1}", m.group(2))
-            pairs.add((method, path))
 
+# =====================================================
+# 基于生成清单（manifest.json）的比对
+# =====================================================
+
+def split_key(key: str) -> Tuple[str, str]:
+    method, _, path = key.partition(" ")
+    return method, path
+
+
+def manifest_handler_pairs(handlers_dir: Path, stats: Dict[str, int]) -> Optional[Set[Tuple[str, str]]]:
+    """按 mock/manifest.json 读取 handler 接口：哈希一致的文件直接用清单，其余文件回退正则解析
+
+    无清单时返回 None
+    """
+    if not handlers_dir.is_dir():
+        return None
+    root = handlers_dir.parent
+    manifest = load_manifest(root / MANIFEST_NAME)
+    if manifest is None:
+        return None
+    files = [
+        fp for fp in sorted(list(handlers_dir.glob("*.js")) + list(handlers_dir.glob("*.ts")))
+        if fp.name not in ("index.js", "index.ts")
+    ]
+    names = {fp: fp.relative_to(root).as_posix() for fp in files}
+    verified = verified_files(manifest, root, names.values())
+    pairs: Set[Tuple[str, str]] = set()
+    for fp, name in names.items():
+        if verified[name]:
+            pairs.update(split_key(k) for k in manifest["files"][name]["endpoints"])
+            stats["manifest"] += 1
+        else:
+            pairs |= parse_handler_file(fp)
+            stats["parsed"] += 1
     return pairs
 
 
+def manifest_openapi_pairs(openapi_path: Path, stats: Dict[str, int]) -> Optional[Set[Tuple[str, str]]]:
+    """按 docs/manifest.json 读取 OpenAPI 接口：规范文件及其片段哈希均一致时直接用清单
+
+    无清单或文件不在清单中时返回 None；哈希不一致时回退完整解析
+    """
+    root = openapi_path.parent
+    manifest = load_manifest(root / MANIFEST_NAME)
+    if manifest is None or openapi_path.name not in manifest.get("files", {}):
+        return None
+    fragments = [name for name in manifest["files"] if name.startswith("openapi/")]
+    verified = verified_files(manifest, root, [openapi_path.name] + fragments)
+    if all(verified.values()):
+        stats["manifest"] += len(verified)
+        return {split_key(k) for k in manifest["files"][openapi_path.name]["endpoints"]}
+    stats["parsed"] += len(verified)
+    return load_openapi_pairs(openapi_path)
+
+
+def stale_endpoints(endpoints: List[Dict], manifest: Optional[Dict], label: str) -> List[str]:
+    """契约接口指纹与清单记录不一致：产物由旧版契约生成，需重新生成"""
+    if manifest is None:
+        return []
+    recorded = manifest.get("endpoints", {})
+    out = []
+    for ep in endpoints:
+        entry = recorded.get(endpoint_key(ep))
+        if entry is not None and entry.get("fingerprint") != endpoint_fingerprint(ep):
+            out.append(f"`{endpoint_key(ep)}`：{label} 由旧版契约生成")
+    return out
+
+
 def check_duplicates(endpoints: List[Dict]) -> List[str]:
     """检查重复接口"""
     seen = {}
@@ -108,33 +192,14 @@ def check_duplicates(endpoints: List[Dict]) -> List[str]:
     return dups
 
 
-def check_quality(endpoints: List[Dict]) -> List[str]:
-    """检查契约质量"""
-    issues: List[str] = []
-    for ep in endpoints:
-        name = ep.get("endpoint", "unknown")
-
-        # 命名规范
-        if "." not in name:
-            issues.append(f"`{name}`: 接口命名应为 `domain.action` 格式")
-
-        # 成功响应
-        has_success = any(
-            str(r.get("status", "")).startswith("2")
-            for r in ep.get("responses", [])
-        )
-        if not has_success:
-            issues.append(f"`{name}`: 缺少 2xx 成功响应")
-
-        # 错误响应
-        has_error = any(
-            str(e.get("status", "")).startswith(("4", "5"))
-            for e in ep.get("errors", [])
+def lint_summary(result: LintResult) -> List[str]:
+    """质量规则统计表：每条规则的违规数与耗时"""
+    lines = ["| 规则 | 说明 | 违规数 | 耗时 (ms) |", "|------|------|--------|-----------|"]
+    for rule_id, stats in result.stats.items():
+        lines.append(
+            f"| `{rule_id}` | {RULES[rule_id].description} | {stats.violations} | {stats.seconds * 1000:.1f} |"
         )
-        if not has_error:
-            issues.append(f"`{name}`: 缺少 4xx/5xx 错误响应")
-
-    return issues
+    return lines
 
 
 def format_pairs(pairs: List[Tuple[str, str]]) -> List[str]:
@@ -142,35 +207,77 @@ def format_pairs(pairs: List[Tuple[str, str]]) -> List[str]:
     return [f"`{m} {p}`" for m, p in sorted(pairs)]
 
 
-def main() -> int:
-    args = parse_args()
+def run(args: argparse.Namespace, contract: Optional[Dict] = None) -> int:
+    """contract 已在内存中时（run_workflow.py 进程内模式）不再读取 --contract 文件"""
 
     # 读取 contract
-    contract = json.loads(Path(args.contract).read_text(encoding="utf-8"))
+    if contract is None:
+        contract = json.loads(Path(args.contract).read_text(encoding="utf-8"))
     endpoints = contract.get("endpoints", [])
     contract_pairs = extract_contract_pairs(contract)
 
-    # 读取 OpenAPI
+    # 读取 OpenAPI（优先使用生成清单）
     openapi_path = Path(args.openapi)
-    if openapi_path.exists():
-        openapi_pairs = extract_openapi_pairs(openapi_path.read_text(encoding="utf-8"))
-    else:
-        openapi_pairs = set()
-        print(f"[consistency] 警告：OpenAPI 文件不存在 {args.openapi}")
-
-    # 读取 MSW handlers
+    openapi_stats = {"manifest": 0, "parsed": 0}
+    openapi_pairs: Optional[Set[Tuple[str, str]]] = None
+    with tracing.span("check.openapi"):
+        if not openapi_path.exists():
+            openapi_pairs = set()
+            print(f"[consistency] 警告：OpenAPI 文件不存在 {args.openapi}")
+        elif not args.no_manifest:
+            openapi_pairs = manifest_openapi_pairs(openapi_path, openapi_stats)
+        if openapi_pairs is None:
+            openapi_pairs = load_openapi_pairs(openapi_path)
+            openapi_stats["parsed"] += 1
+
+    # 读取 MSW handlers（优先使用生成清单）
     handlers_path = Path(args.handlers)
-    handler_pairs = extract_handler_pairs(handlers_path)
+    handler_stats = {"manifest": 0, "parsed": 0}
+    with tracing.span("check.handlers"):
+        handler_pairs = None if args.no_manifest else manifest_handler_pairs(handlers_path, handler_stats)
+        if handler_pairs is None:
+            handler_pairs = extract_handler_pairs(handlers_path)
+            handler_stats["parsed"] = -1
+
+    # 产物是否落后于契约
+    stale: List[str] = []
+    if not args.no_manifest:
+        stale += stale_endpoints(endpoints, load_manifest(openapi_path.parent / MANIFEST_NAME), "OpenAPI")
+        if handlers_path.is_dir():
+            stale += stale_endpoints(endpoints, load_manifest(handlers_path.parent / MANIFEST_NAME), "MSW Handler")
 
     # 执行检查
     duplicates = check_duplicates(endpoints)
-    quality_issues = check_quality(endpoints)
+    meta = contract.get("meta", {})
+    plugins = [p.strip() for p in args.lint_plugins.split(",") if p.strip()]
+    load_plugins(plugins)
+    enabled = {r.strip() for r in args.lint_rules.split(",") if r.strip()}
+    skipped = {r.strip() for r in args.skip_rules.split(",") if r.strip()}
+    for r in sorted((enabled | skipped) - set(RULES) - {"all"}):
+        print(f"[consistency] 警告：未知的质量规则 {r}")
+    rule_ids = select_rules(enabled, skipped)
+    lint_cache_path = Path(args.report).parent / ".cache" / "lint.json"
+    lint_cache = None if args.no_lint_cache else LintCache.load(
+        lint_cache_path, ruleset_signature(rule_ids, meta, plugins)
+    )
+    with tracing.span("check.lint", rules=len(rule_ids), endpoints=len(endpoints)):
+        lint = lint_endpoints(endpoints, meta, rule_ids, lint_cache, args.lint_jobs, plugins)
+    if lint_cache is not None:
+        lint_cache.save(lint_cache_path)
+    quality_issues = lint.issues
 
     missing_in_openapi = contract_pairs - openapi_pairs
     missing_in_handlers = contract_pairs - handler_pairs
     extra_in_openapi = openapi_pairs - contract_pairs
     extra_in_handlers = handler_pairs - contract_pairs
 
+    # 结构级校验：哈希树逐层比较，只对不同的分段做字段 diff
+    deep_issues: List[str] = []
+    deep_stats: Optional[Dict[str, int]] = None
+    if args.deep and openapi_path.exists():
+        with tracing.span("check.deep"):
+            deep_issues, deep_stats = compare(contract_models(endpoints), spec_models(openapi_path))
+
     # 生成报告
     ts = datetime.now(timezone.utc).isoformat()
     lines: List[str] = []
@@ -180,6 +287,19 @@ def main() -> int:
     lines.append(f"- 契约接口数：`{len(contract_pairs)}`")
     lines.append(f"- OpenAPI 接口数：`{len(openapi_pairs)}`")
     lines.append(f"- MSW Handler 数：`{len(handler_pairs)}`")
+    lines.append(f"- OpenAPI 文件：清单命中 `{openapi_stats['manifest']}`，解析 `{openapi_stats['parsed']}`")
+    if handler_stats["parsed"] < 0:
+        lines.append("- Handler 文件：无清单，全部解析")
+    else:
+        lines.append(f"- Handler 文件：清单命中 `{handler_stats['manifest']}`，解析 `{handler_stats['parsed']}`")
+    lines.append(
+        f"- 质量规则：`{len(rule_ids)}` 条，检查接口 `{lint.checked}`，缓存命中 `{lint.cache_hits}`"
+    )
+    if deep_stats is not None:
+        lines.append(
+            f"- 结构校验：共有接口 `{deep_stats['endpoints']}`，哈希不一致 `{deep_stats['changed']}`，"
+            f"差异分段 `{deep_stats['sections']}`"
+        )
     lines.append("")
 
     total_issues = 0
@@ -198,10 +318,17 @@ def main() -> int:
 
     section("重复接口", duplicates)
     section("契约质量问题", quality_issues, "⚠️")
+    lines.append("## 质量规则统计")
+    lines.append("")
+    lines.extend(lint_summary(lint))
+    lines.append("")
     section("契约中有但 OpenAPI 中缺失", format_pairs(list(missing_in_openapi)))
     section("契约中有但 MSW Handler 中缺失", format_pairs(list(missing_in_handlers)))
     section("OpenAPI 中多余（契约中不存在）", format_pairs(list(extra_in_openapi)), "⚠️")
     section("MSW Handler 中多余（契约中不存在）", format_pairs(list(extra_in_handlers)), "⚠️")
+    section("产物与契约不同步（需重新生成）", stale, "⚠️")
+    if deep_stats is not None:
+        section("结构差异（契约 ↔ OpenAPI）", deep_issues)
 
     # 汇总
     lines.append("## 汇总")
@@ -215,7 +342,8 @@ def main() -> int:
     # 写入报告
     report_path = Path(args.report)
     report_path.parent.mkdir(parents=True, exist_ok=True)
-    report_path.write_text("\n".join(lines), encoding="utf-8")
+    with tracing.span("check.report"):
+        report_path.write_text("\n".join(lines), encoding="utf-8")
     print(f"[consistency] 报告：{report_path}")
 
     if total_issues > 0 and args.strict_mode:
@@ -226,5 +354,11 @@ def main() -> int:
     return 0
 
 
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    with tracing.session(args.trace, "check_consistency"):
+        return run(args)
+
+
 if __name__ == "__main__":
     raise SystemExit(main())
@@ -0,0 +1,345 @@
+"""
+contract_diff.py — 契约之间的字段级结构 diff
+把每个接口规范化为只含语义字段的模型（参数 / 请求体 / 响应 / 错误；去掉 source、示例与描述），
+逐接口、逐分段比较哈希，只对哈希不同的分段递归比较字段，给出参数类型变化、必填切换、响应字段移除等具体变更，
+并按对调用方的影响标记是否为破坏性变更。耗时与契约大小成线性关系：除来源位置外完全相同的接口直接跳过，
+其余接口各计算一次分段哈希，只有语义确实变化的分段才递归比较
+"""
+import json
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+from artifacts import sha256_bytes
+from fingerprint import canonical, endpoint_key
+
+SECTIONS = ("params", "body", "responses", "errors")
+SECTION_LABELS = {"params": "参数", "body": "请求体字段", "responses": "响应字段", "errors": "错误"}
+# schema 节点上不影响接口形状的键（示例、说明）
+DOC_KEYS = {"example", "examples", "description", "title"}
+STATUS_LABELS = {"added": "🟢 新增", "removed": "🔴 删除", "modified": "🟡 修改"}
+
+
+@dataclass
+class FieldChange:
+    """单处字段变化"""
+    section: str
+    path: str
+    kind: str  # added / removed / type / required / optional / enum / attr
+    old: Any
+    new: Any
+    breaking: bool
+    message: str
+
+
+@dataclass
+class EndpointDiff:
+    """单个接口的变化（added / removed / modified）"""
+    key: str
+    method: str
+    path: str
+    status: str
+    changes: List[FieldChange] = field(default_factory=list)
+
+    @property
+    def breaking(self) -> bool:
+        return self.status == "removed" or any(c.breaking for c in self.changes)
+
+    def label(self) -> str:
+        """变更类型摘要（沿用 api-diff 报告的 breaking / non-breaking 写法）"""
+        if self.status == "added":
+            return "non-breaking（新增接口）"
+        if self.status == "removed":
+            return "⚠️ breaking（删除接口）"
+        breaking = [c for c in self.changes if c.breaking]
+        if not breaking:
+            return "non-breaking（兼容更新）"
+        more = f" 等 {len(breaking)} 处" if len(breaking) > 1 else ""
+        return f"⚠️ breaking（{breaking[0].message}{more}）"
+
+
+@dataclass
+class ContractDiff:
+    endpoints: List[EndpointDiff]
+    old_total: int
+    new_total: int
+    unchanged: int
+    stats: Dict[str, int]
+
+    def count(self, status: str) -> int:
+        return sum(1 for d in self.endpoints if d.status == status)
+
+    @property
+    def breaking(self) -> List[EndpointDiff]:
+        return [d for d in self.endpoints if d.breaking]
+
+
+# =====================================================
+# 规范化
+# =====================================================
+
+def strip_schema(node: Any) -> Any:
+    """去掉 schema 各层节点上的示例与说明（properties 下的字段名不受影响）"""
+    if isinstance(node, list):
+        return [strip_schema(x) for x in node]
+    if not isinstance(node, dict):
+        return node
+    out: Dict[str, Any] = {}
+    for k, v in node.items():
+        if k in DOC_KEYS:
+            continue
+        if k == "properties" and isinstance(v, dict):
+            out[k] = {name: strip_schema(sub) for name, sub in v.items()}
+        elif k in ("items", "additionalProperties", "allOf", "anyOf", "oneOf", "not"):
+            out[k] = strip_schema(v)
+        else:
+            out[k] = v
+    return out
+
+
+def _param(kind: str, p: Dict) -> Tuple[str, Dict]:
+    attrs = {k: v for k, v in p.items() if k not in DOC_KEYS and k != "name"}
+    attrs["type"] = attrs.get("type") or "string"
+    attrs["required"] = True if kind == "path" else bool(attrs.get("required", False))
+    return f"{kind}.{p.get('name')}", attrs
+
+
+def normalize_endpoint(ep: Dict) -> Dict[str, Any]:
+    """契约接口 → 只含语义字段的模型"""
+    params = dict(
+        [_param("path", p) for p in ep.get("pathParams", []) or []]
+        + [_param("query", q) for q in ep.get("query", []) or []]
+        + [_param("header", h) for h in ep.get("headers", []) or []]
+    )
+    body = ep.get("requestBody")
+    return {
+        "params": params,
+        "body": {
+            "contentType": body.get("contentType", "application/json"),
+            "schema": strip_schema(body.get("schema", {"type": "object"})),
+        } if body else None,
+        "responses": {
+            str(r.get("status", 200)): strip_schema(r.get("schema", {"type": "object"}))
+            for r in ep.get("responses", []) or []
+        },
+        "errors": {str(e.get("status", 400)): e.get("code") for e in ep.get("errors", []) or []},
+    }
+
+
+def _hash(obj: Any) -> str:
+    return sha256_bytes(canonical(obj).encode("utf-8"))[:16]
+
+
+def section_digests(model: Dict[str, Any]) -> Dict[str, str]:
+    return {s: _hash(model.get(s)) for s in SECTIONS}
+
+
+def endpoint_digest(ep: Dict) -> str:
+    """接口语义哈希：source、示例、说明变化不影响"""
+    sections = section_digests(normalize_endpoint(ep))
+    return _hash([sections[s] for s in SECTIONS])
+
+
+# =====================================================
+# 字段级比较
+# =====================================================
+
+def _fmt(v: Any) -> str:
+    return json.dumps(v, ensure_ascii=False)
+
+
+class _Collector:
+    def __init__(self, section: str):
+        self.section = section
+        self.label = SECTION_LABELS[section]
+        self.changes: List[FieldChange] = []
+
+    def add(self, path: str, kind: str, old: Any, new: Any, breaking: bool, text: str) -> None:
+        self.changes.append(FieldChange(self.section, path, kind, old, new, breaking, f"{self.label} `{path}` {text}"))
+
+
+def _enum_diff(out: _Collector, path: str, old: Any, new: Any, request: bool) -> None:
+    old_set = old if isinstance(old, list) else []
+    new_set = new if isinstance(new, list) else []
+    removed = [x for x in old_set if x not in new_set]
+    added = [x for x in new_set if x not in old_set]
+    parts = []
+    if added:
+        parts.append(f"新增 {', '.join(_fmt(x) for x in added)}")
+    if removed:
+        parts.append(f"移除 {', '.join(_fmt(x) for x in removed)}")
+    if old is None or new is None:
+        # 新增枚举约束收窄了请求的取值；取消约束放宽了响应的取值
+        breaking = (new is not None) if request else (old is not None)
+    else:
+        breaking = bool(removed) if request else bool(added)
+    out.add(path, "enum", old, new, breaking, f"枚举值{'、'.join(parts) or '变化'}")
+
+
+def _attrs_diff(out: _Collector, path: str, old: Dict, new: Dict, request: bool, skip: Tuple[str, ...]) -> None:
+    """type / enum / format 等标量属性"""
+    for k in sorted(set(old) | set(new)):
+        if k in skip or old.get(k) == new.get(k):
+            continue
+        if k == "type":
+            out.add(path, "type", old.get(k), new.get(k), True, f"类型 `{old.get(k)}` → `{new.get(k)}`")
+        elif k == "enum":
+            _enum_diff(out, path, old.get(k), new.get(k), request)
+        else:
+            out.add(
+                path, "attr", old.get(k), new.get(k), k == "format",
+                f"的 `{k}` {_fmt(old.get(k))} → {_fmt(new.get(k))}",
+            )
+
+
+def schema_diff(out: _Collector, path: str, old: Any, new: Any, request: bool) -> None:
+    """递归比较 JSON Schema；request 决定兼容性方向（请求收紧、响应放宽为破坏性变更）"""
+    if old == new:
+        return
+    if not isinstance(old, dict) or not isinstance(new, dict):
+        out.add(path, "type", old, new, True, f"{_fmt(old)} → {_fmt(new)}")
+        return
+    if old.get("type") != new.get("type"):
+        out.add(path, "type", old.get("type"), new.get("type"), True, f"类型 `{old.get('type')}` → `{new.get('type')}`")
+        return
+
+    old_props = old.get("properties") or {}
+    new_props = new.get("properties") or {}
+    old_req = set(old.get("required") or [])
+    new_req = set(new.get("required") or [])
+    for name in sorted(set(old_props) | set(new_props)):
+        sub = f"{path}.{name}"
+        if name not in new_props:
+            # 响应少了字段会破坏读取它的调用方；请求少了字段只是不再读取
+            out.add(sub, "removed", old_props[name], None, not request, "移除")
+        elif name not in old_props:
+            required = name in new_req
+            out.add(sub, "added", None, new_props[name], request and required, "新增（必填）" if required else "新增")
+        else:
+            schema_diff(out, sub, old_props[name], new_props[name], request)
+    for name in sorted((old_req ^ new_req) & set(old_props) & set(new_props)):
+        sub = f"{path}.{name}"
+        if name in new_req:
+            out.add(sub, "required", False, True, request, "改为必填")
+        else:
+            out.add(sub, "optional", True, False, not request, "改为可选")
+
+    if old.get("items") != new.get("items"):
+        schema_diff(out, f"{path}[]", old.get("items"), new.get("items"), request)
+    for k in ("additionalProperties", "allOf", "anyOf", "oneOf"):
+        if old.get(k) != new.get(k):
+            out.add(path, "attr", old.get(k), new.get(k), True, f"的 `{k}` 变化")
+    _attrs_diff(
+        out, path, old, new, request,
+        skip=("type", "properties", "required", "items", "additionalProperties", "allOf", "anyOf", "oneOf"),
+    )
+
+
+def params_diff(old: Dict[str, Dict], new: Dict[str, Dict]) -> List[FieldChange]:
+    out = _Collector("params")
+    for key in sorted(set(old) | set(new)):
+        if key not in new:
+            out.add(key, "removed", old[key], None, True, "移除")
+        elif key not in old:
+            required = new[key]["required"]
+            out.add(key, "added", None, new[key], required, "新增（必填）" if required else "新增（可选）")
+        elif old[key] != new[key]:
+            if old[key]["required"] != new[key]["required"]:
+                if new[key]["required"]:
+                    out.add(key, "required", False, True, True, "改为必填")
+                else:
+                    out.add(key, "optional", True, False, False, "改为可选")
+            _attrs_diff(out, key, old[key], new[key], True, skip=("required",))
+    return out.changes
+
+
+def body_diff(old: Optional[Dict], new: Optional[Dict]) -> List[FieldChange]:
+    out = _Collector("body")
+    if old is None:
+        out.add("body", "added", None, new, True, "新增请求体")
+    elif new is None:
+        out.add("body", "removed", old, None, False, "移除请求体")
+    else:
+        if old["contentType"] != new["contentType"]:
+            out.add(
+                "body", "attr", old["contentType"], new["contentType"], True,
+                f"Content-Type `{old['contentType']}` → `{new['contentType']}`",
+            )
+        schema_diff(out, "body", old["schema"], new["schema"], request=True)
+    return out.changes
+
+
+def responses_diff(old: Dict[str, Any], new: Dict[str, Any]) -> List[FieldChange]:
+    out = _Collector("responses")
+    for status in sorted(set(old) | set(new)):
+        if status not in new:
+            out.add(status, "removed", old[status], None, True, "响应移除")
+        elif status not in old:
+            out.add(status, "added", None, new[status], False, "响应新增")
+        else:
+            schema_diff(out, status, old[status], new[status], request=False)
+    return out.changes
+
+
+def errors_diff(old: Dict[str, Any], new: Dict[str, Any]) -> List[FieldChange]:
+    out = _Collector("errors")
+    for status in sorted(set(old) | set(new)):
+        if status not in new:
+            out.add(status, "removed", old[status], None, False, "移除")
+        elif status not in old:
+            out.add(status, "added", None, new[status], False, "新增")
+        elif old[status] != new[status]:
+            out.add(status, "attr", old[status], new[status], False, f"错误码 `{old[status]}` → `{new[status]}`")
+    return out.changes
+
+
+SECTION_DIFFS = {"params": params_diff, "body": body_diff, "responses": responses_diff, "errors": errors_diff}
+
+
+# =====================================================
+# 契约比较
+# =====================================================
+
+def _index(contract: Dict) -> Dict[str, Dict]:
+    return {endpoint_key(ep): ep for ep in contract.get("endpoints", [])}
+
+
+def _without_source(ep: Dict) -> Dict:
+    return {k: v for k, v in ep.items() if k != "source"}
+
+
+def diff_contracts(old: Dict, new: Dict) -> ContractDiff:
+    """比较两份契约：逐接口比较语义哈希，只对哈希不同的分段做字段级比较
+
+    stats：compared 为语义哈希不同、做了字段级比较的接口数，sections 为其中比较的分段数
+    """
+    old_eps = _index(old)
+    new_eps = _index(new)
+    stats = {"compared": 0, "sections": 0}
+    diffs: List[EndpointDiff] = []
+    unchanged = 0
+    for key in sorted(set(old_eps) | set(new_eps)):
+        method, _, path = key.partition(" ")
+        if key not in new_eps:
+            diffs.append(EndpointDiff(key, method, path, "removed"))
+            continue
+        if key not in old_eps:
+            diffs.append(EndpointDiff(key, method, path, "added"))
+            continue
+        if _without_source(old_eps[key]) == _without_source(new_eps[key]):
+            unchanged += 1  # 快速路径：除来源位置外完全相同，无需规范化
+            continue
+        old_model = normalize_endpoint(old_eps[key])
+        new_model = normalize_endpoint(new_eps[key])
+        old_digests = section_digests(old_model)
+        new_digests = section_digests(new_model)
+        if old_digests == new_digests:
+            unchanged += 1
+            continue
+        stats["compared"] += 1
+        changes: List[FieldChange] = []
+        for section in SECTIONS:
+            if old_digests[section] != new_digests[section]:
+                stats["sections"] += 1
+                changes.extend(SECTION_DIFFS[section](old_model[section], new_model[section]))
+        diffs.append(EndpointDiff(key, method, path, "modified", changes))
+    return ContractDiff(diffs, len(old_eps), len(new_eps), unchanged, stats)
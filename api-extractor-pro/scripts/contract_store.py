@@ -0,0 +1,452 @@
+#!/usr/bin/env python3
+"""
+contract_store.py — 契约历史版本库（内容寻址）
+每次工作流运行后把 contract.json 存为一个版本：接口、按模块连续分段的接口列表（树）、版本根都按内容哈希存为对象，
+相同内容只存一份，因此未变化的接口与模块在各版本间共享，存 1000 个版本的开销接近一个版本加上各次变化的部分。
+index.jsonl 按时间顺序记录每个版本的时间戳与 git 提交，支持按时间、git 版本或版本号取出任意版本、
+在任意两个版本间 diff（树哈希相同的模块整段跳过），以及查询某个接口何时新增、何时变更
+
+  contract_store.py --config config.json log
+  contract_store.py --config config.json diff HEAD~5 latest        # git 版本 / 版本号 / @时间 / latest~N
+  contract_store.py --config config.json history GET /api/users/{id}
+  contract_store.py --config config.json show @2026-10-01 --output old-contract.json
+"""
+import argparse
+import json
+import subprocess
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from artifacts import ArtifactWriter, sha256_bytes, sha256_file
+from contract_diff import STATUS_LABELS, ContractDiff, diff_contracts, endpoint_digest
+from fingerprint import canonical, endpoint_key
+
+STORE_VERSION = 1
+STORE_DIRNAME = ".contract-history"
+
+
+def git_revision(project_root: Path) -> Tuple[Optional[str], bool]:
+    """(HEAD 提交, 工作区是否有未提交的修改)；不是 git 仓库时为 (None, False)"""
+    try:
+        rev = subprocess.run(
+            ["git", "-C", str(project_root), "rev-parse", "HEAD"], capture_output=True, text=True, timeout=10
+        )
+        if rev.returncode != 0:
+            return None, False
+        status = subprocess.run(
+            ["git", "-C", str(project_root), "status", "--porcelain", "--untracked-files=no"],
+            capture_output=True, text=True, timeout=30,
+        )
+    except (OSError, subprocess.TimeoutExpired):
+        return None, False
+    return rev.stdout.strip(), bool(status.stdout.strip())
+
+
+def _git(project_root: Path, *args: str) -> Optional[str]:
+    try:
+        out = subprocess.run(["git", "-C", str(project_root), *args], capture_output=True, text=True, timeout=10)
+    except (OSError, subprocess.TimeoutExpired):
+        return None
+    return out.stdout.strip() if out.returncode == 0 else None
+
+
+def _segments(endpoints: List[Dict]) -> Iterator[Tuple[str, List[Dict]]]:
+    """按 module 切分为连续分段（保持接口原有顺序，取出时可逐字节还原）"""
+    current: Optional[str] = None
+    chunk: List[Dict] = []
+    for ep in endpoints:
+        module = str(ep.get("module", "default"))
+        if chunk and module != current:
+            yield current or "default", chunk
+            chunk = []
+        current = module
+        chunk.append(ep)
+    if chunk:
+        yield current or "default", chunk
+
+
+class ContractStore:
+    """objects/<2>/<sha256>.json 存放接口、分段树与版本根；index.jsonl 每行一条版本记录"""
+
+    def __init__(self, root: Path):
+        self.root = Path(root)
+        self.objects_dir = self.root / "objects"
+        self.index_path = self.root / "index.jsonl"
+        self.writer = ArtifactWriter()
+        self._cache: Dict[str, Any] = {}
+        self._entries: Optional[List[Dict[str, Any]]] = None
+
+    # ---- 对象 ----
+
+    def _object_path(self, digest: str) -> Path:
+        return self.objects_dir / digest[:2] / f"{digest}.json"
+
+    def put_object(self, obj: Any) -> str:
+        """按规范化 JSON 的哈希存储；文件保留原有键顺序，取出的契约与原文件一致"""
+        digest = sha256_bytes(canonical(obj).encode("utf-8"))
+        path = self._object_path(digest)
+        if not path.exists():
+            self.writer.write_text(path, json.dumps(obj, ensure_ascii=False, separators=(",", ":")))
+        self._cache[digest] = obj
+        return digest
+
+    def get_object(self, digest: str) -> Any:
+        if digest not in self._cache:
+            self._cache[digest] = json.loads(self._object_path(digest).read_text(encoding="utf-8"))
+        return self._cache[digest]
+
+    # ---- 索引 ----
+
+    def entries(self) -> List[Dict[str, Any]]:
+        """全部版本记录（按记录时间排序）"""
+        if self._entries is None:
+            self._entries = []
+            try:
+                with open(self.index_path, encoding="utf-8") as fh:
+                    for line in fh:
+                        try:
+                            self._entries.append(json.loads(line))
+                        except ValueError:
+                            continue
+            except OSError:
+                pass
+        return self._entries
+
+    def _append(self, entry: Dict[str, Any]) -> None:
+        self.root.mkdir(parents=True, exist_ok=True)
+        with open(self.index_path, "a", encoding="utf-8") as fh:
+            fh.write(json.dumps(entry, ensure_ascii=False, separators=(",", ":")) + "\n")
+        self.entries().append(entry)
+
+    # ---- 写入 ----
+
+    def record(
+        self, contract_path: Path, git_rev: Optional[str] = None, dirty: bool = False
+    ) -> Tuple[Dict[str, Any], bool]:
+        """记录 contract.json 为新版本；返回 (版本记录, 是否新增了记录)
+
+        文件内容与 git 版本都与上一条记录相同时直接跳过（不解析契约）；只有 git 版本变化时追加一条指向同一版本的记录
+        """
+        file_sha = sha256_file(contract_path)
+        last = self.entries()[-1] if self.entries() else None
+        if last is not None and last.get("contractSha256") == file_sha:
+            if last.get("gitRev") == git_rev and last.get("dirty") == dirty:
+                return last, False
+            version, generated_at, total = last["version"], last.get("generatedAt"), last["endpoints"]
+        else:
+            contract = json.loads(contract_path.read_text(encoding="utf-8"))
+            version = self.put(contract)
+            generated_at = contract.get("meta", {}).get("generatedAt")
+            total = len(contract.get("endpoints", []))
+        entry = {
+            "version": version,
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "generatedAt": generated_at,
+            "gitRev": git_rev,
+            "dirty": dirty,
+            "endpoints": total,
+            "contractSha256": file_sha,
+        }
+        self._append(entry)
+        return entry, True
+
+    def put(self, contract: Dict) -> str:
+        """存储契约的全部对象，返回版本号（版本根对象的哈希）"""
+        segments = []
+        for module, eps in _segments(contract.get("endpoints", [])):
+            rows = [[endpoint_key(ep), self.put_object(ep), endpoint_digest(ep)] for ep in eps]
+            segments.append([module, self.put_object({"endpoints": rows})])
+        meta = {k: v for k, v in contract.get("meta", {}).items() if k != "generatedAt"}
+        return self.put_object({"store": STORE_VERSION, "meta": meta, "segments": segments})
+
+    # ---- 读取 ----
+
+    def load(self, entry: Dict[str, Any]) -> Dict:
+        """还原某条记录对应的契约"""
+        root = self.get_object(entry["version"])
+        meta = dict(root["meta"])
+        if entry.get("generatedAt"):
+            meta = {"generatedAt": entry["generatedAt"], **meta}
+        endpoints = [
+            self.get_object(obj)
+            for _, tree in root["segments"]
+            for _, obj, _ in self.get_object(tree)["endpoints"]
+        ]
+        return {"meta": meta, "endpoints": endpoints}
+
+    def rows(self, version: str) -> Dict[str, Tuple[str, str]]:
+        """版本中的 接口 → (接口对象哈希, 语义哈希)"""
+        out: Dict[str, Tuple[str, str]] = {}
+        for _, tree in self.get_object(version)["segments"]:
+            for key, obj, sem in self.get_object(tree)["endpoints"]:
+                out[key] = (obj, sem)
+        return out
+
+    def resolve(self, ref: str, project_root: Optional[Path] = None) -> Dict[str, Any]:
+        """按引用查找记录：latest / latest~N、@时间（取该时间及之前最近的记录）、版本号前缀、git 版本
+
+        git 版本先匹配记录中的提交哈希前缀，再在 project_root 中 git rev-parse（支持 HEAD~3、分支名）；
+        该提交本身没有记录时取其最近的、有记录的祖先提交
+        """
+        entries = self.entries()
+        if not entries:
+            raise ValueError("契约历史为空")
+        if ref == "latest" or ref.startswith("latest~"):
+            back = int(ref.partition("~")[2] or 0)
+            versions = _distinct_versions(entries)
+            if back >= len(versions):
+                raise ValueError(f"历史中只有 {len(versions)} 个不同版本")
+            return versions[-1 - back]
+        if ref.startswith("@"):
+            when = _parse_time(ref[1:])
+            before = [e for e in entries if _parse_time(e["timestamp"]) <= when]
+            if not before:
+                raise ValueError(f"{ref[1:]} 之前没有记录")
+            return before[-1]
+        lowered = ref.lower()
+        if len(lowered) >= 4 and all(c in "0123456789abcdef" for c in lowered):
+            for e in reversed(entries):
+                if e["version"].startswith(lowered):
+                    return e
+            for e in reversed(entries):
+                if (e.get("gitRev") or "").startswith(lowered):
+                    return e
+        if project_root is not None:
+            commit = _git(project_root, "rev-parse", "--verify", "--quiet", f"{ref}^{{commit}}")
+            if commit:
+                recorded = [e for e in entries if e.get("gitRev")]
+                for e in reversed(recorded):
+                    if e["gitRev"] == commit:
+                        return e
+                checked = set()
+                for e in reversed(recorded):
+                    if e["gitRev"] in checked:
+                        continue
+                    checked.add(e["gitRev"])
+                    if _git(project_root, "merge-base", "--is-ancestor", e["gitRev"], commit) is not None:
+                        return e
+        raise ValueError(f"找不到版本：{ref}")
+
+    # ---- 比较与查询 ----
+
+    def diff(self, old: Dict[str, Any], new: Dict[str, Any]) -> ContractDiff:
+        """任意两条记录间的字段级 diff：树哈希相同的模块整段跳过，语义哈希相同的接口不读取对象"""
+        old_root, new_root = self.get_object(old["version"]), self.get_object(new["version"])
+        old_trees = {tree for _, tree in old_root["segments"]}
+        new_trees = {tree for _, tree in new_root["segments"]}
+        shared_trees = old_trees & new_trees
+        old_rows = self._rows_excluding(old_root, shared_trees)
+        new_rows = self._rows_excluding(new_root, shared_trees)
+        shared_in_trees = sum(len(self.get_object(t)["endpoints"]) for t in shared_trees)
+
+        same = {k for k in set(old_rows) & set(new_rows) if old_rows[k][1] == new_rows[k][1]}
+        old_sub = {"endpoints": [self.get_object(old_rows[k][0]) for k in old_rows if k not in same]}
+        new_sub = {"endpoints": [self.get_object(new_rows[k][0]) for k in new_rows if k not in same]}
+        result = diff_contracts(old_sub, new_sub)
+        result.old_total = old.get("endpoints", len(old_rows) + shared_in_trees)
+        result.new_total = new.get("endpoints", len(new_rows) + shared_in_trees)
+        result.unchanged += len(same) + shared_in_trees
+        return result
+
+    def _rows_excluding(self, root: Dict, skip: set) -> Dict[str, Tuple[str, str]]:
+        out: Dict[str, Tuple[str, str]] = {}
+        for _, tree in root["segments"]:
+            if tree not in skip:
+                for key, obj, sem in self.get_object(tree)["endpoints"]:
+                    out[key] = (obj, sem)
+        return out
+
+    def history(self, key: str) -> List[Dict[str, Any]]:
+        """接口在各版本中的变化：added / changed / removed（只看语义哈希，来源位置变化不计）"""
+        events: List[Dict[str, Any]] = []
+        prev: Optional[Tuple[str, str]] = None
+        prev_version = None
+        for e in self.entries():
+            if e["version"] == prev_version:
+                continue
+            prev_version = e["version"]
+            row = self.rows(e["version"]).get(key)
+            event = None
+            if row and not prev:
+                event = {"event": "added"}
+            elif prev and not row:
+                event = {"event": "removed"}
+            elif row and prev and row[1] != prev[1]:
+                d = diff_contracts({"endpoints": [self.get_object(prev[0])]}, {"endpoints": [self.get_object(row[0])]})
+                event = {"event": "changed", "changes": [
+                    {"message": c.message, "breaking": c.breaking} for ed in d.endpoints for c in ed.changes
+                ]}
+            if event is not None:
+                event.update({k: e.get(k) for k in ("version", "timestamp", "gitRev")})
+                events.append(event)
+            prev = row
+        return events
+
+    def stats(self) -> Dict[str, int]:
+        files = [p for p in self.objects_dir.rglob("*.json")] if self.objects_dir.is_dir() else []
+        return {
+            "entries": len(self.entries()),
+            "versions": len({e["version"] for e in self.entries()}),
+            "objects": len(files),
+            "bytes": sum(p.stat().st_size for p in files) + (self.index_path.stat().st_size if self.index_path.exists() else 0),
+        }
+
+
+def _distinct_versions(entries: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """相邻重复版本只保留最后一条记录"""
+    out: List[Dict[str, Any]] = []
+    for e in entries:
+        if out and out[-1]["version"] == e["version"]:
+            out[-1] = e
+        else:
+            out.append(e)
+    return out
+
+
+def _parse_time(raw: str) -> datetime:
+    """ISO 时间；不带时区时按本地时间"""
+    dt = datetime.fromisoformat(raw)
+    return dt.astimezone(timezone.utc) if dt.tzinfo is None else dt
+
+
+def store_dir(config: Dict[str, Any], output_dir: Path) -> Optional[Path]:
+    """配置 contract_history：缺省为 <output_dir>/.contract-history，字符串为自定义目录，false 关闭"""
+    setting = config.get("contract_history", True)
+    if setting is False:
+        return None
+    if isinstance(setting, str) and setting:
+        return Path(setting).resolve()
+    return output_dir / STORE_DIRNAME
+
+
+def record_contract(config: Dict[str, Any], output_dir: Path) -> None:
+    """run_workflow.py 每次运行结束后调用：记录 contract.json 到历史版本库"""
+    root = store_dir(config, output_dir)
+    contract_path = output_dir / "contract.json"
+    if root is None or not contract_path.exists():
+        return
+    rev, dirty = git_revision(Path(config["project_root"]).resolve())
+    store = ContractStore(root)
+    entry, added = store.record(contract_path, rev, dirty)
+    if added:
+        git = f"，git {rev[:10]}{'（有未提交修改）' if dirty else ''}" if rev else ""
+        print(f"[workflow] 契约历史：版本 {entry['version'][:12]}{git}，新对象 {len(store.writer.written)} 个")
+
+
+# =====================================================
+# 命令行
+# =====================================================
+
+def _short(entry: Dict[str, Any]) -> str:
+    git = f" git {entry['gitRev'][:10]}{'*' if entry.get('dirty') else ''}" if entry.get("gitRev") else ""
+    return f"{entry['version'][:12]}（{entry['timestamp'][:19]}{git}）"
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="契约历史版本库")
+    parser.add_argument("--config", default="", help="工作流配置文件（定位输出目录与项目 git 仓库）")
+    parser.add_argument("--store", default="", help="版本库目录（默认：<output_dir>/.contract-history）")
+    parser.add_argument("--project-root", default="", help="解析 git 引用所用的仓库（默认取自配置）")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    rec = sub.add_parser("record", help="记录一个契约文件")
+    rec.add_argument("contract", help="contract.json 路径")
+    rec.add_argument("--git-rev", default="", help="关联的 git 提交（默认取项目仓库的 HEAD）")
+    log = sub.add_parser("log", help="列出版本记录")
+    log.add_argument("--limit", type=int, default=20, help="最多显示条数（0 表示全部）")
+    show = sub.add_parser("show", help="还原某个版本的契约")
+    show.add_argument("ref", help="latest / latest~N / @时间 / 版本号 / git 版本")
+    show.add_argument("--output", default="", help="写入文件（默认输出到标准输出）")
+    diff = sub.add_parser("diff", help="比较两个版本")
+    diff.add_argument("old", help="旧版本引用")
+    diff.add_argument("new", nargs="?", default="latest", help="新版本引用（默认 latest）")
+    diff.add_argument("--exit-code", action="store_true", help="有破坏性变更时返回 1")
+    hist = sub.add_parser("history", help="接口的新增 / 变更历史")
+    hist.add_argument("method", help="HTTP 方法")
+    hist.add_argument("path", help="接口路径（与契约中一致，如 /api/users/{id}）")
+    sub.add_parser("stats", help="版本库占用")
+    return parser.parse_args(argv)
+
+
+def run(args: argparse.Namespace) -> int:
+    config: Dict[str, Any] = {}
+    if args.config:
+        config = json.loads(Path(args.config).read_text(encoding="utf-8"))
+    output_dir = Path(config.get("output_dir", config.get("project_root", "."))).resolve()
+    root = Path(args.store).resolve() if args.store else store_dir(config, output_dir)
+    if root is None:
+        print("[contract-store] 配置中已关闭契约历史（contract_history: false）")
+        return 2
+    project_root = Path(args.project_root or config.get("project_root") or ".").resolve()
+    store = ContractStore(root)
+
+    try:
+        if args.command == "record":
+            rev, dirty = (args.git_rev, False) if args.git_rev else git_revision(project_root)
+            entry, added = store.record(Path(args.contract), rev or None, dirty)
+            print(f"[contract-store] {'已记录' if added else '未变化'}：{_short(entry)}")
+        elif args.command == "log":
+            entries = store.entries()
+            shown = entries[-args.limit:] if args.limit else entries
+            for e in reversed(shown):
+                print(f"{_short(e)}  接口 {e['endpoints']}")
+            print(f"[contract-store] 共 {len(entries)} 条记录，{len({e['version'] for e in entries})} 个不同版本")
+        elif args.command == "show":
+            text = json.dumps(store.load(store.resolve(args.ref, project_root)), ensure_ascii=False, indent=2)
+            if args.output:
+                Path(args.output).write_text(text, encoding="utf-8")
+                print(f"[contract-store] 输出：{args.output}")
+            else:
+                print(text)
+        elif args.command == "diff":
+            old, new = store.resolve(args.old, project_root), store.resolve(args.new, project_root)
+            result = store.diff(old, new)
+            print(f"[contract-store] {_short(old)} → {_short(new)}")
+            for d in result.endpoints:
+                print(f"{STATUS_LABELS[d.status]} `{d.method}` `{d.path}` {d.label()}")
+                for c in d.changes:
+                    print(f"    {'⚠️' if c.breaking else '✅'} {c.message}")
+            print(
+                f"[contract-store] 新增 {result.count('added')}、修改 {result.count('modified')}、"
+                f"删除 {result.count('removed')}、未变 {result.unchanged}；破坏性变更 {len(result.breaking)}"
+            )
+            if args.exit_code and result.breaking:
+                return 1
+        elif args.command == "history":
+            key = f"{args.method.upper()} {args.path}"
+            events = store.history(key)
+            if not events:
+                print(f"[contract-store] 历史中没有 {key}")
+                return 1
+            labels = {"added": "🟢 新增", "changed": "🟡 变更", "removed": "🔴 删除"}
+            for ev in events:
+                git = f" git {ev['gitRev'][:10]}" if ev.get("gitRev") else ""
+                print(f"{labels[ev['event']]}  {ev['timestamp'][:19]}  版本 {ev['version'][:12]}{git}")
+                for c in ev.get("changes", []):
+                    print(f"    {'⚠️' if c['breaking'] else '✅'} {c['message']}")
+            added = [ev for ev in events if ev["event"] == "added"]
+            changed = [ev for ev in events if ev["event"] == "changed"]
+            print(
+                f"[contract-store] {key}：首次出现 {added[0]['timestamp'][:19] if added else '—'}，"
+                f"最近变更 {changed[-1]['timestamp'][:19] if changed else '无'}"
+            )
+        elif args.command == "stats":
+            s = store.stats()
+            print(
+                f"[contract-store] {root}：{s['entries']} 条记录，{s['versions']} 个版本，"
+                f"{s['objects']} 个对象，{s['bytes'] / 1024:.1f} KB"
+            )
+    except (ValueError, OSError) as e:
+        print(f"[contract-store] ❌ {e}", file=sys.stderr)
+        return 2
+    return 0
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    return run(parse_args(argv))
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+"""
+daemon.py — 常驻守护进程与轻量客户端
+serve 启动守护进程（见 daemon_server.py），在内存中保留文件索引、扫描缓存与契约；
+其余子命令通过 Unix socket 向守护进程发请求，客户端只依赖少量标准库模块，适合 pre-commit 钩子与编辑器集成
+
+  daemon.py --config config.json serve [--idle-timeout 1800]
+  daemon.py --config config.json touches src/api/user.ts      # 文件涉及哪些接口
+  daemon.py --config config.json diff --exit-code             # 源码接口相对 contract.json 是否有变化
+  daemon.py --config config.json scan|contract [--write] | check | status | stop
+"""
+import argparse
+import hashlib
+import json
+import os
+import socket
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+STATUS_LABELS = {"added": "🟢 新增", "removed": "🔴 删除", "modified": "🟡 修改"}
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="API 工作流守护进程与客户端")
+    parser.add_argument("--config", required=True, help="JSON 配置文件路径（与 run_workflow.py 相同）")
+    parser.add_argument("--socket", default="", help="Unix socket 路径（默认按输出目录在临时目录下生成）")
+    parser.add_argument("--autostart", action="store_true", help="守护进程未运行时自动在后台启动")
+    parser.add_argument("--json", action="store_true", help="输出原始 JSON 响应")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    serve = sub.add_parser("serve", help="启动守护进程（前台运行）")
+    serve.add_argument("--idle-timeout", type=float, default=0, help="空闲超过该秒数后自动退出（默认不退出）")
+    sub.add_parser("status", help="守护进程状态")
+    sub.add_parser("stop", help="停止守护进程")
+    for name, desc in (("scan", "扫描结果摘要"), ("contract", "契约摘要")):
+        p = sub.add_parser(name, help=desc)
+        p.add_argument("--write", action="store_true", help="同时写出 scan_result.json / contract.json")
+    sub.add_parser("check", help="以最新契约校验已生成的 OpenAPI 与 MSW 产物")
+    diff = sub.add_parser("diff", help="源码中的接口相对 contract.json 的变化")
+    diff.add_argument("--exit-code", action="store_true", help="有变化时返回 1")
+    touches = sub.add_parser("touches", help="文件中的 API 调用对应哪些接口")
+    touches.add_argument("files", nargs="+", help="源码文件")
+    return parser.parse_args(argv)
+
+
+def resolve_output_dir(config_path: Path) -> Path:
+    """与 run_workflow.py 相同的输出目录解析"""
+    config = json.loads(config_path.read_text(encoding="utf-8"))
+    return Path(config.get("output_dir", config["project_root"])).resolve()
+
+
+def default_socket(output_dir: Path) -> Path:
+    """按输出目录生成 socket 路径（放在临时目录，避免超过 Unix socket 路径长度限制）"""
+    digest = hashlib.sha256(str(output_dir).encode("utf-8")).hexdigest()[:12]
+    return Path(tempfile.gettempdir()) / f"api-extractor-{digest}.sock"
+
+
+def request(socket_path: Path, payload: Dict[str, Any], timeout: float = 300) -> Dict[str, Any]:
+    """发送一行 JSON 请求并读取一行 JSON 响应"""
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(timeout)
+        sock.connect(str(socket_path))
+        sock.sendall(json.dumps(payload, ensure_ascii=False).encode("utf-8") + b"\n")
+        chunks: List[bytes] = []
+        while True:
+            chunk = sock.recv(1 << 16)
+            if not chunk:
+                break
+            chunks.append(chunk)
+    if not chunks:
+        return {"ok": False, "error": "守护进程未返回响应（连接被关闭）"}
+    return json.loads(b"".join(chunks))
+
+
+def is_running(socket_path: Path) -> bool:
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.connect(str(socket_path))
+        return True
+    except OSError:
+        return False
+
+
+def start_background(config_path: Path, socket_path: Path, log_path: Path, wait: float = 60) -> bool:
+    """在后台启动守护进程（空闲 30 分钟后自动退出），等待 socket 可连接"""
+    import subprocess  # 只在自动启动时需要，不拖慢每次客户端调用
+
+    log_path.parent.mkdir(parents=True, exist_ok=True)
+    cmd = [
+        sys.executable, str(Path(__file__).resolve()), "--config", str(config_path), "--socket", str(socket_path),
+        "serve", "--idle-timeout", "1800",
+    ]
+    with open(log_path, "a", encoding="utf-8") as log:
+        subprocess.Popen(cmd, stdout=log, stderr=subprocess.STDOUT, stdin=subprocess.DEVNULL, start_new_session=True)
+    deadline = time.monotonic() + wait
+    while time.monotonic() < deadline:
+        if is_running(socket_path):
+            return True
+        time.sleep(0.05)
+    return False
+
+
+def serve_main(config_path: Path, socket_path: Path, idle_timeout: float) -> int:
+    # 服务端依赖（工作流各阶段模块）只在 serve 时导入，客户端保持轻量
+    import asyncio
+
+    from daemon_server import DaemonState, serve
+    from run_workflow import load_config
+
+    if is_running(socket_path):
+        print(f"[daemon] 已在运行：{socket_path}")
+        return 1
+    if socket_path.exists():
+        socket_path.unlink()
+    config = load_config(config_path)
+    started = time.perf_counter()
+    state = DaemonState(config, resolve_output_dir(config_path))
+    print(
+        f"[daemon] 预热完成：{len(state.session.scanner.scans)} 个文件，"
+        f"{len(state.contract.get('endpoints', []))} 个接口，{time.perf_counter() - started:.2f}s"
+    )
+    try:
+        asyncio.run(serve(state, socket_path, idle_timeout))
+    except KeyboardInterrupt:
+        pass
+    print(f"\n[daemon] 已停止，共处理 {state.requests} 个请求")
+    return 0
+
+
+def print_response(command: str, data: Dict[str, Any]) -> None:
+    if command == "status":
+        print(
+            f"[daemon] pid {data['pid']}，运行 {data['uptime']}s，已处理 {data['requests']} 个请求，"
+            f"索引 {data['files']} 个文件，接口 {data['endpoints']} 个"
+        )
+    elif command == "scan":
+        print(
+            f"[daemon] 扫描：{data['files']} 个文件（本次变化 {len(data['changed'])} 个），"
+            f"识别 {data['matches']} 个 API 调用，框架 {data['framework']}"
+        )
+    elif command == "contract":
+        print(
+            f"[daemon] 契约：{data['endpoints']} 个接口，{data['modules']} 个模块"
+            f"（本次变化文件 {len(data['changed'])} 个）"
+        )
+    elif command == "diff":
+        for c in data["changes"]:
+            print(f"{STATUS_LABELS[c['status']]} `{c['method']}` `{c['path']}` {c['change']}")
+            for detail in c.get("details", []):
+                print(f"    {'⚠️' if detail['breaking'] else '✅'} {detail['message']}")
+        counts = {s: sum(1 for c in data["changes"] if c["status"] == s) for s in STATUS_LABELS}
+        print(f"[daemon] 相对 contract.json：新增 {counts['added']}、修改 {counts['modified']}、删除 {counts['removed']}")
+    elif command == "touches":
+        for entry in data["files"]:
+            print(entry["file"])
+            if not entry["scanned"]:
+                print("  （不在扫描范围内）")
+            elif not entry["endpoints"]:
+                print("  （无 API 调用）")
+            for ep in entry["endpoints"]:
+                name = f" — {ep['endpoint']}" if ep["endpoint"] else ""
+                print(f"  L{ep['line']}  {ep['method']} {ep['path']}{name}")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    config_path = Path(args.config).resolve()
+    output_dir = resolve_output_dir(config_path)
+    socket_path = Path(args.socket) if args.socket else default_socket(output_dir)
+
+    if args.command == "serve":
+        return serve_main(config_path, socket_path, args.idle_timeout)
+
+    payload: Dict[str, Any] = {"op": args.command}
+    if args.command in ("scan", "contract"):
+        payload["write"] = args.write
+        payload["full"] = args.json
+    elif args.command == "touches":
+        payload["files"] = [os.path.abspath(f) for f in args.files]
+
+    if not is_running(socket_path):
+        if args.command == "stop":
+            print("[daemon] 未运行")
+            return 0
+        log_path = output_dir / "reports" / ".cache" / "daemon.log"
+        if not args.autostart:
+            print(f"[daemon] 未运行：{socket_path}（先执行 serve，或加 --autostart）", file=sys.stderr)
+            return 2
+        if not start_background(config_path, socket_path, log_path):
+            print(f"[daemon] 启动失败，见 {log_path}", file=sys.stderr)
+            return 2
+
+    response = request(socket_path, payload)
+    if not response.get("ok"):
+        print(response.get("log", ""), end="", file=sys.stderr)
+        print(f"[daemon] ❌ {response.get('error', '请求失败')}", file=sys.stderr)
+        return 2
+    data = response.get("data", {})
+    if args.json:
+        print(json.dumps(data, ensure_ascii=False, indent=2))
+    else:
+        print(response.get("log", ""), end="")
+        if args.command == "stop":
+            print(f"[daemon] 已停止（共处理 {data.get('requests', 0)} 个请求）")
+        else:
+            print_response(args.command, data)
+
+    if args.command == "check":
+        return int(data.get("code", 0))
+    if args.command == "diff" and args.exit_code and data.get("changes"):
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,221 @@
+"""
+daemon_server.py — 常驻守护进程的服务端（由 daemon.py serve 启动）
+在内存中保留文件索引（各文件的 mtime / size）、逐文件扫描结果、契约端点缓存与解析后的 contract.json，
+每个请求先按文件索引找出变化的文件并增量刷新，再应答；无需重新启动解释器、遍历解析全部文件
+
+协议：每个连接发送一行 JSON 请求 {"op": ..., ...}，返回一行 JSON 响应 {"ok", "data", "log", "error"}；请求串行处理
+"""
+import asyncio
+import io
+import json
+import os
+import time
+import traceback
+from contextlib import redirect_stdout
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from build_contract import normalize_path_format
+from contract_diff import diff_contracts
+from pipeline import PipelineState
+from run_workflow import WatchSession, endpoint_map
+from scan import write_result
+from watch import changed_paths, snapshot
+
+
+class DaemonState:
+    """守护进程的内存状态与请求处理"""
+
+    def __init__(self, config: Dict[str, Any], output_dir: Path):
+        self.output_dir = output_dir
+        self.session = WatchSession(config, output_dir, PipelineState(output_dir / "reports" / ".cache" / "workflow-state.json"))
+        self.index = snapshot(self.session.paths())
+        self.scan_result = self.session.scanner.update(set())
+        self.contract = self._assemble()
+        self.contract_path = Path(self.session.args["contract"].output)
+        self._disk: Tuple[Optional[int], Optional[Dict]] = (None, None)
+        self.started = time.time()
+        self.last_request = self.started
+        self.requests = 0
+        self.ops: Dict[str, Callable[[Dict], Dict]] = {
+            "status": self.op_status,
+            "scan": self.op_scan,
+            "contract": self.op_contract,
+            "check": self.op_check,
+            "diff": self.op_diff,
+            "touches": self.op_touches,
+        }
+
+    def _assemble(self) -> Dict:
+        builder = self.session.modules["contract"]
+        return builder.assemble_contract(self.session.args["contract"], self.scan_result, self.session.reuse)
+
+    def refresh(self) -> List[str]:
+        """比较文件索引，重新扫描变化的文件并修补契约；返回变化的文件"""
+        latest = snapshot(self.session.paths())
+        changed = changed_paths(self.index, latest)
+        self.index = latest
+        if changed:
+            self.scan_result = self.session.scanner.update(changed)
+            self.contract = self._assemble()
+        return sorted(str(p) for p in changed)
+
+    def disk_contract(self) -> Optional[Dict]:
+        """磁盘上的 contract.json（按 mtime 缓存解析结果）"""
+        try:
+            mtime = self.contract_path.stat().st_mtime_ns
+        except OSError:
+            return None
+        if self._disk[0] != mtime:
+            self._disk = (mtime, json.loads(self.contract_path.read_text(encoding="utf-8")))
+        return self._disk[1]
+
+    def handle(self, request: Dict) -> Dict:
+        self.requests += 1
+        self.last_request = time.time()
+        op = self.ops.get(str(request.get("op")))
+        if op is None:
+            return {"ok": False, "error": f"未知请求：{request.get('op')}（可选：{', '.join(self.ops)}、stop）"}
+        log = io.StringIO()
+        try:
+            with redirect_stdout(log):
+                data = op(request)
+        except Exception:
+            return {"ok": False, "error": traceback.format_exc(), "log": log.getvalue()}
+        return {"ok": True, "data": data, "log": log.getvalue()}
+
+    # =====================================================
+    # 请求
+    # =====================================================
+
+    def op_status(self, request: Dict) -> Dict:
+        return {
+            "pid": os.getpid(),
+            "uptime": round(time.time() - self.started, 1),
+            "requests": self.requests,
+            "files": len(self.session.scanner.scans),
+            "endpoints": len(self.contract.get("endpoints", [])),
+        }
+
+    def op_scan(self, request: Dict) -> Dict:
+        changed = self.refresh()
+        if request.get("write"):
+            write_result(self.scan_result, Path(self.session.args["scan"].output))
+        data = {
+            "files": len(self.session.scanner.scans),
+            "changed": changed,
+            "matches": len(self.scan_result.get("matches", [])),
+            "framework": self.scan_result.get("framework"),
+            "baseURL": self.scan_result.get("baseURL"),
+        }
+        if request.get("full"):
+            data["result"] = self.scan_result
+        return data
+
+    def op_contract(self, request: Dict) -> Dict:
+        changed = self.refresh()
+        if request.get("write"):
+            self.session.modules["contract"].write_contract(self.contract, self.contract_path)
+        endpoints = self.contract.get("endpoints", [])
+        data = {
+            "changed": changed,
+            "endpoints": len(endpoints),
+            "modules": len({ep.get("module", "default") for ep in endpoints}),
+        }
+        if request.get("full"):
+            data["contract"] = self.contract
+        return data
+
+    def op_check(self, request: Dict) -> Dict:
+        """以内存中的最新契约校验已生成的 OpenAPI 与 MSW 产物"""
+        changed = self.refresh()
+        code = self.session.modules["check"].run(self.session.args["check"], self.contract)
+        return {"changed": changed, "code": code, "report": self.session.args["check"].report}
+
+    def op_diff(self, request: Dict) -> Dict:
+        """源码中的接口相对 contract.json 的变化（即重新生成契约会带来的变更）"""
+        changed = self.refresh()
+        diff = diff_contracts(self.disk_contract() or {"endpoints": []}, self.contract)
+        changes = [
+            {
+                "status": d.status, "method": d.method, "path": d.path, "change": d.label(), "breaking": d.breaking,
+                "details": [{"message": c.message, "breaking": c.breaking} for c in d.changes],
+            }
+            for d in diff.endpoints
+        ]
+        return {"changed": changed, "changes": changes}
+
+    def op_touches(self, request: Dict) -> Dict:
+        """各文件中的 API 调用对应的契约接口"""
+        self.refresh()
+        endpoints = endpoint_map(self.contract)
+        scans = self.session.scanner.scans
+        out = []
+        for raw in request.get("files", []):
+            fp = Path(raw).resolve()
+            fs = scans.get(fp)
+            entry: Dict[str, Any] = {"file": str(fp), "scanned": fs is not None, "endpoints": []}
+            for m in fs.matches if fs is not None else []:
+                key = (m.method.upper(), normalize_path_format(m.path))
+                ep = endpoints.get(key) or {}
+                entry["endpoints"].append({
+                    "method": key[0],
+                    "path": key[1],
+                    "endpoint": ep.get("endpoint"),
+                    "module": ep.get("module"),
+                    "line": m.line,
+                })
+            out.append(entry)
+        return {"files": out}
+
+
+async def serve(state: DaemonState, socket_path: Path, idle_timeout: float = 0) -> None:
+    """监听 Unix socket，直到收到 stop 请求或空闲超过 idle_timeout 秒（0 表示不超时）"""
+    stop = asyncio.Event()
+    lock = asyncio.Lock()
+
+    async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            line = await reader.readline()
+            if not line.strip():
+                return  # 客户端探测连接（is_running）
+            try:
+                request = json.loads(line)
+            except ValueError:
+                request = None
+            if not isinstance(request, dict):
+                response: Dict[str, Any] = {"ok": False, "error": "请求必须是一行 JSON 对象：{\"op\": ...}"}
+            elif request.get("op") == "stop":
+                response = {"ok": True, "data": {"requests": state.requests}}
+                stop.set()
+            else:
+                async with lock:
+                    response = state.handle(request)
+            writer.write(json.dumps(response, ensure_ascii=False).encode("utf-8") + b"\n")
+            await writer.drain()
+        except ConnectionError:
+            pass  # 客户端提前断开（如 Ctrl+C），不影响守护进程
+        finally:
+            writer.close()
+
+    async def watchdog() -> None:
+        while not stop.is_set():
+            await asyncio.sleep(1)
+            if idle_timeout and time.time() - state.last_request > idle_timeout:
+                print(f"[daemon] 空闲超过 {idle_timeout:.0f}s，退出")
+                stop.set()
+
+    server = await asyncio.start_unix_server(handle, path=str(socket_path))
+    os.chmod(socket_path, 0o600)
+    print(f"[daemon] 监听 {socket_path}（pid {os.getpid()}）", flush=True)
+    idle = asyncio.create_task(watchdog())
+    try:
+        await stop.wait()
+    finally:
+        idle.cancel()
+        server.close()
+        await server.wait_closed()
+        try:
+            socket_path.unlink()
+        except OSError:
+            pass
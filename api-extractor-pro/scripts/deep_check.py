@@ -0,0 +1,236 @@
+"""
+deep_check.py — 契约 ↔ OpenAPI 结构级一致性校验
+把两侧接口规范化为同一模型（参数 / 请求体 / 响应 / 错误），逐层比较哈希树：
+规范根哈希 → 接口哈希 → 分段哈希，只对哈希不同的分段做字段级 diff
+"""
+import gzip
+import json
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from urllib.parse import unquote
+
+from artifacts import sha256_bytes
+from fingerprint import canonical, endpoint_key
+from yaml_stream import iter_path_items, load as load_yaml, load_sections
+
+SECTIONS = ("params", "body", "responses", "errors")
+HTTP_METHODS = ("get", "post", "put", "patch", "delete", "head", "options")
+MAX_DIFFS_PER_ENDPOINT = 20
+
+
+# =====================================================
+# 规范化模型
+# =====================================================
+
+def _param(kind: str, name: str, type_: Any, required: bool) -> Tuple[str, Dict]:
+    return f"{kind}:{name}", {"type": type_ or "string", "required": bool(required)}
+
+
+def normalize_contract(ep: Dict) -> Dict[str, Any]:
+    """契约接口 → 规范化模型"""
+    params = dict(
+        [_param("path", p.get("name"), p.get("type"), True) for p in ep.get("pathParams", []) or []]
+        + [_param("query", q.get("name"), q.get("type"), q.get("required", False)) for q in ep.get("query", []) or []]
+        + [_param("header", h.get("name"), h.get("type"), h.get("required", False)) for h in ep.get("headers", []) or []]
+    )
+    body = ep.get("requestBody")
+    responses = {
+        str(r.get("status", 200)): r.get("schema", {"type": "object"})
+        for r in ep.get("responses", []) or []
+    }
+    return {
+        "params": params,
+        "body": {
+            "contentType": body.get("contentType", "application/json"),
+            "schema": body.get("schema", {"type": "object"}),
+        } if body else None,
+        "responses": responses,
+        "errors": sorted({str(e.get("status", 400)) for e in ep.get("errors", []) or []}),
+    }
+
+
+def normalize_operation(doc: "SpecDocument", op: Dict, base: Path) -> Dict[str, Any]:
+    """OpenAPI operation（已解析 $ref）→ 规范化模型"""
+    params: Dict[str, Dict] = {}
+    for raw in op.get("parameters", []) or []:
+        p, _ = doc.resolve(raw, base)
+        schema, _ = doc.resolve(p.get("schema", {}) or {}, base)
+        key, value = _param(p.get("in", "query"), p.get("name"), schema.get("type"), p.get("required", False))
+        params[key] = value
+
+    body = None
+    if op.get("requestBody"):
+        rb, rb_base = doc.resolve(op["requestBody"], base)
+        content = rb.get("content", {}) or {}
+        if content:
+            content_type, media = next(iter(content.items()))
+            body = {"contentType": content_type, "schema": doc.deref_all((media or {}).get("schema", {"type": "object"}), rb_base)}
+
+    responses: Dict[str, Any] = {}
+    errors: List[str] = []
+    for code, raw in (op.get("responses", {}) or {}).items():
+        code = str(code)
+        if code.startswith("2"):
+            resp, resp_base = doc.resolve(raw, base)
+            media = ((resp.get("content", {}) or {}).get("application/json", {})) or {}
+            responses[code] = doc.deref_all(media.get("schema", {"type": "object"}), resp_base)
+        else:
+            errors.append(code)
+    return {"params": params, "body": body, "responses": responses, "errors": sorted(errors)}
+
+
+# =====================================================
+# 哈希树
+# =====================================================
+
+def _hash(text: str) -> str:
+    return sha256_bytes(text.encode("utf-8"))[:16]
+
+
+def section_hashes(model: Dict[str, Any]) -> Dict[str, str]:
+    return {s: _hash(canonical(model.get(s))) for s in SECTIONS}
+
+
+def endpoint_hash(sections: Dict[str, str]) -> str:
+    return _hash("".join(sections[s] for s in SECTIONS))
+
+
+def tree_root(endpoint_hashes: Dict[str, str]) -> str:
+    return _hash("".join(f"{k}={v};" for k, v in sorted(endpoint_hashes.items())))
+
+
+def field_diff(a: Any, b: Any, prefix: str, out: List[str]) -> None:
+    """递归字段级差异（a 为契约，b 为 OpenAPI）"""
+    if len(out) >= MAX_DIFFS_PER_ENDPOINT:
+        return
+    if isinstance(a, dict) and isinstance(b, dict):
+        for k in sorted(set(a) | set(b), key=str):
+            path = f"{prefix}.{k}" if prefix else str(k)
+            if k not in b:
+                out.append(f"{path}：OpenAPI 缺失")
+            elif k not in a:
+                out.append(f"{path}：契约中不存在")
+            else:
+                field_diff(a[k], b[k], path, out)
+    elif isinstance(a, list) and isinstance(b, list) and all(not isinstance(x, (dict, list)) for x in a + b):
+        missing = [x for x in a if x not in b]
+        extra = [x for x in b if x not in a]
+        if missing:
+            out.append(f"{prefix}：OpenAPI 缺少 {', '.join(map(str, missing))}")
+        if extra:
+            out.append(f"{prefix}：OpenAPI 多出 {', '.join(map(str, extra))}")
+    elif a != b:
+        out.append(f"{prefix}：契约 `{json.dumps(a, ensure_ascii=False)}`，OpenAPI `{json.dumps(b, ensure_ascii=False)}`")
+
+
+def compare(contract_models: Dict[str, Dict], spec_models: Dict[str, Dict]) -> Tuple[List[str], Dict[str, int]]:
+    """比较两侧共有接口；返回 (差异列表, 统计)"""
+    shared = sorted(set(contract_models) & set(spec_models))
+    left = {k: section_hashes(contract_models[k]) for k in shared}
+    right = {k: section_hashes(spec_models[k]) for k in shared}
+    left_eps = {k: endpoint_hash(v) for k, v in left.items()}
+    right_eps = {k: endpoint_hash(v) for k, v in right.items()}
+    stats = {"endpoints": len(shared), "changed": 0, "sections": 0}
+    if tree_root(left_eps) == tree_root(right_eps):
+        return [], stats
+
+    issues: List[str] = []
+    for key in shared:
+        if left_eps[key] == right_eps[key]:
+            continue
+        stats["changed"] += 1
+        for section in SECTIONS:
+            if left[key][section] == right[key][section]:
+                continue
+            stats["sections"] += 1
+            diffs: List[str] = []
+            field_diff(contract_models[key][section], spec_models[key][section], section, diffs)
+            issues.extend(f"`{key}` {d}" for d in diffs)
+    return issues, stats
+
+
+def contract_models(endpoints: List[Dict]) -> Dict[str, Dict]:
+    return {endpoint_key(ep): normalize_contract(ep) for ep in endpoints}
+
+
+# =====================================================
+# OpenAPI 文档读取（JSON / 流式 YAML）与 $ref 解析
+# =====================================================
+
+def load_spec_file(path: Path, sections: Optional[Tuple[str, ...]] = None) -> Dict:
+    """读取规范文件（JSON / JSON.gz / YAML）；YAML 且指定 sections 时只构建这些顶层键"""
+    if path.name.endswith(".gz"):
+        with gzip.open(path, "rt", encoding="utf-8") as fh:
+            return json.load(fh)
+    if path.suffix == ".json":
+        return json.loads(path.read_text(encoding="utf-8"))
+    with path.open(encoding="utf-8") as fh:
+        if sections is not None:
+            return load_sections(fh, sections)
+        return load_yaml(fh) or {}
+
+
+def iter_spec_path_items(path: Path) -> Iterator[Tuple[str, Any]]:
+    """遍历规范的 (path, path item)；YAML 流式读取，内存与规范大小无关"""
+    if path.name.endswith((".json", ".json.gz")):
+        yield from (load_spec_file(path).get("paths", {}) or {}).items()
+        return
+    with path.open(encoding="utf-8") as fh:
+        yield from iter_path_items(fh)
+
+
+class SpecDocument:
+    """OpenAPI 文档集合：按需加载外部片段，解析 $ref"""
+
+    def __init__(self, root: Path):
+        self.root = Path(root)
+        self.docs: Dict[Path, Dict] = {}
+
+    def load(self, path: Path) -> Dict:
+        """加载被引用的文件；根规范只构建 components，paths 由 operations() 流式读取"""
+        path = Path(path).resolve()
+        if path not in self.docs:
+            sections = ("components",) if path == self.root.resolve() else None
+            self.docs[path] = load_spec_file(path, sections)
+        return self.docs[path]
+
+    def resolve(self, node: Any, base: Path) -> Tuple[Any, Path]:
+        """逐级解析节点上的 $ref，返回 (目标节点, 目标所在文件)"""
+        seen = 0
+        while isinstance(node, dict) and "$ref" in node and seen < 32:
+            file_part, _, pointer = str(node["$ref"]).partition("#")
+            if file_part:
+                base = (base.parent / file_part).resolve()
+            node = self.load(base)
+            for token in unquote(pointer).split("/")[1:]:
+                node = node.get(token.replace("~1", "/").replace("~0", "~"), {}) if isinstance(node, dict) else {}
+            seen += 1
+        return node, base
+
+    def deref_all(self, node: Any, base: Path, depth: int = 0) -> Any:
+        """递归展开 schema 中的全部 $ref"""
+        if depth > 32:
+            return node
+        node, base = self.resolve(node, base)
+        if isinstance(node, dict):
+            return {k: self.deref_all(v, base, depth + 1) for k, v in node.items()}
+        if isinstance(node, list):
+            return [self.deref_all(v, base, depth + 1) for v in node]
+        return node
+
+    def operations(self) -> Iterator[Tuple[str, Dict, Path]]:
+        """遍历 (METHOD path, operation, operation 所在文件)"""
+        if self.root.name.endswith((".json", ".json.gz")):
+            items = (self.load(self.root).get("paths", {}) or {}).items()
+        else:
+            items = iter_spec_path_items(self.root)
+        for path, item in items:
+            item, base = self.resolve(item, self.root.resolve())
+            for method in HTTP_METHODS:
+                if isinstance(item, dict) and method in item:
+                    yield f"{method.upper()} {path}", item[method], base
+
+
+def spec_models(openapi_path: Path) -> Dict[str, Dict]:
+    doc = SpecDocument(openapi_path)
+    return {key: normalize_operation(doc, op, base) for key, op, base in doc.operations()}
@@ -0,0 +1,92 @@
+"""
+fingerprint.py — 接口指纹与生成清单（manifest）
+generate_msw.py / generate_docs.py 输出 manifest.json，记录每个产物文件的哈希及其包含的接口指纹；
+check_consistency.py 据此按接口比对，只对哈希不一致（被手工修改）的文件回退到解析
+"""
+import json
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+from artifacts import sha256_bytes, sha256_file
+
+MANIFEST_VERSION = 1
+MANIFEST_NAME = "manifest.json"
+
+# 参与指纹的契约字段；source / x-todo-confirm / mock 配置变化不影响接口定义
+FINGERPRINT_FIELDS = (
+    "method", "path", "pathParams", "query", "headers", "requestBody", "responses", "errors",
+)
+
+
+def canonical(obj: Any) -> str:
+    """键排序的紧凑 JSON，作为哈希输入"""
+    return json.dumps(obj, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+
+
+def endpoint_key(ep: Dict) -> str:
+    return f"{str(ep.get('method', 'GET')).upper()} {ep.get('path', '/')}"
+
+
+def endpoint_fingerprint(ep: Dict) -> str:
+    fields = {k: ep.get(k) for k in FINGERPRINT_FIELDS}
+    fields["method"] = str(fields["method"] or "GET").upper()
+    return sha256_bytes(canonical(fields).encode("utf-8"))[:32]
+
+
+def build_manifest(
+    generator: str,
+    root: Path,
+    files: Dict[Path, List[Dict]],
+    hashes: Optional[Dict[Path, str]] = None,
+) -> Dict:
+    """构建清单：files 为 产物路径 → 该文件包含的接口
+
+    hashes 为写入器记录的哈希（未记录的文件现算）
+    """
+    hashes = hashes or {}
+    root = Path(root)
+    out_files: Dict[str, Dict] = {}
+    endpoints: Dict[str, Dict] = {}
+    for path, eps in sorted(files.items(), key=lambda kv: str(kv[0])):
+        path = Path(path)
+        rel = path.relative_to(root).as_posix()
+        digest = hashes.get(path) or sha256_file(path)
+        if digest is None:
+            continue
+        keys = []
+        for ep in eps:
+            key = endpoint_key(ep)
+            keys.append(key)
+            endpoints.setdefault(key, {"fingerprint": endpoint_fingerprint(ep), "files": []})["files"].append(rel)
+        out_files[rel] = {"sha256": digest, "endpoints": keys}
+    return {
+        "version": MANIFEST_VERSION,
+        "generator": generator,
+        "files": out_files,
+        "endpoints": dict(sorted(endpoints.items())),
+    }
+
+
+def manifest_json(manifest: Dict) -> str:
+    return json.dumps(manifest, ensure_ascii=False, indent=2) + "\n"
+
+
+def load_manifest(path: Path) -> Optional[Dict]:
+    """读取清单，不存在或版本不符时返回 None"""
+    try:
+        data = json.loads(Path(path).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+    if data.get("version") != MANIFEST_VERSION:
+        return None
+    return data
+
+
+def verified_files(manifest: Dict, root: Path, names: Iterable[str]) -> Dict[str, bool]:
+    """逐个文件比对清单哈希：True 表示文件未被修改，可直接使用清单中的接口列表"""
+    files = manifest.get("files", {})
+    result: Dict[str, bool] = {}
+    for name in names:
+        entry = files.get(name)
+        result[name] = entry is not None and sha256_file(Path(root) / name) == entry["sha256"]
+    return result
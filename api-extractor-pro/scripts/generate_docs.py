@@ -3,62 +3,71 @@
 generate_docs.py — 从 contract.json 生成中文 Markdown 文档和 OpenAPI 3.1 YAML
 """
 import argparse
+import gzip
+import hashlib
+import io
 import json
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional, Sequence, Set, Tuple
+from urllib.parse import quote
 
+import tracing
+from artifacts import ArtifactWriter, sha256_bytes
+from fingerprint import MANIFEST_NAME, build_manifest, canonical, manifest_json
+from openapi_emit import StreamMap, emit_json, emit_yaml
+from search_index import build_search_index, search_html, search_index_json
 
-def parse_args() -> argparse.Namespace:
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
     parser = argparse.ArgumentParser(description="从契约生成接口文档")
     parser.add_argument("--contract", required=True, help="contract.json 路径")
     parser.add_argument("--output-root", required=True, help="输出根目录")
     parser.add_argument("--project-name", default="项目", help="项目名称")
     parser.add_argument("--version", default="1.0.0", help="API 版本")
-    return parser.parse_args()
+    parser.add_argument("--split", action="store_true", help="按模块拆分输出 Markdown 页面与 OpenAPI 片段，根文件只做索引")
+    parser.add_argument("--formats", type=parse_formats, default=["yaml"], help="OpenAPI 输出格式，逗号分隔：yaml,json,json.gz")
+    parser.add_argument("--no-cache", action="store_true", help="不读写接口片段渲染缓存（docs/.cache/fragments.json）")
+    parser.add_argument("--jobs", type=int, default=0, help="拆分模式的并行进程数（默认 CPU 核数）")
+    parser.add_argument("--trace", default="", help=f"输出 Chrome trace 追踪文件（也可用环境变量 {tracing.TRACE_ENV}）")
+    return parser.parse_args(argv)
 
 
 # =====================================================
 # Markdown 文档生成
 # =====================================================
 
-def build_markdown(contract: Dict, project_name: str) -> str:
-    """生成中文 Markdown 接口文档"""
-    ts = datetime.now(timezone.utc).strftime("%Y-%m-%d")
-    endpoints = contract.get("endpoints", [])
-    meta = contract.get("meta", {})
+def group_by_module(endpoints: List[Dict]) -> Dict[str, List[Dict]]:
+    """按模块分组"""
+    modules: Dict[str, List[Dict]] = {}
+    for ep in endpoints:
+        modules.setdefault(ep.get("module", "default"), []).append(ep)
+    return modules
+
+
+def module_file_name(module: str) -> str:
+    """模块名转文件名（与 generate_msw.py 一致）"""
+    return re.sub(r"[^a-zA-Z0-9]", "-", module).lower()
 
-    lines: List[str] = []
 
-    # 头部信息
+def render_header(lines: List[str], project_name: str, meta: Dict, total: int) -> None:
+    """头部信息"""
+    ts = datetime.now(timezone.utc).strftime("%Y-%m-%d")
     lines.append(f"# {project_name} 接口文档")
     lines.append("")
     lines.append(f"> 📅 生成时间：{ts}")
-    lines.append(f"> 📊 接口总数：{len(endpoints)} 个")
+    lines.append(f"> 📊 接口总数：{total} 个")
     lines.append(f"> 🔧 技术栈：{meta.get('framework', '未知')} + MSW Mock")
     lines.append("")
     lines.append("---")
     lines.append("")
 
-    # 按模块分组
-    modules: Dict[str, List[Dict]] = {}
-    for ep in endpoints:
-        module = ep.get("module", "default")
-        modules.setdefault(module, []).append(ep)
 
-    # 目录
-    lines.append("## 目录")
-    lines.append("")
-    lines.append("- [1. 通用规范](#1-通用规范)")
-    lines.append("- [2. 快速接入 MSW Mock](#2-快速接入-msw-mock)")
-    for i, module in enumerate(sorted(modules.keys()), start=3):
-        lines.append(f"- [{i}. {module} 模块](#{i}-{module}-模块)")
-    lines.append(f"- [{len(modules) + 3}. 错误码总览](#{len(modules) + 3}-错误码总览)")
-    lines.append("")
-    lines.append("---")
-    lines.append("")
-
-    # 1. 通用规范
+def render_common(lines: List[str], meta: Dict) -> None:
+    """1. 通用规范 + 2. MSW 接入"""
     lines.append("## 1. 通用规范")
     lines.append("")
     lines.append("### 请求地址")
@@ -125,100 +134,168 @@ def build_markdown(contract: Dict, project_name: str) -> str:
     lines.append("---")
     lines.append("")
 
-    # 各模块接口
-    for i, (module, eps) in enumerate(sorted(modules.items()), start=3):
-        lines.append(f"## {i}. {module} 模块")
+
+def render_endpoint(lines: List[str], ep: Dict) -> None:
+    """单个接口章节"""
+    method = ep.get("method", "GET")
+    path = ep.get("path", "/")
+    endpoint_name = ep.get("endpoint", "")
+    desc = endpoint_name.split(".")[-1] if "." in endpoint_name else endpoint_name
+
+    lines.append(f"### {method} {path} — {desc}")
+    lines.append("")
+
+    # 认证标记
+    if any(h.get("name") == "Authorization" for h in ep.get("headers", [])):
+        lines.append("**认证**：✅ 需要 Bearer Token")
+    else:
+        lines.append("**认证**：❌ 无需")
+    lines.append("")
+
+    # 路径参数
+    path_params = ep.get("pathParams", [])
+    if path_params:
+        lines.append("**路径参数**")
+        lines.append("")
+        lines.append("| 参数 | 类型 | 说明 |")
+        lines.append("|------|------|------|")
+        for p in path_params:
+            lines.append(f"| {p.get('name')} | {p.get('type', 'string')} | {p.get('description', '')} |")
         lines.append("")
 
-        for ep in eps:
-            method = ep.get("method", "GET")
-            path = ep.get("path", "/")
-            endpoint_name = ep.get("endpoint", "")
-            desc = endpoint_name.split(".")[-1] if "." in endpoint_name else endpoint_name
+    # 查询参数
+    query_params = ep.get("query", [])
+    if query_params:
+        lines.append("**查询参数**")
+        lines.append("")
+        lines.append("| 参数 | 类型 | 必填 | 默认值 | 说明 |")
+        lines.append("|------|------|:----:|--------|------|")
+        for q in query_params:
+            required = "✅" if q.get("required") else "❌"
+            default = q.get("default", "—")
+            lines.append(f"| {q.get('name')} | {q.get('type', 'string')} | {required} | {default} | {q.get('description', '')} |")
+        lines.append("")
 
-            lines.append(f"### {method} {path} — {desc}")
+    # 请求体
+    body = ep.get("requestBody")
+    if body:
+        content_type = body.get("contentType", "application/json")
+        lines.append(f"**请求体**（{content_type}）")
+        lines.append("")
+        schema = body.get("schema", {})
+        props = schema.get("properties", {})
+        if props:
+            lines.append("| 参数 | 类型 | 说明 |")
+            lines.append("|------|------|------|")
+            for name, info in props.items():
+                lines.append(f"| {name} | {info.get('type', 'any')} | {info.get('description', '')} |")
             lines.append("")
 
-            # 认证标记
-            if any(h.get("name") == "Authorization" for h in ep.get("headers", [])):
-                lines.append("**认证**：✅ 需要 Bearer Token")
-            else:
-                lines.append("**认证**：❌ 无需")
+    # 成功响应
+    for r in ep.get("responses", []):
+        if str(r.get("status", "")).startswith("2"):
+            lines.append(f"**响应示例**（成功 {r.get('status', 200)}）")
             lines.append("")
-
-            # 路径参数
-            path_params = ep.get("pathParams", [])
-            if path_params:
-                lines.append("**路径参数**")
-                lines.append("")
-                lines.append("| 参数 | 类型 | 说明 |")
-                lines.append("|------|------|------|")
-                for p in path_params:
-                    lines.append(f"| {p.get('name')} | {p.get('type', 'string')} | {p.get('description', '')} |")
-                lines.append("")
-
-            # 查询参数
-            query_params = ep.get("query", [])
-            if query_params:
-                lines.append("**查询参数**")
-                lines.append("")
-                lines.append("| 参数 | 类型 | 必填 | 默认值 | 说明 |")
-                lines.append("|------|------|:----:|--------|------|")
-                for q in query_params:
-                    required = "✅" if q.get("required") else "❌"
-                    default = q.get("default", "—")
-                    lines.append(f"| {q.get('name')} | {q.get('type', 'string')} | {required} | {default} | {q.get('description', '')} |")
-                lines.append("")
-
-            # 请求体
-            body = ep.get("requestBody")
-            if body:
-                content_type = body.get("contentType", "application/json")
-                lines.append(f"**请求体**（{content_type}）")
-                lines.append("")
-                schema = body.get("schema", {})
-                props = schema.get("properties", {})
-                if props:
-                    lines.append("| 参数 | 类型 | 说明 |")
-                    lines.append("|------|------|------|")
-                    for name, info in props.items():
-                        lines.append(f"| {name} | {info.get('type', 'any')} | {info.get('description', '')} |")
-                    lines.append("")
-
-            # 成功响应
-            for r in ep.get("responses", []):
-                if str(r.get("status", "")).startswith("2"):
-                    lines.append(f"**响应示例**（成功 {r.get('status', 200)}）")
-                    lines.append("")
-                    lines.append("```json")
-                    lines.append(json.dumps(r.get("example", {}), ensure_ascii=False, indent=2))
-                    lines.append("```")
-                    lines.append("")
-
-            # 错误响应
-            errors = ep.get("errors", [])
-            if errors:
-                lines.append("**错误码**")
-                lines.append("")
-                lines.append("| 错误码 | 说明 |")
-                lines.append("|--------|------|")
-                for e in errors:
-                    lines.append(f"| {e.get('status', 400)} | {e.get('message', '错误')} |")
-                lines.append("")
-
-            # 待确认项
-            todos = ep.get("x-todo-confirm", [])
-            if todos:
-                lines.append("> ⚠️ **待确认项**")
-                for t in todos:
-                    lines.append(f"> - {t}")
-                lines.append("")
-
-            lines.append("---")
+            lines.append("```json")
+            lines.append(json.dumps(r.get("example", {}), ensure_ascii=False, indent=2))
+            lines.append("```")
             lines.append("")
 
-    # 错误码总览
-    lines.append(f"## {len(modules) + 3}. 错误码总览")
+    # 错误响应
+    errors = ep.get("errors", [])
+    if errors:
+        lines.append("**错误码**")
+        lines.append("")
+        lines.append("| 错误码 | 说明 |")
+        lines.append("|--------|------|")
+        for e in errors:
+            lines.append(f"| {e.get('status', 400)} | {e.get('message', '错误')} |")
+        lines.append("")
+
+    # 待确认项
+    todos = ep.get("x-todo-confirm", [])
+    if todos:
+        lines.append("> ⚠️ **待确认项**")
+        for t in todos:
+            lines.append(f"> - {t}")
+        lines.append("")
+
+    lines.append("---")
+    lines.append("")
+
+
+# render_endpoint 输出格式变化时递增，使已缓存的片段全部失效
+FRAGMENT_TEMPLATE_VERSION = 1
+
+# render_endpoint 读取的契约字段；source / mockStrategy 等字段变化不影响文档
+RENDERED_FIELDS = (
+    "method", "path", "endpoint", "headers", "pathParams", "query",
+    "requestBody", "responses", "errors", "x-todo-confirm",
+)
+
+
+def fragment_key(ep: Dict) -> str:
+    """片段缓存键：模板版本 + 参与渲染的契约字段"""
+    fields = {k: ep.get(k) for k in RENDERED_FIELDS}
+    return sha256_bytes(f"{FRAGMENT_TEMPLATE_VERSION}:{canonical(fields)}".encode("utf-8"))[:32]
+
+
+class FragmentCache:
+    """接口章节渲染缓存：命中时直接复用上次渲染的 Markdown 片段"""
+
+    def __init__(self, entries: Optional[Dict[str, str]] = None):
+        self.entries = entries or {}
+        self.used: Dict[str, str] = {}
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def load(cls, path: Path) -> "FragmentCache":
+        try:
+            data = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return cls()
+        if data.get("version") != FRAGMENT_TEMPLATE_VERSION:
+            return cls()
+        return cls(data.get("fragments", {}))
+
+    def render(self, ep: Dict) -> str:
+        key = fragment_key(ep)
+        text = self.entries.get(key)
+        if text is None:
+            fragment: List[str] = []
+            render_endpoint(fragment, ep)
+            text = "\n".join(fragment)
+            self.misses += 1
+        else:
+            self.hits += 1
+        self.used[key] = text
+        return text
+
+    def subset(self, eps: List[Dict]) -> Dict[str, str]:
+        """取出一组接口可能命中的缓存条目（传给子进程）"""
+        keys = (fragment_key(ep) for ep in eps)
+        return {k: self.entries[k] for k in keys if k in self.entries}
+
+    def merge(self, used: Dict[str, str], hits: int, misses: int) -> None:
+        self.used.update(used)
+        self.hits += hits
+        self.misses += misses
+
+    def save(self, path: Path) -> None:
+        """只保留本次用到的片段，已删除 / 已变化接口的旧片段随之淘汰"""
+        data = {"version": FRAGMENT_TEMPLATE_VERSION, "fragments": dict(sorted(self.used.items()))}
+        ArtifactWriter().write_text(path, json.dumps(data, ensure_ascii=False, separators=(",", ":")))
+
+    def summary(self) -> str:
+        total = self.hits + self.misses
+        rate = f"{self.hits * 100 / total:.1f}%" if total else "—"
+        return f"命中 {self.hits} / {total}（{rate}），重新渲染 {self.misses}"
+
+
+def render_error_codes(lines: List[str], number: int) -> None:
+    """错误码总览"""
+    lines.append(f"## {number}. 错误码总览")
     lines.append("")
     lines.append("| 错误码 | 含义 | 前端处理建议 |")
     lines.append("|--------|------|-------------|")
@@ -232,6 +309,87 @@ def build_markdown(contract: Dict, project_name: str) -> str:
     lines.append("| 500 | 服务器内部错误 | 提示\"服务异常，请稍后重试\" |")
     lines.append("")
 
+
+def build_markdown(contract: Dict, project_name: str, cache: Optional[FragmentCache] = None) -> str:
+    """生成中文 Markdown 接口文档（接口章节经 cache 复用）"""
+    cache = cache or FragmentCache()
+    endpoints = contract.get("endpoints", [])
+    meta = contract.get("meta", {})
+    modules = group_by_module(endpoints)
+
+    lines: List[str] = []
+    render_header(lines, project_name, meta, len(endpoints))
+
+    # 目录
+    lines.append("## 目录")
+    lines.append("")
+    lines.append("- [1. 通用规范](#1-通用规范)")
+    lines.append("- [2. 快速接入 MSW Mock](#2-快速接入-msw-mock)")
+    for i, module in enumerate(sorted(modules.keys()), start=3):
+        lines.append(f"- [{i}. {module} 模块](#{i}-{module}-模块)")
+    lines.append(f"- [{len(modules) + 3}. 错误码总览](#{len(modules) + 3}-错误码总览)")
+    lines.append("")
+    lines.append("---")
+    lines.append("")
+
+    render_common(lines, meta)
+
+    # 各模块接口
+    for i, (module, eps) in enumerate(sorted(modules.items()), start=3):
+        lines.append(f"## {i}. {module} 模块")
+        lines.append("")
+        for ep in eps:
+            lines.append(cache.render(ep))
+
+    render_error_codes(lines, len(modules) + 3)
+    return "\n".join(lines)
+
+
+def build_index_markdown(contract: Dict, project_name: str, modules: Dict[str, List[Dict]]) -> str:
+    """拆分模式的根索引：通用规范 + 模块页面链接"""
+    meta = contract.get("meta", {})
+    lines: List[str] = []
+    render_header(lines, project_name, meta, len(contract.get("endpoints", [])))
+
+    lines.append("## 目录")
+    lines.append("")
+    lines.append("- [1. 通用规范](#1-通用规范)")
+    lines.append("- [2. 快速接入 MSW Mock](#2-快速接入-msw-mock)")
+    lines.append("- [3. 模块索引](#3-模块索引)")
+    lines.append("- [4. 错误码总览](#4-错误码总览)")
+    lines.append("")
+    lines.append("---")
+    lines.append("")
+
+    render_common(lines, meta)
+
+    lines.append("## 3. 模块索引")
+    lines.append("")
+    lines.append("| 模块 | 接口数 | 文档 | OpenAPI |")
+    lines.append("|------|:------:|------|---------|")
+    for module, eps in sorted(modules.items()):
+        name = module_file_name(module)
+        lines.append(f"| {module} | {len(eps)} | [modules/{name}.md](modules/{name}.md) | [openapi/{name}.yaml](openapi/{name}.yaml) |")
+    lines.append("")
+    lines.append("---")
+    lines.append("")
+
+    render_error_codes(lines, 4)
+    return "\n".join(lines)
+
+
+def build_module_markdown(module: str, eps: List[Dict], cache: Optional[FragmentCache] = None) -> str:
+    """拆分模式的单模块页面"""
+    cache = cache or FragmentCache()
+    lines: List[str] = []
+    lines.append(f"# {module} 模块")
+    lines.append("")
+    lines.append(f"> 📊 接口数：{len(eps)} 个 ｜ [返回索引](../api-docs.md) ｜ [OpenAPI](../openapi/{module_file_name(module)}.yaml)")
+    lines.append("")
+    lines.append("---")
+    lines.append("")
+    for ep in eps:
+        lines.append(cache.render(ep))
     return "\n".join(lines)
 
 
@@ -239,149 +397,221 @@ def build_markdown(contract: Dict, project_name: str) -> str:
 # OpenAPI YAML 生成
 # =====================================================
 
-def yaml_value(v: Any) -> str:
-    """转换为 YAML 标量值"""
-    if isinstance(v, bool):
-        return "true" if v else "false"
-    if v is None:
-        return "null"
-    if isinstance(v, (int, float)):
-        return str(v)
-    s = str(v)
-    if any(c in s for c in [':', '#', '{', '}', '[', ']', ',', '&', '*', '?', '|', '-', '<', '>', '=', '!', '%', '@', '`', '"', "'"]):
-        return f'"{s}"'
-    return s
-
-
-def dict_to_yaml(obj: Any, indent: int = 0) -> List[str]:
-    """递归将字典转为 YAML 文本"""
-    space = "  " * indent
-    lines: List[str] = []
+ERROR_RESPONSE_NAMES = {
+    400: "BadRequest",
+    401: "Unauthorized",
+    403: "Forbidden",
+    404: "NotFound",
+    409: "Conflict",
+    429: "TooManyRequests",
+    500: "InternalServerError",
+}
+
+
+def pascal_name(text: str) -> str:
+    """user.list / order-detail → UserList / OrderDetail"""
+    name = "".join(part[:1].upper() + part[1:] for part in re.split(r"[^0-9A-Za-z]+", text) if part)
+    return name if name and not name[0].isdigit() else f"Op{name}"
+
+
+class ComponentRegistry:
+    """组件复用表：预扫描统计重复出现的 schema / 参数 / 示例 / 错误响应，
+    出现两次及以上的提升到 components 并在接口中以 $ref 引用"""
+
+    SECTIONS = ("schemas", "parameters", "examples", "responses")
+
+    def __init__(self) -> None:
+        self.counts: Dict[Tuple[str, str], int] = {}
+        self.refs: Dict[Tuple[str, str], str] = {}
+        self.components: Dict[str, Dict[str, Any]] = {s: {} for s in self.SECTIONS}
+
+    def count(self, section: str, obj: Any) -> None:
+        key = (section, canonical(obj))
+        self.counts[key] = self.counts.get(key, 0) + 1
+
+    def use(self, section: str, obj: Any, name: str) -> Any:
+        """重复对象返回 $ref（首次使用时登记到 components），否则原样返回"""
+        key = (section, canonical(obj))
+        if self.counts.get(key, 0) < 2:
+            return obj
+        ref = self.refs.get(key)
+        if ref is None:
+            table = self.components[section]
+            unique, n = name, 2
+            while unique in table:
+                unique, n = f"{name}{n}", n + 1
+            table[unique] = obj
+            ref = self.refs[key] = f"#/components/{section}/{unique}"
+        return {"$ref": ref}
+
+
+def is_envelope(schema: Dict) -> bool:
+    """是否为统一响应格式 {code, data, message}"""
+    props = schema.get("properties", {}) if isinstance(schema, dict) else {}
+    return set(props) == {"code", "data", "message"}
+
+
+def schema_name(schema: Dict, ep: Dict, suffix: str) -> str:
+    """组件命名：通用响应格式按结构命名，其余按首个使用的接口命名"""
+    if schema == {"type": "object", "properties": {}}:
+        return "Object" + suffix
+    if suffix == "Response" and is_envelope(schema):
+        data = schema["properties"]["data"]
+        if data == {"type": "object"}:
+            return "ApiResponse"
+        if "list" in data.get("properties", {}):
+            return "PageResponse"
+    return pascal_name(ep.get("endpoint", "unknown")) + suffix
+
+
+def example_name(example: Any, ep: Dict) -> str:
+    if isinstance(example, dict) and example.get("data") == {} and str(example.get("code")) == "200":
+        return "ApiSuccess"
+    return pascal_name(ep.get("endpoint", "unknown")) + "Example"
+
+
+def operation_parts(ep: Dict) -> Tuple[List[Dict], Optional[Dict], List[Tuple[str, Dict, Any]], List[Tuple[str, Dict]]]:
+    """拆出接口的可复用部分：参数、请求体 schema、成功响应 (状态码, schema, 示例)、错误响应"""
+    method = ep.get("method", "GET").lower()
+    params: List[Dict] = []
+
+    # 路径参数
+    for p in ep.get("pathParams", []):
+        params.append({
+            "name": p.get("name"),
+            "in": "path",
+            "required": True,
+            "schema": {"type": p.get("type", "string")},
+            "description": p.get("description", ""),
+        })
+
+    # 查询参数
+    for q in ep.get("query", []):
+        param: Dict[str, Any] = {
+            "name": q.get("name"),
+            "in": "query",
+            "required": bool(q.get("required", False)),
+            "schema": {"type": q.get("type", "string")},
+            "description": q.get("description", ""),
+        }
+        if "default" in q:
+            param["schema"]["default"] = q["default"]
+        params.append(param)
+
+    # 请求头
+    for h in ep.get("headers", []):
+        params.append({
+            "name": h.get("name"),
+            "in": "header",
+            "required": bool(h.get("required", False)),
+            "schema": {"type": h.get("type", "string")},
+        })
+
+    # 请求体
+    body = ep.get("requestBody")
+    request_body = None
+    if body:
+        request_body = {
+            "required": method in {"post", "put", "patch"},
+            "contentType": body.get("contentType", "application/json"),
+            "schema": body.get("schema", {"type": "object"}),
+        }
 
-    if isinstance(obj, dict):
-        for k, v in obj.items():
-            if isinstance(v, (dict, list)):
-                lines.append(f"{space}{k}:")
-                lines.extend(dict_to_yaml(v, indent + 1))
-            else:
-                lines.append(f"{space}{k}: {yaml_value(v)}")
-    elif isinstance(obj, list):
-        for item in obj:
-            if isinstance(item, (dict, list)):
-                lines.append(f"{space}-")
-                lines.extend(dict_to_yaml(item, indent + 1))
-            else:
-                lines.append(f"{space}- {yaml_value(item)}")
-    else:
-        lines.append(f"{space}{yaml_value(obj)}")
-    return lines
+    # 成功响应
+    successes = [
+        (str(r.get("status", 200)), r.get("schema", {"type": "object"}), r.get("example", {}), r.get("description", "成功"))
+        for r in ep.get("responses", [])
+    ]
 
+    # 错误响应
+    errors = []
+    for e in ep.get("errors", []):
+        errors.append((str(e.get("status", 400)), {
+            "description": e.get("message", "错误"),
+            "content": {"application/json": {"example": e.get("example", {})}},
+        }))
+    return params, request_body, successes, errors
+
+
+def param_name(param: Dict) -> str:
+    return pascal_name(str(param.get("name", "param"))) + pascal_name(str(param.get("in", "")))
 
-def build_openapi(contract: Dict, project_name: str, version: str) -> Dict:
-    """构建 OpenAPI 3.1 结构"""
-    endpoints = contract.get("endpoints", [])
-    meta = contract.get("meta", {})
 
-    paths: Dict = {}
+def error_name(status: str) -> str:
+    return ERROR_RESPONSE_NAMES.get(int(status), f"Error{status}") if status.isdigit() else f"Error{pascal_name(status)}"
+
+
+def scan_components(endpoints: List[Dict]) -> ComponentRegistry:
+    """预扫描：统计各可复用部分的出现次数"""
+    registry = ComponentRegistry()
     for ep in endpoints:
-        path = ep.get("path", "/")
-        method = ep.get("method", "GET").lower()
-
-        op: Dict[str, Any] = {
-            "operationId": ep.get("endpoint", "unknown"),
-            "tags": [ep.get("module", "default")],
-            "summary": ep.get("endpoint", ""),
-            "parameters": [],
-            "responses": {},
-        }
+        params, request_body, successes, errors = operation_parts(ep)
+        for p in params:
+            registry.count("parameters", p)
+        if request_body:
+            registry.count("schemas", request_body["schema"])
+        for _, schema, example, _ in successes:
+            registry.count("schemas", schema)
+            registry.count("examples", {"value": example})
+        for _, resp in errors:
+            registry.count("responses", resp)
+    return registry
+
+
+def build_operation(ep: Dict, registry: ComponentRegistry) -> Dict:
+    """构建单个 operation，重复部分替换为 $ref"""
+    params, request_body, successes, errors = operation_parts(ep)
+    op: Dict[str, Any] = {
+        "operationId": ep.get("endpoint", "unknown"),
+        "tags": [ep.get("module", "default")],
+        "summary": ep.get("endpoint", ""),
+        "parameters": [registry.use("parameters", p, param_name(p)) for p in params],
+    }
 
-        # 路径参数
-        for p in ep.get("pathParams", []):
-            op["parameters"].append({
-                "name": p.get("name"),
-                "in": "path",
-                "required": True,
-                "schema": {"type": p.get("type", "string")},
-                "description": p.get("description", ""),
-            })
-
-        # 查询参数
-        for q in ep.get("query", []):
-            param: Dict[str, Any] = {
-                "name": q.get("name"),
-                "in": "query",
-                "required": bool(q.get("required", False)),
-                "schema": {"type": q.get("type", "string")},
-                "description": q.get("description", ""),
-            }
-            if "default" in q:
-                param["schema"]["default"] = q["default"]
-            op["parameters"].append(param)
-
-        # 请求头
-        for h in ep.get("headers", []):
-            op["parameters"].append({
-                "name": h.get("name"),
-                "in": "header",
-                "required": bool(h.get("required", False)),
-                "schema": {"type": h.get("type", "string")},
-            })
-
-        # 请求体
-        body = ep.get("requestBody")
-        if body:
-            content_type = body.get("contentType", "application/json")
-            op["requestBody"] = {
-                "required": method in {"post", "put", "patch"},
-                "content": {
-                    content_type: {
-                        "schema": body.get("schema", {"type": "object"}),
-                    }
-                },
-            }
-
-        # 成功响应
-        for r in ep.get("responses", []):
-            code = str(r.get("status", 200))
-            op["responses"][code] = {
-                "description": r.get("description", "成功"),
-                "content": {
-                    "application/json": {
-                        "schema": r.get("schema", {"type": "object"}),
-                        "example": r.get("example", {}),
-                    }
-                },
-            }
-
-        # 错误响应
-        for e in ep.get("errors", []):
-            code = str(e.get("status", 400))
-            op["responses"][code] = {
-                "description": e.get("message", "错误"),
-                "content": {
-                    "application/json": {
-                        "example": e.get("example", {}),
-                    }
-                },
-            }
-
-        paths.setdefault(path, {})
-        paths[path][method] = op
+    if request_body:
+        op["requestBody"] = {
+            "required": request_body["required"],
+            "content": {
+                request_body["contentType"]: {
+                    "schema": registry.use("schemas", request_body["schema"], schema_name(request_body["schema"], ep, "Request")),
+                }
+            },
+        }
 
-    auth_mode = meta.get("authMode", "bearer")
-    security_schemes = {}
-    if auth_mode == "bearer":
-        security_schemes["BearerAuth"] = {
+    op["responses"] = {}
+    for code, schema, example, description in successes:
+        example_ref = registry.use("examples", {"value": example}, example_name(example, ep))
+        media: Dict[str, Any] = {"schema": registry.use("schemas", schema, schema_name(schema, ep, "Response"))}
+        if "$ref" in example_ref:
+            media["examples"] = {"default": example_ref}
+        else:
+            media["example"] = example
+        op["responses"][code] = {"description": description, "content": {"application/json": media}}
+
+    for code, resp in errors:
+        op["responses"][code] = registry.use("responses", resp, error_name(code))
+    return op
+
+
+def security_schemes(meta: Dict) -> Dict:
+    """按认证方式生成 securitySchemes"""
+    schemes = {}
+    if meta.get("authMode", "bearer") == "bearer":
+        schemes["BearerAuth"] = {
             "type": "http",
             "scheme": "bearer",
             "bearerFormat": "JWT",
             "description": "登录后获取的 JWT Token",
         }
+    return schemes
+
 
-    spec = {
+def spec_header(title: str, project_name: str, version: str) -> Dict:
+    """openapi / info / servers 顶层字段"""
+    return {
         "openapi": "3.1.0",
         "info": {
-            "title": f"{project_name} API",
+            "title": title,
             "version": version,
             "description": f"{project_name} 接口文档，由 api-extractor-pro 自动生成",
         },
@@ -389,37 +619,343 @@ def build_openapi(contract: Dict, project_name: str, version: str) -> Dict:
             {"url": "http://localhost:3000", "description": "开发环境（MSW Mock）"},
             {"url": "https://api.example.com", "description": "生产环境"},
         ],
-        "paths": paths,
     }
 
-    if security_schemes:
-        spec["components"] = {"securitySchemes": security_schemes}
 
+def build_openapi(contract: Dict, project_name: str, version: str, title: Optional[str] = None) -> Dict:
+    """构建 OpenAPI 3.1 结构
+
+    paths 与 components 为 StreamMap：输出时按路径逐个构建 operation，
+    components 位于 paths 之后，输出到它时组件表已由 paths 填充完毕；没有任何组件时省略 components
+    """
+    endpoints = contract.get("endpoints", [])
+    schemes = security_schemes(contract.get("meta", {}))
+    registry = scan_components(endpoints)
+
+    by_path: Dict[str, List[Dict]] = {}
+    for ep in endpoints:
+        by_path.setdefault(ep.get("path", "/"), []).append(ep)
+
+    def iter_paths():
+        for path, eps in by_path.items():
+            yield path, {ep.get("method", "GET").lower(): build_operation(ep, registry) for ep in eps}
+
+    def iter_components():
+        for section in ComponentRegistry.SECTIONS:
+            if registry.components[section]:
+                yield section, registry.components[section]
+        if schemes:
+            yield "securitySchemes", schemes
+
+    spec = spec_header(title or f"{project_name} API", project_name, version)
+    spec["paths"] = StreamMap(iter_paths)
+    spec["components"] = StreamMap(iter_components, optional=True)
+    return spec
+
+
+# =====================================================
+# 拆分模式（--split）：按模块输出 Markdown 页面与 OpenAPI 片段
+# =====================================================
+
+SPLIT_MARKER = "@generated by api-extractor-pro generate_docs.py"
+
+
+def json_pointer_ref(fragment: str, path: str) -> str:
+    """片段文件中某个 path item 的 $ref（JSON Pointer 转义后再做 URI 编码）"""
+    pointer = "/paths/" + path.replace("~", "~0").replace("/", "~1")
+    return f"./{fragment}#{quote(pointer, safe='/~')}"
+
+
+def assign_path_owners(modules: Dict[str, List[Dict]]) -> Dict[str, List[Dict]]:
+    """OpenAPI 片段按路径归属模块：同一路径被多个模块使用时归入首个模块（path item 只能 $ref 一个文件）"""
+    owner: Dict[str, str] = {}
+    fragments: Dict[str, List[Dict]] = {module: [] for module in modules}
+    for module, eps in modules.items():
+        for ep in eps:
+            path = ep.get("path", "/")
+            fragments[owner.setdefault(path, module)].append(ep)
+    return {module: eps for module, eps in fragments.items() if eps}
+
+
+def render_module(job: Tuple) -> Tuple[List[str], List[str], Dict[str, str], int, int]:
+    """渲染并写入单个模块的 Markdown 页面与 OpenAPI 片段（可在子进程中执行）
+
+    返回 (写入文件, 未变文件, 用到的片段, 片段命中数, 片段未命中数)
+    """
+    module, eps, path_eps, meta, project_name, version, docs_dir, cached, trace = job
+    tracing.attach(trace)
+    writer = ArtifactWriter()
+    cache = FragmentCache(cached)
+    name = module_file_name(module)
+    with tracing.span("docs.module", module=module, endpoints=len(eps)):
+        if eps:
+            with tracing.span("docs.markdown", module=module):
+                md = f"<!-- {SPLIT_MARKER} -->\n" + build_module_markdown(module, eps, cache)
+                writer.write_text(Path(docs_dir) / "modules" / f"{name}.md", md)
+        if path_eps:
+            with tracing.span("docs.openapi", module=module):
+                spec = build_openapi({"meta": meta, "endpoints": path_eps}, project_name, version, f"{project_name} API — {module}")
+                with writer.open(Path(docs_dir) / "openapi" / f"{name}.yaml") as fh:
+                    fh.write(f"# {SPLIT_MARKER}\n")
+                    emit_yaml(spec, fh)
+    tracing.flush_part()
+    return [str(p) for p in writer.written], [str(p) for p in writer.unchanged], cache.used, cache.hits, cache.misses
+
+
+def build_root_spec(contract: Dict, project_name: str, version: str, fragments: Dict[str, List[Dict]]) -> Dict:
+    """根 OpenAPI：每个路径 $ref 到所属模块片段"""
+    schemes = security_schemes(contract.get("meta", {}))
+
+    def iter_paths():
+        for module, eps in fragments.items():
+            fragment = f"openapi/{module_file_name(module)}.yaml"
+            for path in dict.fromkeys(ep.get("path", "/") for ep in eps):
+                yield path, {"$ref": json_pointer_ref(fragment, path)}
+
+    spec = spec_header(f"{project_name} API", project_name, version)
+    spec["paths"] = StreamMap(iter_paths)
+    if schemes:
+        spec["components"] = {"securitySchemes": schemes}
     return spec
 
 
-def main() -> int:
-    args = parse_args()
-    contract = json.loads(Path(args.contract).read_text(encoding="utf-8"))
+def is_split_artifact(path: Path) -> bool:
+    try:
+        with open(path, encoding="utf-8") as fh:
+            return SPLIT_MARKER in fh.readline()
+    except OSError:
+        return False
+
+
+# =====================================================
+# 输出格式与内容哈希
+# =====================================================
+
+SPEC_FORMATS = {"yaml": "openapi.yaml", "json": "openapi.json", "json.gz": "openapi.json.gz"}
+
+
+def parse_formats(value: str) -> List[str]:
+    formats = [f.strip() for f in value.split(",") if f.strip()]
+    unknown = [f for f in formats if f not in SPEC_FORMATS]
+    if unknown or not formats:
+        raise argparse.ArgumentTypeError(f"未知格式：{','.join(unknown) or value}（可选：{', '.join(SPEC_FORMATS)}）")
+    return list(dict.fromkeys(formats))
+
+
+class HashSink:
+    """只计算哈希的文本写入端"""
+
+    def __init__(self) -> None:
+        self.h = hashlib.sha256()
+
+    def write(self, text: str) -> None:
+        self.h.update(text.encode("utf-8"))
+
+    def hexdigest(self) -> str:
+        return self.h.hexdigest()
+
+
+def write_spec(
+    spec: Dict, docs_dir: Path, formats: List[str], writer: ArtifactWriter, endpoint_count: int,
+    fragments: Sequence[Path] = (),
+) -> List[Path]:
+    """按格式写出 OpenAPI，并写入 openapi.meta.json：
+
+    etag 为紧凑 JSON 序列化的 sha256，与输出格式无关，消费方 / CI 缓存比对 etag 即可跳过重复下载与解析；
+    拆分模式下根规范只有 $ref，fragments 为其引用的模块片段，按相对路径排序后将各片段的 sha256 一并计入
+    """
+    entries: Dict[str, Dict[str, Any]] = {}
+    json_digest = None
+    for fmt in formats:
+        path = docs_dir / SPEC_FORMATS[fmt]
+        with tracing.span("docs.write_spec", format=fmt):
+            if fmt == "yaml":
+                with writer.open(path) as fh:
+                    emit_yaml(spec, fh)
+            elif fmt == "json":
+                with writer.open(path) as fh:
+                    emit_json(spec, fh)
+                json_digest = writer.hashes[path]
+            else:
+                # mtime 固定为 0，内容不变时压缩结果逐字节一致，可被跳过写入
+                with writer.open(path, binary=True) as raw:
+                    with gzip.GzipFile(filename="", mode="wb", fileobj=raw, mtime=0) as gz:
+                        text = io.TextIOWrapper(gz, encoding="utf-8", newline="")
+                        emit_json(spec, text)
+                        text.flush()
+                        text.detach()
+        if writer.written and writer.written[-1] == path:
+            print(f"[generate-docs] 写入：{path}")
+        entries[fmt] = {"file": path.name, "bytes": path.stat().st_size, "sha256": writer.hashes[path]}
+
+    if json_digest is None:
+        with tracing.span("docs.etag"):
+            sink = HashSink()
+            emit_json(spec, sink)
+            json_digest = sink.hexdigest()
+    if fragments:
+        h = hashlib.sha256(json_digest.encode("ascii"))
+        for path in sorted(fragments, key=lambda p: p.relative_to(docs_dir).as_posix()):
+            h.update(f"\n{path.relative_to(docs_dir).as_posix()}\t{hashlib.sha256(path.read_bytes()).hexdigest()}".encode("utf-8"))
+        json_digest = h.hexdigest()
+
+    meta = {
+        "etag": f'"{json_digest[:32]}"',
+        "sha256": json_digest,
+        "endpoints": endpoint_count,
+        "formats": entries,
+    }
+    meta_path = docs_dir / "openapi.meta.json"
+    if writer.write_text(meta_path, json.dumps(meta, ensure_ascii=False, indent=2) + "\n"):
+        print(f"[generate-docs] 写入：{meta_path}")
+    print(f"[generate-docs] OpenAPI ETag：{meta['etag']}（{', '.join(formats)}）")
+    return [docs_dir / SPEC_FORMATS[fmt] for fmt in formats]
+
+
+def generate_split(
+    contract: Dict,
+    args: argparse.Namespace,
+    docs_dir: Path,
+    writer: ArtifactWriter,
+    cache: FragmentCache,
+    modules_only: Optional[Set[str]] = None,
+) -> Dict[Path, List[Dict]]:
+    """拆分模式：并行渲染各模块，再写入根索引与根 OpenAPI；返回 规范文件 → 接口（用于清单）
+
+    modules_only 指定时只渲染这些模块，其余模块的页面与片段已存在则沿用
+    """
+    modules = dict(sorted(group_by_module(contract.get("endpoints", [])).items()))
+    fragments = assign_path_owners(modules)
+    meta = contract.get("meta", {})
+    jobs = []
+    for module, eps in modules.items():
+        name = module_file_name(module)
+        outputs = [docs_dir / "modules" / f"{name}.md"] if eps else []
+        outputs += [docs_dir / "openapi" / f"{name}.yaml"] if fragments.get(module) else []
+        if modules_only is not None and module not in modules_only and all(p.is_file() for p in outputs):
+            writer.unchanged.extend(outputs)
+            cache.merge(cache.subset(eps), 0, 0)
+            continue
+        jobs.append((
+            module, eps, fragments.get(module, []), meta, args.project_name, args.version, str(docs_dir),
+            cache.subset(eps), tracing.current_path(),
+        ))
+
+    workers = max(1, min(args.jobs or os.cpu_count() or 1, len(jobs)))
+    with tracing.span("docs.render_modules", modules=len(jobs), workers=workers):
+        if workers > 1:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                results = list(pool.map(render_module, jobs))
+        else:
+            results = [render_module(job) for job in jobs]
+
+    for written, unchanged, used, hits, misses in results:
+        cache.merge(used, hits, misses)
+        for p in written:
+            writer.written.append(Path(p))
+            print(f"[generate-docs] 写入：{p}")
+        writer.unchanged.extend(Path(p) for p in unchanged)
+
+    md_path = docs_dir / "api-docs.md"
+    with tracing.span("docs.index"):
+        written = writer.write_text(md_path, build_index_markdown(contract, args.project_name, modules))
+    if written:
+        print(f"[generate-docs] 写入：{md_path}")
+
+    root_spec = build_root_spec(contract, args.project_name, args.version, fragments)
+    endpoints = contract.get("endpoints", [])
+    fragment_files = [docs_dir / "openapi" / f"{module_file_name(module)}.yaml" for module in fragments]
+    spec_files = {
+        p: endpoints for p in write_spec(root_spec, docs_dir, args.formats, writer, len(endpoints), fragment_files)
+    }
+    for module, eps in fragments.items():
+        spec_files[docs_dir / "openapi" / f"{module_file_name(module)}.yaml"] = eps
+
+    # 清理已删除模块遗留的页面与片段
+    keep = [p for p in writer.written + writer.unchanged]
+    orphans = writer.prune(docs_dir / "modules", "*.md", keep, is_split_artifact)
+    orphans += writer.prune(docs_dir / "openapi", "*.yaml", keep, is_split_artifact)
+    for fp in orphans:
+        print(f"[generate-docs] 删除：{fp}")
+    print(f"[generate-docs] 拆分：{len(modules)} 个模块（渲染 {len(jobs)} 个），{workers} 个进程")
+    return spec_files
+
+
+def generate_single(
+    contract: Dict,
+    args: argparse.Namespace,
+    docs_dir: Path,
+    writer: ArtifactWriter,
+    cache: FragmentCache,
+) -> Dict[Path, List[Dict]]:
+    """单文件模式：api-docs.md + openapi.yaml；返回 规范文件 → 接口（用于清单）"""
+    # 生成 Markdown
+    with tracing.span("docs.markdown"):
+        md = build_markdown(contract, args.project_name, cache)
+        md_path = docs_dir / "api-docs.md"
+        written = writer.write_text(md_path, md)
+    if written:
+        print(f"[generate-docs] 写入：{md_path}")
+
+    # 生成 OpenAPI（各格式流式写入）
+    with tracing.span("docs.openapi"):
+        spec = build_openapi(contract, args.project_name, args.version)
+    endpoints = contract.get("endpoints", [])
+    return {p: endpoints for p in write_spec(spec, docs_dir, args.formats, writer, len(endpoints))}
+
+
+def run(args: argparse.Namespace, contract: Optional[Dict] = None, modules_only: Optional[Set[str]] = None) -> int:
+    """contract 已在内存中时（run_workflow.py 进程内模式）不再读取 --contract 文件
+
+    modules_only 指定时（--watch 增量）拆分模式只重新渲染这些模块；单文件模式由片段缓存保证只重新渲染变化的接口
+    """
+    if contract is None:
+        contract = json.loads(Path(args.contract).read_text(encoding="utf-8"))
     output_root = Path(args.output_root).resolve()
     docs_dir = output_root / "docs"
-    docs_dir.mkdir(parents=True, exist_ok=True)
+    writer = ArtifactWriter()
+    cache_path = docs_dir / ".cache" / "fragments.json"
+    cache = FragmentCache() if args.no_cache else FragmentCache.load(cache_path)
 
-    # 生成 Markdown
-    md = build_markdown(contract, args.project_name)
-    md_path = docs_dir / "api-docs.md"
-    md_path.write_text(md, encoding="utf-8")
-    print(f"[generate-docs] 写入：{md_path}")
+    if args.split:
+        spec_files = generate_split(contract, args, docs_dir, writer, cache, modules_only)
+    else:
+        spec_files = generate_single(contract, args, docs_dir, writer, cache)
 
-    # 生成 OpenAPI YAML
-    spec = build_openapi(contract, args.project_name, args.version)
-    yaml_lines = dict_to_yaml(spec)
-    yaml_path = docs_dir / "openapi.yaml"
-    yaml_path.write_text("\n".join(yaml_lines) + "\n", encoding="utf-8")
-    print(f"[generate-docs] 写入：{yaml_path}")
+    # 生成清单：供一致性校验按接口比对，无需解析 YAML
+    manifest = build_manifest("generate_docs", docs_dir, spec_files, writer.hashes)
+    manifest_path = docs_dir / MANIFEST_NAME
+    if writer.write_text(manifest_path, manifest_json(manifest)):
+        print(f"[generate-docs] 写入：{manifest_path}")
 
+    # 全文检索索引 + 静态搜索页
+    if args.split:
+        href_for = lambda ep: f"modules/{module_file_name(ep.get('module', 'default'))}.md"
+    else:
+        href_for = lambda ep: "api-docs.md"
+    with tracing.span("docs.search_index"):
+        index = build_search_index(contract.get("endpoints", []), href_for)
+        outputs = [
+            (docs_dir / "search-index.json", search_index_json(index)),
+            (docs_dir / "search.html", search_html(args.project_name)),
+        ]
+    for path, content in outputs:
+        if writer.write_text(path, content):
+            print(f"[generate-docs] 写入：{path}")
+    print(f"[generate-docs] 检索索引：{len(index['docs'])} 个接口，{len(index['terms'])} 个词")
+
+    if not args.no_cache:
+        cache.save(cache_path)
+    print(f"[generate-docs] 片段缓存：{cache.summary()}")
+    print(f"[generate-docs] 文件：{writer.summary()}")
     return 0
 
 
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    with tracing.session(args.trace, "generate_docs"):
+        return run(args)
+
+
 if __name__ == "__main__":
     raise SystemExit(main())
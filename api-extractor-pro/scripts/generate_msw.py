@@ -7,14 +7,31 @@ import argparse
 import json
 import re
 from pathlib import Path
-from typing import Dict, List, Tuple
+from typing import Dict, List, Optional, Set, Tuple
+from urllib.parse import urlsplit
 
+import tracing
+from artifacts import ArtifactWriter
+from fingerprint import MANIFEST_NAME, build_manifest, manifest_json
+from mock_data import DEFAULT_SEED, DEFAULT_TOTAL, build_generator_spec, generate_page, generator_js
+from mock_profiles import PRESETS, profile_literal, resolve_profile, runtime_js
+from recordings import RecordingStore, recorded_endpoints, recordings_root, replay_js
 
-def parse_args() -> argparse.Namespace:
+# 生成文件标记：清理孤儿文件时只删除带此标记的 handler
+GENERATED_MARKER = "// @generated by api-extractor-pro generate_msw.py"
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
     parser = argparse.ArgumentParser(description="从契约生成 MSW Mock 文件")
     parser.add_argument("--contract", required=True, help="contract.json 路径")
     parser.add_argument("--output-root", required=True, help="输出根目录")
-    return parser.parse_args()
+    parser.add_argument("--lazy", action="store_true", help="按路由前缀懒加载各模块 handler（首次命中时动态 import）")
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED, help="Mock 数据生成与延迟/错误采样的随机种子")
+    parser.add_argument("--mock-total", type=int, default=DEFAULT_TOTAL, help="分页接口默认数据总条数（可被契约 mockData.total 覆盖）")
+    parser.add_argument("--profile", choices=sorted(PRESETS), default=None, help="全局网络画像预设（可被契约 mockProfile 覆盖）")
+    parser.add_argument("--recordings", action="store_true", help="优先回放 mock/recordings 中录制的真实响应（见 recordings.py）")
+    parser.add_argument("--trace", default="", help=f"输出 Chrome trace 追踪文件（也可用环境变量 {tracing.TRACE_ENV}）")
+    return parser.parse_args(argv)
 
 
 def to_msw_path(path: str) -> str:
@@ -55,24 +72,41 @@ def is_paginated(ep: Dict) -> bool:
     return "page" in query_names or "pageSize" in query_names
 
 
-def generate_handler_code(ep: Dict) -> str:
-    """生成单个接口的 handler 代码"""
-    method = ep.get("method", "GET").lower()
-    path = to_msw_path(ep.get("path", "/"))
-    endpoint_name = ep.get("endpoint", "unknown")
-    strategy = ep.get("mockStrategy", "success")
-
-    # 提取响应示例
-    success_example = {}
+def pick_success_example(ep: Dict) -> Dict:
+    """第一个 2xx 响应的示例"""
     for r in ep.get("responses", []):
         if str(r.get("status", "")).startswith("2"):
-            success_example = r.get("example", {"code": 200, "data": {}, "message": "success"})
-            break
+            return r.get("example", {"code": 200, "data": {}, "message": "success"})
+    return {}
+
 
+def pick_error_example(ep: Dict) -> Dict:
+    """第一个错误响应的示例"""
     error_example = {"code": 400, "data": None, "message": "请求参数错误"}
     for e in ep.get("errors", []):
-        error_example = e.get("example", error_example)
-        break
+        return e.get("example", error_example)
+    return error_example
+
+
+def generate_handler_code(
+    ep: Dict,
+    list_spec: Optional[Dict] = None,
+    profile: Optional[Dict] = None,
+    replay: bool = False,
+) -> str:
+    """生成单个接口的 handler 代码
+
+    list_spec 为分页数据生成描述，提供时按 page/pageSize 按需合成列表数据；
+    profile 为网络画像，提供时按延迟分布等待并按错误率注入错误；
+    replay 为 True 时优先回放录制的真实响应，未命中再走合成数据
+    """
+    method = ep.get("method", "GET").lower()
+    path = to_msw_path(ep.get("path", "/"))
+    endpoint_name = ep.get("endpoint", "unknown")
+    strategy = ep.get("mockStrategy", "success")
+
+    success_example = pick_success_example(ep)
+    error_example = pick_error_example(ep)
 
     lines = []
     lines.append(f"  // {ep.get('method', 'GET')} {ep.get('path', '/')} — {endpoint_name}")
@@ -85,22 +119,26 @@ def generate_handler_code(ep: Dict) -> str:
         handler_params.append("request")
     elif needs_auth(ep):
         handler_params.append("request")
-    elif is_paginated(ep):
-        # 分页接口需要读取 request.url 中的 query 参数
+    elif is_paginated(ep) or replay:
+        # 分页 / 回放接口需要读取 request.url 中的 query 参数
         handler_params.append("request")
 
     params_str = ", ".join(handler_params)
+    is_async = method in ("post", "put", "patch") or profile is not None or replay
+    async_prefix = "async " if is_async else ""
     if handler_params:
-        is_async = method in ("post", "put", "patch")
-        async_prefix = "async " if is_async else ""
         lines.append(f"  http.{method}('{path}', {async_prefix}({{ {params_str} }}) => {{")
     else:
-        is_async = method in ("post", "put", "patch")
-        async_prefix = "async " if is_async else ""
         lines.append(f"  http.{method}('{path}', {async_prefix}() => {{")
 
     # 延迟模拟
-    if method in ("post", "put", "patch"):
+    if profile is not None:
+        lines.append(f"    // 网络画像：{profile['name']}")
+        lines.append(f"    if (await simulateNetwork({profile_literal(profile)})) {{")
+        lines.append("      return HttpResponse.error()")
+        lines.append("    }")
+        lines.append("")
+    elif method in ("post", "put", "patch"):
         lines.append("    await delay(300)")
         lines.append("")
 
@@ -115,6 +153,15 @@ def generate_handler_code(ep: Dict) -> str:
         lines.append("    }")
         lines.append("")
 
+    # 录制回放
+    if replay:
+        lines.append("    // 优先回放录制的响应")
+        lines.append("    const recorded = await replay(request)")
+        lines.append("    if (recorded) {")
+        lines.append("      return HttpResponse.json(recorded.body, { status: recorded.status })")
+        lines.append("    }")
+        lines.append("")
+
     # 请求体解析（POST/PUT/PATCH）
     if method in ("post", "put", "patch") and "request" in params_str:
         body = ep.get("requestBody", {})
@@ -138,45 +185,94 @@ def generate_handler_code(ep: Dict) -> str:
         lines.append("    const pageSize = parseInt(url.searchParams.get('pageSize') || '10')")
         lines.append("")
 
+    # 成功响应体：分页接口按需生成当前页数据
+    success_body = json.dumps(success_example, ensure_ascii=False)
+    if list_spec is not None and is_paginated(ep):
+        spec_json = json.dumps(list_spec, ensure_ascii=False, separators=(",", ":"))
+        envelope = {k: v for k, v in success_example.items() if k != "data"}
+        head = json.dumps(envelope, ensure_ascii=False)[:-1] + (", " if envelope else "")
+        success_body = f'{head}"data": generatePage({spec_json}, page, pageSize)}}'
+
     # 响应策略
+    error_body = json.dumps(error_example, ensure_ascii=False)
+    error_rate = profile["errorRate"] if profile else 0
     if strategy == "random":
-        lines.append("    // 随机返回成功或错误")
-        lines.append("    if (Math.random() > 0.5) {")
-        lines.append(f"      return HttpResponse.json({json.dumps(success_example, ensure_ascii=False)})")
+        rate = error_rate if error_rate > 0 else 0.5
+        lines.append(f"    // 按错误率 {rate:g} 随机返回成功或错误")
+        lines.append(f"    if (chance({rate:g})) {{")
+        lines.append(f"      return HttpResponse.json({error_body}, {{ status: 400 }})")
         lines.append("    }")
-        lines.append(f"    return HttpResponse.json({json.dumps(error_example, ensure_ascii=False)}, {{ status: 400 }})")
+        lines.append(f"    return HttpResponse.json({success_body})")
     elif strategy == "error":
-        lines.append(f"    return HttpResponse.json({json.dumps(error_example, ensure_ascii=False)}, {{ status: 400 }})")
+        lines.append(f"    return HttpResponse.json({error_body}, {{ status: 400 }})")
     else:
-        lines.append(f"    return HttpResponse.json({json.dumps(success_example, ensure_ascii=False)})")
+        if error_rate > 0:
+            lines.append(f"    // 按错误率 {error_rate:g} 注入错误")
+            lines.append(f"    if (chance({error_rate:g})) {{")
+            lines.append(f"      return HttpResponse.json({error_body}, {{ status: 400 }})")
+            lines.append("    }")
+        lines.append(f"    return HttpResponse.json({success_body})")
 
     lines.append("  }),")
     return "\n".join(lines)
 
 
-def generate_module_file(module: str, endpoints: List[Dict]) -> str:
-    """生成单个模块的 handler 文件"""
+def generate_module_file(
+    module: str,
+    endpoints: List[Dict],
+    seed: int = DEFAULT_SEED,
+    total: int = DEFAULT_TOTAL,
+    profile: Optional[str] = None,
+    recorded: Optional[Set[Tuple[str, str]]] = None,
+) -> str:
+    """生成单个模块的 handler 文件
+
+    recorded 为有录制数据的 (method, path) 集合，对应 handler 优先回放录制响应
+    """
     var_name = safe_var_name(module) + "Handlers"
+    recorded = recorded or set()
+    specs = [build_generator_spec(ep, seed, total) if is_paginated(ep) else None for ep in endpoints]
+    replays = [(str(ep.get("method", "GET")).upper(), ep.get("path", "/")) in recorded for ep in endpoints]
+    handler_codes = [
+        generate_handler_code(ep, spec, resolve_profile(ep, profile), rep)
+        for ep, spec, rep in zip(endpoints, specs, replays)
+    ]
+    runtime_imports = [
+        name for name in ("chance", "simulateNetwork")
+        if any(f"{name}(" in code for code in handler_codes)
+    ]
 
     lines = []
+    lines.append(GENERATED_MARKER)
     lines.append("import { http, HttpResponse, delay } from 'msw'")
+    if any(specs):
+        lines.append("import { generatePage } from '../data/generator'")
+    if runtime_imports:
+        lines.append(f"import {{ {', '.join(runtime_imports)} }} from '../runtime'")
+    if any(replays):
+        lines.append("import { replay } from '../recordings/replay'")
     lines.append(f"// 数据文件可用于构建更真实的 Mock 响应")
     lines.append(f"// import {module}Data from '../data/{module_file_name(module)}.json'")
     lines.append("")
     lines.append(f"export const {var_name} = [")
 
-    for i, ep in enumerate(endpoints):
+    for i, code in enumerate(handler_codes):
         if i > 0:
             lines.append("")
-        lines.append(generate_handler_code(ep))
+        lines.append(code)
 
     lines.append("]")
     lines.append("")
     return "\n".join(lines)
 
 
-def generate_data_file(module: str, endpoints: List[Dict]) -> Dict:
-    """生成模块的 Mock 数据文件"""
+def generate_data_file(
+    module: str,
+    endpoints: List[Dict],
+    seed: int = DEFAULT_SEED,
+    total: int = DEFAULT_TOTAL,
+) -> Dict:
+    """生成模块的 Mock 数据文件（分页接口附带生成描述和前几条样例）"""
     data: Dict = {}
     for ep in endpoints:
         endpoint_name = ep.get("endpoint", "unknown")
@@ -194,6 +290,10 @@ def generate_data_file(module: str, endpoints: List[Dict]) -> Dict:
             "path": ep.get("path", "/"),
             "example": success_example,
         }
+        spec = build_generator_spec(ep, seed, total) if is_paginated(ep) else None
+        if spec is not None:
+            data[key]["generator"] = spec
+            data[key]["sample"] = generate_page(spec, 1, 3)["list"]
     return data
 
 
@@ -216,6 +316,80 @@ def generate_index_file(modules: Dict[str, List[Dict]]) -> str:
     return "\n".join(lines)
 
 
+def route_prefix(path: str) -> str:
+    """提取路径中第一个参数之前的静态前缀，如 /api/user/{id} → /api/user"""
+    if path.startswith(("http://", "https://")):
+        path = urlsplit(path).path or "/"
+    static: List[str] = []
+    for seg in path.strip("/").split("/"):
+        if not seg or seg.startswith((":", "{")):
+            break
+        static.append(seg)
+    return "/" + "/".join(static) if static else ""
+
+
+def module_route_prefix(endpoints: List[Dict]) -> str:
+    """模块内所有接口静态前缀的最长公共部分（按路径段比较）"""
+    prefixes = [route_prefix(ep.get("path", "/")).strip("/").split("/") for ep in endpoints]
+    common = prefixes[0] if prefixes else []
+    for segs in prefixes[1:]:
+        n = 0
+        while n < len(common) and n < len(segs) and common[n] == segs[n]:
+            n += 1
+        common = common[:n]
+    common = [s for s in common if s]
+    return "/" + "/".join(common) if common else ""
+
+
+def generate_lazy_index_file(modules: Dict[str, List[Dict]]) -> str:
+    """生成懒加载版 handlers/index.js：仅包含路由前缀→模块映射，首次命中时动态 import"""
+    routes = sorted(
+        ((module_route_prefix(eps), module) for module, eps in modules.items()),
+        key=lambda x: (-len(x[0]), x[1]),
+    )
+
+    lines = []
+    lines.append("import { http, getResponse } from 'msw'")
+    lines.append("")
+    lines.append("// 路由前缀 → 模块映射（按前缀长度降序），模块 handler 在首次命中时才加载")
+    lines.append("const routeModules = [")
+    for prefix, module in routes:
+        var_name = safe_var_name(module) + "Handlers"
+        file_name = module_file_name(module)
+        lines.append(
+            f"  {{ module: '{module}', prefix: '{prefix}', "
+            f"load: () => import('./{file_name}').then((m) => m.{var_name}) }},"
+        )
+    lines.append("]")
+    lines.append("")
+    lines.append("const loadedModules = new Map()")
+    lines.append("")
+    lines.append("function loadModule(route) {")
+    lines.append("  if (!loadedModules.has(route.module)) {")
+    lines.append("    loadedModules.set(route.module, route.load())")
+    lines.append("  }")
+    lines.append("  return loadedModules.get(route.module)")
+    lines.append("}")
+    lines.append("")
+    lines.append("function matchRoutes(pathname) {")
+    lines.append("  return routeModules.filter(({ prefix }) =>")
+    lines.append("    prefix === '' || pathname === prefix || pathname.startsWith(prefix + '/'))")
+    lines.append("}")
+    lines.append("")
+    lines.append("export const handlers = [")
+    lines.append("  http.all('*', async ({ request }) => {")
+    lines.append("    const routes = matchRoutes(new URL(request.url).pathname)")
+    lines.append("    if (routes.length === 0) {")
+    lines.append("      return undefined")
+    lines.append("    }")
+    lines.append("    const groups = await Promise.all(routes.map(loadModule))")
+    lines.append("    return getResponse(groups.flat(), request)")
+    lines.append("  }),")
+    lines.append("]")
+    lines.append("")
+    return "\n".join(lines)
+
+
 def generate_browser_file(modules: Dict[str, List[Dict]]) -> str:
     """生成 browser.js MSW 启动入口"""
     lines = []
@@ -227,49 +401,117 @@ def generate_browser_file(modules: Dict[str, List[Dict]]) -> str:
     return "\n".join(lines)
 
 
-def main() -> int:
-    args = parse_args()
-    contract = json.loads(Path(args.contract).read_text(encoding="utf-8"))
+def is_generated_handler(path: Path) -> bool:
+    """判断 handler 文件是否由本脚本生成"""
+    try:
+        with open(path, encoding="utf-8", errors="ignore") as fh:
+            return fh.readline().strip() == GENERATED_MARKER
+    except OSError:
+        return False
+
+
+def is_generated_data(path: Path) -> bool:
+    """判断数据文件是否为本脚本生成的结构（每项包含 endpoint/example）"""
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return False
+    return isinstance(data, dict) and bool(data) and all(
+        isinstance(v, dict) and "endpoint" in v and "example" in v for v in data.values()
+    )
+
+
+def run(args: argparse.Namespace, contract: Optional[Dict] = None, modules_only: Optional[Set[str]] = None) -> int:
+    """contract 已在内存中时（run_workflow.py 进程内模式）不再读取 --contract 文件
+
+    modules_only 指定时（--watch 增量）只重新生成这些模块的 handler 与数据文件，其余模块沿用已有文件
+    """
+    if contract is None:
+        contract = json.loads(Path(args.contract).read_text(encoding="utf-8"))
     output_root = Path(args.output_root).resolve()
 
     endpoints = contract.get("endpoints", [])
     modules = group_by_module(endpoints)
 
-    # 创建目录
     handlers_dir = output_root / "mock" / "handlers"
     data_dir = output_root / "mock" / "data"
-    handlers_dir.mkdir(parents=True, exist_ok=True)
-    data_dir.mkdir(parents=True, exist_ok=True)
+    writer = ArtifactWriter()
+
+    recorded: Set[Tuple[str, str]] = set()
+    store: Optional[RecordingStore] = None
+    if args.recordings:
+        store = RecordingStore(recordings_root(output_root))
+        recorded = recorded_endpoints(store, endpoints)
+
+    def emit(path: Path, content: str) -> None:
+        with tracing.span("msw.write", file=path.name):
+            written = writer.write_text(path, content)
+        if written:
+            print(f"[generate-msw] 写入：{path}")
 
     # 生成各模块文件
+    manifest_files: Dict[Path, List[Dict]] = {}
+    kept: List[Path] = []
     for module, eps in modules.items():
         file_name = module_file_name(module)
-
-        # handler 文件
-        handler_code = generate_module_file(module, eps)
-        (handlers_dir / f"{file_name}.js").write_text(handler_code, encoding="utf-8")
-        print(f"[generate-msw] 写入：{handlers_dir / f'{file_name}.js'}")
-
-        # 数据文件
-        data = generate_data_file(module, eps)
-        (data_dir / f"{file_name}.json").write_text(
-            json.dumps(data, ensure_ascii=False, indent=2), encoding="utf-8"
-        )
-        print(f"[generate-msw] 写入：{data_dir / f'{file_name}.json'}")
+        handler_path = handlers_dir / f"{file_name}.js"
+        data_path = data_dir / f"{file_name}.json"
+        manifest_files[handler_path] = eps
+        if modules_only is not None and module not in modules_only and handler_path.is_file() and data_path.is_file():
+            kept += [handler_path, data_path]
+            continue
+
+        with tracing.span("msw.module", module=module, endpoints=len(eps)):
+            # handler 文件
+            code = generate_module_file(module, eps, args.seed, args.mock_total, args.profile, recorded)
+            # 数据文件
+            data = generate_data_file(module, eps, args.seed, args.mock_total)
+        emit(handler_path, code)
+        emit(data_path, json.dumps(data, ensure_ascii=False, indent=2))
+    writer.unchanged.extend(kept)
+
+    # 分页数据生成器运行时
+    emit(data_dir / "generator.js", generator_js())
+
+    # 延迟分布 / 错误率运行时
+    emit(output_root / "mock" / "runtime.js", runtime_js(args.seed))
+
+    # 录制回放运行时
+    if store is not None:
+        emit(store.root / "replay.js", replay_js(store))
+        print(f"[generate-msw] 回放：{len(store.entries)} 条录制，覆盖 {len(recorded)} 个接口")
 
     # index.js
-    index_code = generate_index_file(modules)
-    (handlers_dir / "index.js").write_text(index_code, encoding="utf-8")
-    print(f"[generate-msw] 写入：{handlers_dir / 'index.js'}")
+    index_code = generate_lazy_index_file(modules) if args.lazy else generate_index_file(modules)
+    emit(handlers_dir / "index.js", index_code)
 
     # browser.js
-    browser_code = generate_browser_file(modules)
-    (output_root / "mock" / "browser.js").write_text(browser_code, encoding="utf-8")
-    print(f"[generate-msw] 写入：{output_root / 'mock' / 'browser.js'}")
-
-    print(f"[generate-msw] 完成：{len(modules)} 个模块，{len(endpoints)} 个接口")
+    emit(output_root / "mock" / "browser.js", generate_browser_file(modules))
+
+    # 生成清单：供一致性校验按接口比对，无需解析 handler 源码
+    mock_dir = output_root / "mock"
+    emit(mock_dir / MANIFEST_NAME, manifest_json(build_manifest("generate_msw", mock_dir, manifest_files, writer.hashes)))
+
+    # 清理已删除模块遗留的文件
+    keep = list(writer.hashes) + kept
+    orphans = writer.prune(handlers_dir, "*.js", keep, is_generated_handler)
+    orphans += writer.prune(data_dir, "*.json", keep, is_generated_data)
+    for fp in orphans:
+        print(f"[generate-msw] 删除：{fp}")
+
+    print(f"[generate-msw] 文件：{writer.summary()}")
+    if modules_only is not None:
+        print(f"[generate-msw] 增量：重新生成 {len(modules) - len(kept) // 2} 个模块，沿用 {len(kept) // 2} 个")
+    mode = "（懒加载）" if args.lazy else ""
+    print(f"[generate-msw] 完成{mode}：{len(modules)} 个模块，{len(endpoints)} 个接口")
     return 0
 
 
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    with tracing.session(args.trace, "generate_msw"):
+        return run(args)
+
+
 if __name__ == "__main__":
     raise SystemExit(main())
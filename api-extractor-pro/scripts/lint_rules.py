@@ -0,0 +1,297 @@
+"""
+lint_rules.py — 契约质量规则注册表
+规则以 @rule 装饰器注册（内置规则见下方，团队规则可放在插件文件中通过 --lint-plugins 加载）；
+optional=True 的规则（内置的团队约定类规则）默认不启用，需通过 --lint-rules 显式开启；
+lint_endpoints() 单趟遍历接口依次应用全部规则，统计每条规则的耗时与违规数，
+结果按接口内容哈希缓存，未变化的接口不重复检查；接口较多时可多进程并行
+"""
+import importlib.util
+import json
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from artifacts import ArtifactWriter, sha256_bytes
+from build_contract import needs_auth_by_path
+from fingerprint import FINGERPRINT_FIELDS, canonical
+
+# 规则实现或缓存格式变化时递增，使已缓存的结果全部失效
+LINT_VERSION = 1
+
+# 参与缓存键的契约字段：接口指纹字段 + 命名相关字段
+LINTED_FIELDS = FINGERPRINT_FIELDS + ("endpoint", "module")
+
+# 影响规则结果的 meta 字段
+LINT_META_FIELDS = ("authMode",)
+
+WRITE_METHODS = {"POST", "PUT", "PATCH", "DELETE"}
+AUTH_HEADERS = {"authorization", "cookie"}
+
+RuleCheck = Callable[[Dict, Dict], Iterable[str]]
+
+
+@dataclass
+class LintRule:
+    """单条质量规则：check(ep, meta) 返回违规说明；optional 的规则默认不启用"""
+    id: str
+    description: str
+    check: RuleCheck
+    optional: bool = False
+
+
+RULES: Dict[str, LintRule] = {}
+
+
+def rule(rule_id: str, description: str, optional: bool = False) -> Callable[[RuleCheck], RuleCheck]:
+    """注册规则的装饰器；同 id 的规则后注册者覆盖先注册者"""
+    def decorator(fn: RuleCheck) -> RuleCheck:
+        RULES[rule_id] = LintRule(rule_id, description, fn, optional)
+        return fn
+    return decorator
+
+
+def select_rules(enabled: Iterable[str], skipped: Iterable[str]) -> List[str]:
+    """启用的规则：非 optional 的规则 + enabled 中的 optional 规则（"all" 表示全部），再去掉 skipped"""
+    enabled, skipped = set(enabled), set(skipped)
+    return [
+        r for r, spec in RULES.items()
+        if (not spec.optional or r in enabled or "all" in enabled) and r not in skipped
+    ]
+
+
+def load_plugins(paths: Sequence[str]) -> None:
+    """按文件路径导入规则插件，插件模块内使用 @rule 注册"""
+    for i, raw in enumerate(paths):
+        path = Path(raw).resolve()
+        spec = importlib.util.spec_from_file_location(f"lint_plugin_{i}_{path.stem}", path)
+        if spec is None or spec.loader is None:
+            raise ValueError(f"无法加载规则插件：{path}")
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+
+
+# =====================================================
+# 内置规则
+# =====================================================
+
+@rule("naming", "接口命名为 domain.action")
+def check_naming(ep: Dict, meta: Dict) -> Iterable[str]:
+    if "." not in ep.get("endpoint", "unknown"):
+        yield "接口命名应为 `domain.action` 格式"
+
+
+@rule("success-response", "声明 2xx 成功响应")
+def check_success_response(ep: Dict, meta: Dict) -> Iterable[str]:
+    if not any(str(r.get("status", "")).startswith("2") for r in ep.get("responses", [])):
+        yield "缺少 2xx 成功响应"
+
+
+@rule("error-response", "声明 4xx/5xx 错误响应")
+def check_error_response(ep: Dict, meta: Dict) -> Iterable[str]:
+    if not any(str(e.get("status", "")).startswith(("4", "5")) for e in ep.get("errors", [])):
+        yield "缺少 4xx/5xx 错误响应"
+
+
+@rule("path-casing", "路径段使用小写 kebab-case", optional=True)
+def check_path_casing(ep: Dict, meta: Dict) -> Iterable[str]:
+    for segment in str(ep.get("path", "/")).split("/"):
+        if segment and not segment.startswith("{") and not re.fullmatch(r"[a-z0-9][a-z0-9.-]*", segment):
+            yield f"路径段 `{segment}` 应为小写 kebab-case"
+
+
+@rule("path-params", "路径占位符与 pathParams 一一对应", optional=True)
+def check_path_params(ep: Dict, meta: Dict) -> Iterable[str]:
+    in_path = re.findall(r"\{(\w+)\}", str(ep.get("path", "")))
+    declared = [p.get("name") for p in ep.get("pathParams", []) or []]
+    for name in in_path:
+        if name not in declared:
+            yield f"路径参数 `{name}` 未在 pathParams 中声明"
+    for name in declared:
+        if name not in in_path:
+            yield f"pathParams 中的 `{name}` 不在路径中"
+
+
+@rule("auth-on-write", "写操作声明认证头（登录 / 注册等公开接口除外）", optional=True)
+def check_auth_on_write(ep: Dict, meta: Dict) -> Iterable[str]:
+    if str(meta.get("authMode", "bearer")).lower() not in ("bearer", "cookie"):
+        return
+    method = str(ep.get("method", "GET")).upper()
+    if method not in WRITE_METHODS or not needs_auth_by_path(str(ep.get("path", ""))):
+        return
+    if not any(str(h.get("name", "")).lower() in AUTH_HEADERS for h in ep.get("headers", []) or []):
+        yield f"{method} 写操作未声明认证头（Authorization / Cookie）"
+
+
+@rule("pagination-shape", "分页接口同时声明 page / pageSize，响应包含 list / total", optional=True)
+def check_pagination_shape(ep: Dict, meta: Dict) -> Iterable[str]:
+    query = {q.get("name"): q for q in ep.get("query", []) or []}
+    if "page" not in query and "pageSize" not in query:
+        return
+    for name in ("page", "pageSize"):
+        if name not in query:
+            yield f"分页参数缺少 `{name}`"
+        elif query[name].get("type", "integer") != "integer":
+            yield f"分页参数 `{name}` 应为 integer"
+    for r in ep.get("responses", []):
+        if not str(r.get("status", "")).startswith("2"):
+            continue
+        data = ((r.get("schema") or {}).get("properties") or {}).get("data") or {}
+        props = data.get("properties") or {}
+        missing = [k for k in ("list", "total") if k not in props]
+        if missing:
+            yield f"分页响应 data 缺少 {', '.join(f'`{k}`' for k in missing)}"
+        break
+
+
+@rule("get-without-body", "GET / DELETE 不声明请求体", optional=True)
+def check_get_without_body(ep: Dict, meta: Dict) -> Iterable[str]:
+    method = str(ep.get("method", "GET")).upper()
+    if method in ("GET", "DELETE") and ep.get("requestBody"):
+        yield f"{method} 接口不应声明请求体"
+
+
+@rule("unique-status", "响应 / 错误状态码不重复", optional=True)
+def check_unique_status(ep: Dict, meta: Dict) -> Iterable[str]:
+    statuses = [str(r.get("status")) for r in ep.get("responses", []) or []]
+    statuses += [str(e.get("status")) for e in ep.get("errors", []) or []]
+    for status in sorted({s for s in statuses if statuses.count(s) > 1}):
+        yield f"状态码 `{status}` 重复声明"
+
+
+# =====================================================
+# 执行与缓存
+# =====================================================
+
+def lint_key(ep: Dict) -> str:
+    fields = {k: ep.get(k) for k in LINTED_FIELDS}
+    return sha256_bytes(canonical(fields).encode("utf-8"))[:32]
+
+
+def ruleset_signature(rule_ids: Sequence[str], meta: Dict, plugins: Sequence[str] = ()) -> str:
+    """规则集签名：版本 + 启用的规则 + 相关 meta + 按加载顺序的插件文件内容哈希（插件代码修改后缓存自动失效）"""
+    payload = {
+        "version": LINT_VERSION,
+        "rules": list(rule_ids),
+        "meta": {k: meta.get(k) for k in LINT_META_FIELDS},
+        "plugins": [sha256_bytes(Path(p).read_bytes()) for p in plugins],
+    }
+    return sha256_bytes(canonical(payload).encode("utf-8"))[:16]
+
+
+@dataclass
+class RuleStats:
+    violations: int = 0
+    seconds: float = 0.0
+
+
+@dataclass
+class LintResult:
+    issues: List[str] = field(default_factory=list)
+    stats: Dict[str, RuleStats] = field(default_factory=dict)
+    cache_hits: int = 0
+    checked: int = 0
+
+
+class LintCache:
+    """接口级结果缓存：键为 lint_key，值为 规则 id → 违规说明"""
+
+    def __init__(self, signature: str, entries: Optional[Dict[str, Dict[str, List[str]]]] = None):
+        self.signature = signature
+        self.entries = entries or {}
+        self.used: Dict[str, Dict[str, List[str]]] = {}
+
+    @classmethod
+    def load(cls, path: Path, signature: str) -> "LintCache":
+        try:
+            data = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return cls(signature)
+        if data.get("signature") != signature:
+            return cls(signature)
+        return cls(signature, data.get("results", {}))
+
+    def save(self, path: Path) -> None:
+        """只保留本次出现的接口"""
+        data = {"signature": self.signature, "results": dict(sorted(self.used.items()))}
+        ArtifactWriter().write_text(path, json.dumps(data, ensure_ascii=False, separators=(",", ":")))
+
+
+def run_rules(
+    eps: List[Dict], meta: Dict, rule_ids: Sequence[str]
+) -> Tuple[List[Dict[str, List[str]]], Dict[str, float]]:
+    """对一组接口应用规则；返回 (每个接口的 规则 id → 违规说明, 每条规则累计耗时)"""
+    rules = [RULES[r] for r in rule_ids]
+    seconds = {r: 0.0 for r in rule_ids}
+    results: List[Dict[str, List[str]]] = []
+    for ep in eps:
+        found: Dict[str, List[str]] = {}
+        for r in rules:
+            start = time.perf_counter()
+            messages = list(r.check(ep, meta))
+            seconds[r.id] += time.perf_counter() - start
+            if messages:
+                found[r.id] = messages
+        results.append(found)
+    return results, seconds
+
+
+def _run_chunk(job: Tuple[List[Dict], Dict, List[str], List[str]]) -> Tuple[List[Dict[str, List[str]]], Dict[str, float]]:
+    """子进程入口：先加载插件，再执行规则"""
+    eps, meta, rule_ids, plugins = job
+    load_plugins([p for p in plugins if p])
+    return run_rules(eps, meta, rule_ids)
+
+
+def lint_endpoints(
+    endpoints: List[Dict],
+    meta: Optional[Dict] = None,
+    rule_ids: Optional[Sequence[str]] = None,
+    cache: Optional[LintCache] = None,
+    jobs: int = 1,
+    plugins: Sequence[str] = (),
+) -> LintResult:
+    """单趟检查全部接口；缓存命中的接口直接复用结果，其余按 jobs 串行或分块并行"""
+    meta = meta or {}
+    rule_ids = list(rule_ids if rule_ids is not None else select_rules((), ()))
+    result = LintResult(stats={r: RuleStats() for r in rule_ids})
+    keys = [lint_key(ep) for ep in endpoints]
+    found: List[Optional[Dict[str, List[str]]]] = [None] * len(endpoints)
+    pending: List[int] = []
+    for i, key in enumerate(keys):
+        cached = cache.entries.get(key) if cache is not None else None
+        if cached is None:
+            pending.append(i)
+        else:
+            found[i] = cached
+            result.cache_hits += 1
+
+    todo = [endpoints[i] for i in pending]
+    if jobs > 1 and len(todo) > jobs:
+        size = -(-len(todo) // jobs)
+        chunks = [(todo[i:i + size], meta, rule_ids, list(plugins)) for i in range(0, len(todo), size)]
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            outputs = list(pool.map(_run_chunk, chunks))
+    else:
+        outputs = [run_rules(todo, meta, rule_ids)]
+    computed: List[Dict[str, List[str]]] = []
+    for chunk_results, seconds in outputs:
+        computed.extend(chunk_results)
+        for r, s in seconds.items():
+            result.stats[r].seconds += s
+    for i, res in zip(pending, computed):
+        found[i] = res
+    result.checked = len(pending)
+
+    for ep, key, res in zip(endpoints, keys, found):
+        res = res or {}
+        if cache is not None:
+            cache.used[key] = res
+        name = ep.get("endpoint", "unknown")
+        for r in rule_ids:
+            for message in res.get(r, []):
+                result.stats[r].violations += 1
+                result.issues.append(f"`{name}`: {message}")
+    return result
@@ -0,0 +1,215 @@
+"""
+metrics.py — 工作流阶段指标
+记录每个阶段的耗时、CPU 时间、峰值内存、输入 / 输出大小与接口数，
+输出 reports/workflow-metrics.json 与 Markdown 摘要，并可追加到本地历史文件（JSON Lines）以跟踪性能回退
+"""
+import json
+import os
+import subprocess
+import sys
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from artifacts import ArtifactWriter
+
+try:
+    import resource
+except ImportError:  # Windows 无 resource / os.wait4：只记录耗时
+    resource = None  # type: ignore[assignment]
+
+METRICS_VERSION = 1
+
+# ru_maxrss 的单位：macOS 为字节，Linux 等为 KB
+_MAXRSS_PER_KB = 1024 if sys.platform == "darwin" else 1
+
+
+def maxrss_kb(maxrss: int) -> int:
+    """把 ru_maxrss 换算为 KB"""
+    return maxrss // _MAXRSS_PER_KB
+
+
+def path_size(path: Path) -> int:
+    """文件大小；目录为其下全部文件大小之和；不存在为 0"""
+    path = Path(path)
+    if path.is_file():
+        return path.stat().st_size
+    if path.is_dir():
+        return sum(p.stat().st_size for p in path.rglob("*") if p.is_file())
+    return 0
+
+
+def total_size(paths: Iterable[Path]) -> int:
+    return sum(path_size(p) for p in paths)
+
+
+def spawn(
+    cmd: List[str], capture: bool = False, env: Optional[Dict[str, str]] = None
+) -> Tuple[int, str, Dict[str, float]]:
+    """运行子进程并通过 os.wait4 取得其资源占用；返回 (退出码, 捕获的输出, 资源占用)
+
+    不支持 os.wait4 的平台资源占用为空，只记录耗时
+    """
+    proc = subprocess.Popen(
+        cmd,
+        env=env,
+        stdout=subprocess.PIPE if capture else None,
+        stderr=subprocess.STDOUT if capture else None,
+        text=True,
+    )
+    output = proc.stdout.read() if capture and proc.stdout else ""
+    stats: Dict[str, float] = {}
+    if hasattr(os, "wait4"):
+        _, status, usage = os.wait4(proc.pid, 0)
+        proc.returncode = os.waitstatus_to_exitcode(status)
+        stats = {"cpu": usage.ru_utime + usage.ru_stime, "peak_rss_kb": maxrss_kb(usage.ru_maxrss)}
+    else:
+        proc.wait()
+    if proc.stdout:
+        proc.stdout.close()
+    return proc.returncode, output, stats
+
+
+@contextmanager
+def measure_in_process(usage: Dict[str, float]) -> Iterator[None]:
+    """进程内阶段的资源占用：CPU 为本进程及其子进程的增量；峰值内存为进程至今的最高水位"""
+    if resource is None:
+        yield
+        return
+    self_before = resource.getrusage(resource.RUSAGE_SELF)
+    child_before = resource.getrusage(resource.RUSAGE_CHILDREN)
+    try:
+        yield
+    finally:
+        self_after = resource.getrusage(resource.RUSAGE_SELF)
+        child_after = resource.getrusage(resource.RUSAGE_CHILDREN)
+        usage["cpu"] = (
+            self_after.ru_utime + self_after.ru_stime - self_before.ru_utime - self_before.ru_stime
+            + child_after.ru_utime + child_after.ru_stime - child_before.ru_utime - child_before.ru_stime
+        )
+        usage["peak_rss_kb"] = maxrss_kb(max(self_after.ru_maxrss, child_after.ru_maxrss))
+
+
+@contextmanager
+def stopwatch(usage: Dict[str, float]) -> Iterator[None]:
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        usage["wall"] = time.perf_counter() - start
+
+
+def stage_record(
+    name: str, label: str, status: str, usage: Optional[Dict[str, float]],
+    inputs: Iterable[Path], outputs: Iterable[Path], endpoints: Optional[int],
+) -> Dict[str, Any]:
+    usage = usage or {}
+    return {
+        "name": name,
+        "label": label,
+        "status": status,
+        "wall_s": round(usage.get("wall", 0.0), 3),
+        "cpu_s": round(usage.get("cpu", 0.0), 3),
+        "peak_rss_kb": int(usage.get("peak_rss_kb", 0)),
+        "input_bytes": total_size(inputs),
+        "output_bytes": total_size(outputs),
+        "endpoints": endpoints,
+    }
+
+
+def build_metrics(mode: str, project: str, wall: float, stages: List[Dict[str, Any]]) -> Dict[str, Any]:
+    return {
+        "version": METRICS_VERSION,
+        "generatedAt": datetime.now(timezone.utc).isoformat(),
+        "mode": mode,
+        "project": project,
+        "wall_s": round(wall, 3),
+        "stages": stages,
+    }
+
+
+def _fmt_bytes(n: int) -> str:
+    for unit in ("B", "KB", "MB"):
+        if n < 1024:
+            return f"{n:.0f} {unit}" if unit == "B" else f"{n:.1f} {unit}"
+        n /= 1024
+    return f"{n:.1f} GB"
+
+
+def _fmt_delta(current: float, previous: Optional[float]) -> str:
+    if previous is None or previous <= 0:
+        return "—"
+    pct = (current - previous) * 100 / previous
+    return f"{pct:+.0f}%"
+
+
+def metrics_markdown(metrics: Dict[str, Any], previous: Optional[Dict[str, Any]] = None) -> str:
+    """Markdown 摘要；previous 为历史中的上一次运行，用于计算耗时变化"""
+    prev_stages = {s["name"]: s for s in (previous or {}).get("stages", [])}
+    labels = {"ran": "运行", "skipped": "跳过", "failed": "失败", "blocked": "未执行"}
+    lines = [
+        "# 工作流性能指标",
+        "",
+        f"- 生成时间：`{metrics['generatedAt']}`",
+        f"- 执行模式：`{metrics['mode']}`",
+        f"- 总耗时：`{metrics['wall_s']:.2f}s`（上次 {_fmt_delta(metrics['wall_s'], (previous or {}).get('wall_s'))}）",
+        "",
+        "| 阶段 | 状态 | 耗时 (s) | 较上次 | CPU (s) | 峰值内存 | 输入 | 输出 | 接口数 |",
+        "|------|------|----------|--------|---------|----------|------|------|--------|",
+    ]
+    for s in metrics["stages"]:
+        prev = prev_stages.get(s["name"])
+        delta = _fmt_delta(s["wall_s"], prev["wall_s"]) if prev and prev["status"] == "ran" and s["status"] == "ran" else "—"
+        rss = f"{s['peak_rss_kb'] / 1024:.1f} MB" if s["peak_rss_kb"] else "—"
+        endpoints = "—" if s["endpoints"] is None else s["endpoints"]
+        lines.append(
+            f"| {s['label']} | {labels.get(s['status'], s['status'])} | {s['wall_s']:.2f} | {delta} | {s['cpu_s']:.2f} "
+            f"| {rss} | {_fmt_bytes(s['input_bytes'])} | {_fmt_bytes(s['output_bytes'])} | {endpoints} |"
+        )
+    lines.append("")
+    if metrics["mode"] == "in-process":
+        lines.append("> 进程内模式下峰值内存为工作流进程至该阶段结束时的最高水位。")
+        lines.append("")
+    return "\n".join(lines)
+
+
+def last_history_entry(path: Path) -> Optional[Dict[str, Any]]:
+    """历史文件的最后一条记录"""
+    try:
+        with open(path, "rb") as fh:
+            fh.seek(0, os.SEEK_END)
+            size = fh.tell()
+            fh.seek(max(0, size - (1 << 16)))
+            lines = fh.read().splitlines()
+    except OSError:
+        return None
+    for line in reversed(lines):
+        try:
+            return json.loads(line)
+        except ValueError:
+            continue
+    return None
+
+
+def append_history(path: Path, metrics: Dict[str, Any]) -> None:
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "a", encoding="utf-8") as fh:
+        fh.write(json.dumps(metrics, ensure_ascii=False, separators=(",", ":")) + "\n")
+
+
+def write_metrics(
+    reports_dir: Path, metrics: Dict[str, Any], history: Optional[Path] = None
+) -> Tuple[Path, Path]:
+    """写出 JSON 与 Markdown；指定 history 时先读取上一条记录用于对比，再追加本次记录"""
+    previous = last_history_entry(history) if history else None
+    json_path = Path(reports_dir) / "workflow-metrics.json"
+    md_path = Path(reports_dir) / "workflow-metrics.md"
+    writer = ArtifactWriter()
+    writer.write_text(json_path, json.dumps(metrics, ensure_ascii=False, indent=2) + "\n")
+    writer.write_text(md_path, metrics_markdown(metrics, previous))
+    if history:
+        append_history(history, metrics)
+    return json_path, md_path
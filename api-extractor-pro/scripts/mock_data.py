@@ -0,0 +1,333 @@
+"""
+mock_data.py — 基于契约 schema 的确定性分页数据生成器
+同一 (seed, 行号) 始终生成同一行数据，只按需合成请求页，不物化整个列表；
+generate_msw.py 输出同算法的 JS 运行时（GENERATOR_JS），两端结果逐字节一致
+"""
+import json
+import re
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional
+
+DEFAULT_SEED = 20240101
+DEFAULT_TOTAL = 100
+MAX_PAGE_SIZE = 1000
+BASE_TIME_MS = 1704067200000  # 2024-01-01T00:00:00Z
+
+MASK32 = 0xFFFFFFFF
+
+SURNAMES = ["张", "王", "李", "赵", "刘", "陈", "杨", "黄", "周", "吴", "徐", "孙"]
+GIVEN_NAMES = ["伟", "芳", "娜", "敏", "静", "磊", "洋", "艳", "勇", "杰", "娟", "涛", "明", "超", "霞", "婷"]
+TITLE_PREFIXES = ["年度", "季度", "新品", "精选", "热门", "限时", "推荐", "标准"]
+TITLE_NOUNS = ["方案", "订单", "活动", "商品", "报告", "服务", "套餐", "项目"]
+TEXTS = ["已完成审核", "等待处理", "客户反馈良好", "需要补充材料", "已同步至仓库", "按计划推进中"]
+STATUSES = ["active", "pending", "disabled"]
+
+# 默认列表项结构（契约未声明 items 时使用）
+DEFAULT_ITEM_SCHEMA: Dict[str, Any] = {
+    "type": "object",
+    "properties": {
+        "id": {"type": "integer"},
+        "name": {"type": "string"},
+        "status": {"type": "string", "enum": STATUSES},
+        "createdAt": {"type": "string", "format": "date-time"},
+    },
+}
+
+
+# =====================================================
+# 随机数（与 JS 端 mulberry32 一致）
+# =====================================================
+
+def mulberry32(seed: int) -> Callable[[], float]:
+    """32 位 mulberry32 伪随机数生成器，返回 [0, 1) 浮点数"""
+    state = seed & MASK32
+
+    def rng() -> float:
+        nonlocal state
+        state = (state + 0x6D2B79F5) & MASK32
+        t = ((state ^ (state >> 15)) * (state | 1)) & MASK32
+        t = ((t + (((t ^ (t >> 7)) * (t | 61)) & MASK32)) & MASK32) ^ t
+        return ((t ^ (t >> 14)) & MASK32) / 4294967296
+
+    return rng
+
+
+def hash_string(s: str) -> int:
+    """FNV-1a 32 位字符串哈希，用于从接口名派生种子"""
+    h = 0x811C9DC5
+    for b in s.encode("utf-8"):
+        h = ((h ^ b) * 0x01000193) & MASK32
+    return h
+
+
+def row_seed(seed: int, index: int) -> int:
+    """行种子：每行独立，可随机访问任意行"""
+    return (seed ^ (((index + 1) * 0x9E3779B1) & MASK32)) & MASK32
+
+
+# =====================================================
+# 字段规划：从 schema 推断每个字段的生成方式
+# =====================================================
+
+def field_kind(name: str, schema: Dict) -> Dict[str, Any]:
+    """根据字段名、类型和格式决定生成方式"""
+    lname = name.lower()
+    ftype = schema.get("type", "string")
+    fmt = schema.get("format", "")
+
+    if schema.get("enum"):
+        return {"name": name, "kind": "enum", "values": list(schema["enum"])}
+    if lname == "id":
+        return {"name": name, "kind": "id" if ftype == "integer" else "sid"}
+    if ftype == "boolean":
+        return {"name": name, "kind": "bool"}
+    if ftype == "integer":
+        return {"name": name, "kind": "int"}
+    if ftype == "number":
+        return {"name": name, "kind": "number"}
+    if fmt == "date-time" or lname.endswith(("at", "time")):
+        return {"name": name, "kind": "datetime"}
+    if fmt == "date" or lname.endswith("date"):
+        return {"name": name, "kind": "date"}
+    if fmt == "uuid" or lname.endswith("uuid"):
+        return {"name": name, "kind": "uuid"}
+    if fmt == "email" or "email" in lname:
+        return {"name": name, "kind": "email"}
+    if "phone" in lname or "mobile" in lname:
+        return {"name": name, "kind": "phone"}
+    if fmt == "uri" or lname.endswith(("url", "avatar", "image", "cover")):
+        return {"name": name, "kind": "url"}
+    if lname == "status" or lname.endswith("status"):
+        return {"name": name, "kind": "enum", "values": STATUSES}
+    if "name" in lname:
+        return {"name": name, "kind": "person"}
+    if "title" in lname:
+        return {"name": name, "kind": "title"}
+    return {"name": name, "kind": "text"}
+
+
+def infer_schema_from_value(value: Any) -> Dict:
+    """从示例值反推字段 schema"""
+    if isinstance(value, bool):
+        return {"type": "boolean"}
+    if isinstance(value, int):
+        return {"type": "integer"}
+    if isinstance(value, float):
+        return {"type": "number"}
+    if isinstance(value, str) and re.match(r"^\d{4}-\d{2}-\d{2}T", value):
+        return {"type": "string", "format": "date-time"}
+    return {"type": "string"}
+
+
+def list_item_schema(ep: Dict) -> Optional[Dict]:
+    """从成功响应中解析列表项 schema：优先 schema 声明，其次示例数据"""
+    for r in ep.get("responses", []):
+        if not str(r.get("status", "")).startswith("2"):
+            continue
+        data_schema = r.get("schema", {}).get("properties", {}).get("data", {})
+        items = data_schema.get("properties", {}).get("list", {}).get("items")
+        if isinstance(items, dict) and items.get("properties"):
+            return items
+
+        data = (r.get("example") or {}).get("data")
+        if isinstance(data, dict) and isinstance(data.get("list"), list):
+            rows = data["list"]
+            if rows and isinstance(rows[0], dict):
+                return {
+                    "type": "object",
+                    "properties": {k: infer_schema_from_value(v) for k, v in rows[0].items()},
+                }
+            return DEFAULT_ITEM_SCHEMA
+    return None
+
+
+def build_generator_spec(ep: Dict, seed: int = DEFAULT_SEED, total: int = DEFAULT_TOTAL) -> Optional[Dict]:
+    """构建接口的数据生成描述；非列表接口返回 None
+
+    契约中的 `mockData.seed` / `mockData.total` 可覆盖全局默认值
+    """
+    item_schema = list_item_schema(ep)
+    if item_schema is None:
+        return None
+    overrides = ep.get("mockData") or {}
+    endpoint_seed = overrides.get("seed")
+    if endpoint_seed is None:
+        endpoint_seed = (seed ^ hash_string(ep.get("endpoint", ""))) & MASK32
+    return {
+        "seed": int(endpoint_seed) & MASK32,
+        "total": max(0, int(overrides.get("total", total))),
+        "fields": [field_kind(name, s) for name, s in item_schema.get("properties", {}).items()],
+    }
+
+
+# =====================================================
+# 数据生成（Python 端实现，与 GENERATOR_JS 保持一致）
+# =====================================================
+
+def iso_time(ms: int, date_only: bool = False) -> str:
+    """毫秒时间戳转 ISO 8601（与 JS Date#toISOString 格式一致）"""
+    text = datetime.fromtimestamp(ms / 1000, tz=timezone.utc).isoformat(timespec="milliseconds")
+    text = text.replace("+00:00", "Z")
+    return text[:10] if date_only else text
+
+
+def pick(rng: Callable[[], float], values: List[Any]) -> Any:
+    return values[int(rng() * len(values))]
+
+
+def generate_value(field: Dict, index: int, rng: Callable[[], float]) -> Any:
+    """生成单个字段值（调用 rng 的次数与 JS 端一致）"""
+    kind = field["kind"]
+    if kind == "id":
+        return index + 1
+    if kind == "sid":
+        return str(index + 1)
+    if kind == "int":
+        return int(rng() * 1000)
+    if kind == "number":
+        return int(rng() * 1000000) / 100
+    if kind == "bool":
+        return rng() < 0.5
+    if kind == "enum":
+        return pick(rng, field["values"])
+    if kind in ("datetime", "date"):
+        ms = BASE_TIME_MS - index * 60000 - int(rng() * 60000)
+        return iso_time(ms, date_only=kind == "date")
+    if kind == "uuid":
+        hexs = "".join("%08x" % int(rng() * 4294967296) for _ in range(4))
+        return f"{hexs[0:8]}-{hexs[8:12]}-4{hexs[13:16]}-a{hexs[17:20]}-{hexs[20:32]}"
+    if kind == "email":
+        return f"user{index + 1}@example.com"
+    if kind == "phone":
+        return "13" + str(int(rng() * 1000000000)).zfill(9)
+    if kind == "url":
+        return f"https://cdn.example.com/assets/{index + 1}.png"
+    if kind == "person":
+        return pick(rng, SURNAMES) + pick(rng, GIVEN_NAMES) + pick(rng, GIVEN_NAMES)
+    if kind == "title":
+        return f"{pick(rng, TITLE_PREFIXES)}{pick(rng, TITLE_NOUNS)} #{index + 1}"
+    return pick(rng, TEXTS)
+
+
+def generate_row(spec: Dict, index: int) -> Dict:
+    """生成第 index 行（从 0 开始）"""
+    rng = mulberry32(row_seed(spec["seed"], index))
+    return {f["name"]: generate_value(f, index, rng) for f in spec["fields"]}
+
+
+def generate_page(spec: Dict, page: int, page_size: int) -> Dict:
+    """只合成请求页的数据切片"""
+    size = max(1, min(page_size or 10, MAX_PAGE_SIZE))
+    current = max(1, page or 1)
+    start = (current - 1) * size
+    end = min(start + size, spec["total"])
+    return {
+        "list": [generate_row(spec, i) for i in range(start, end)],
+        "total": spec["total"],
+        "page": current,
+        "pageSize": size,
+    }
+
+
+# =====================================================
+# JS 运行时（写入 mock/data/generator.js）
+# =====================================================
+
+GENERATOR_JS = """// @generated by api-extractor-pro generate_msw.py
+// 确定性分页数据生成器：按 (seed, 行号) 合成数据，只生成请求页，不物化整个列表
+
+const MAX_PAGE_SIZE = %(max_page_size)d
+const BASE_TIME_MS = %(base_time_ms)d
+
+const SURNAMES = %(surnames)s
+const GIVEN_NAMES = %(given_names)s
+const TITLE_PREFIXES = %(title_prefixes)s
+const TITLE_NOUNS = %(title_nouns)s
+const TEXTS = %(texts)s
+
+export function mulberry32(seed) {
+  let a = seed >>> 0
+  return function () {
+    a = (a + 0x6D2B79F5) >>> 0
+    let t = Math.imul(a ^ (a >>> 15), a | 1) >>> 0
+    t = ((t + (Math.imul(t ^ (t >>> 7), t | 61) >>> 0)) >>> 0) ^ t
+    return ((t ^ (t >>> 14)) >>> 0) / 4294967296
+  }
+}
+
+function rowSeed(seed, index) {
+  return (seed ^ Math.imul(index + 1, 0x9E3779B1)) >>> 0
+}
+
+function pick(rng, values) {
+  return values[Math.floor(rng() * values.length)]
+}
+
+function hex8(rng) {
+  return Math.floor(rng() * 4294967296).toString(16).padStart(8, '0')
+}
+
+function generateValue(field, index, rng) {
+  switch (field.kind) {
+    case 'id': return index + 1
+    case 'sid': return String(index + 1)
+    case 'int': return Math.floor(rng() * 1000)
+    case 'number': return Math.floor(rng() * 1000000) / 100
+    case 'bool': return rng() < 0.5
+    case 'enum': return pick(rng, field.values)
+    case 'datetime':
+    case 'date': {
+      const iso = new Date(BASE_TIME_MS - index * 60000 - Math.floor(rng() * 60000)).toISOString()
+      return field.kind === 'date' ? iso.slice(0, 10) : iso
+    }
+    case 'uuid': {
+      const h = hex8(rng) + hex8(rng) + hex8(rng) + hex8(rng)
+      return `${h.slice(0, 8)}-${h.slice(8, 12)}-4${h.slice(13, 16)}-a${h.slice(17, 20)}-${h.slice(20, 32)}`
+    }
+    case 'email': return `user${index + 1}@example.com`
+    case 'phone': return '13' + String(Math.floor(rng() * 1000000000)).padStart(9, '0')
+    case 'url': return `https://cdn.example.com/assets/${index + 1}.png`
+    case 'person': return pick(rng, SURNAMES) + pick(rng, GIVEN_NAMES) + pick(rng, GIVEN_NAMES)
+    case 'title': return `${pick(rng, TITLE_PREFIXES)}${pick(rng, TITLE_NOUNS)} #${index + 1}`
+    default: return pick(rng, TEXTS)
+  }
+}
+
+export function generateRow(spec, index) {
+  const rng = mulberry32(rowSeed(spec.seed, index))
+  const row = {}
+  for (const field of spec.fields) {
+    row[field.name] = generateValue(field, index, rng)
+  }
+  return row
+}
+
+export function generatePage(spec, page, pageSize) {
+  const size = Math.max(1, Math.min(pageSize || 10, MAX_PAGE_SIZE))
+  const current = Math.max(1, page || 1)
+  const start = (current - 1) * size
+  const end = Math.min(start + size, spec.total)
+  const list = []
+  for (let i = start; i < end; i++) {
+    list.push(generateRow(spec, i))
+  }
+  return { list, total: spec.total, page: current, pageSize: size }
+}
+"""
+
+
+def generator_js() -> str:
+    """渲染 JS 运行时源码（词库与 Python 端共用）"""
+
+    def arr(values: List[str]) -> str:
+        return json.dumps(values, ensure_ascii=False)
+
+    return GENERATOR_JS % {
+        "max_page_size": MAX_PAGE_SIZE,
+        "base_time_ms": BASE_TIME_MS,
+        "surnames": arr(SURNAMES),
+        "given_names": arr(GIVEN_NAMES),
+        "title_prefixes": arr(TITLE_PREFIXES),
+        "title_nouns": arr(TITLE_NOUNS),
+        "texts": arr(TEXTS),
+    }
@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+mock_loadtest.py — mock_server.py 本地压测脚本（仅依赖标准库）
+按契约构造请求目标，多连接 keep-alive（可选 pipelining）压测，输出 RPS、延迟分位与状态码分布
+"""
+import argparse
+import asyncio
+import json
+import re
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import quote
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="压测 mock_server.py")
+    parser.add_argument("--contract", required=True, help="contract.json 路径（用于构造请求目标）")
+    parser.add_argument("--host", default="127.0.0.1", help="服务地址")
+    parser.add_argument("--port", type=int, default=3000, help="服务端口")
+    parser.add_argument("--connections", type=int, default=32, help="并发连接数")
+    parser.add_argument("--pipeline", type=int, default=1, help="每个连接的 pipelining 深度")
+    parser.add_argument("--duration", type=float, default=10.0, help="压测时长（秒）")
+    parser.add_argument("--methods", default="GET", help="参与压测的 HTTP Method（逗号分隔，默认只压 GET）")
+    parser.add_argument("--spawn", action="store_true", help="自动启动 mock_server.py（--no-delay）并在结束后关闭")
+    parser.add_argument("--output", default="", help="结果 JSON 输出路径")
+    return parser.parse_args()
+
+
+def build_targets(contract: Dict, methods: List[str]) -> List[Tuple[str, bytes]]:
+    """为每个接口构造一条预编码请求（路径参数填 1，鉴权接口带 Bearer Token）"""
+    targets: List[Tuple[str, bytes]] = []
+    for ep in contract.get("endpoints", []):
+        method = str(ep.get("method", "GET")).upper()
+        if method not in methods:
+            continue
+        path = re.sub(r"\{[^{}]+\}", "1", ep.get("path", "/"))
+        if path.startswith(("http://", "https://")):
+            path = "/" + path.split("/", 3)[-1]
+        if any(q.get("name") == "page" for q in ep.get("query", [])):
+            path += "?page=2&pageSize=20"
+        headers = ["Host: mock", "Connection: keep-alive"]
+        if any(h.get("name") == "Authorization" for h in ep.get("headers", [])):
+            headers.append("Authorization: Bearer loadtest")
+        body = b""
+        if method in ("POST", "PUT", "PATCH"):
+            body = b"{}"
+            headers.append("Content-Type: application/json")
+        headers.append(f"Content-Length: {len(body)}")
+        # 请求行只含 ASCII：路径中的中文等字符按 UTF-8 百分号编码
+        target = quote(path, safe="/{}?&=")
+        raw = f"{method} {target} HTTP/1.1\r\n" + "\r\n".join(headers) + "\r\n\r\n"
+        targets.append((f"{method} {path}", raw.encode("ascii") + body))
+    return targets
+
+
+async def read_response(reader: asyncio.StreamReader) -> int:
+    """读取一个完整响应，返回状态码"""
+    head = await reader.readuntil(b"\r\n\r\n")
+    status = int(head[9:12])
+    m = re.search(rb"(?i)content-length:\s*(\d+)", head)
+    length = int(m.group(1)) if m else 0
+    if length:
+        await reader.readexactly(length)
+    return status
+
+
+async def worker(
+    host: str,
+    port: int,
+    targets: List[Tuple[str, bytes]],
+    offset: int,
+    pipeline: int,
+    deadline: float,
+    latencies: List[float],
+    statuses: Dict[int, int],
+) -> int:
+    """单连接压测循环；服务端模拟超时断开连接时计为一次断连并重连"""
+    i = offset
+    disconnects = 0
+    while time.perf_counter() < deadline:
+        reader, writer = await asyncio.open_connection(host, port)
+        try:
+            while time.perf_counter() < deadline:
+                batch = [targets[(i + k) % len(targets)][1] for k in range(pipeline)]
+                i += pipeline
+                start = time.perf_counter()
+                writer.write(b"".join(batch))
+                for _ in batch:
+                    status = await read_response(reader)
+                    statuses[status] = statuses.get(status, 0) + 1
+                latencies.append((time.perf_counter() - start) * 1000 / len(batch))
+        except (ConnectionError, asyncio.IncompleteReadError):
+            disconnects += 1
+        finally:
+            writer.close()
+    return disconnects
+
+
+def percentile(values: List[float], q: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+async def run(args: argparse.Namespace, targets: List[Tuple[str, bytes]]) -> Dict:
+    latencies: List[float] = []
+    statuses: Dict[int, int] = {}
+    start = time.perf_counter()
+    deadline = start + args.duration
+    disconnects = await asyncio.gather(*[
+        worker(args.host, args.port, targets, n, args.pipeline, deadline, latencies, statuses)
+        for n in range(args.connections)
+    ])
+    elapsed = time.perf_counter() - start
+    total = sum(statuses.values())
+    return {
+        "connections": args.connections,
+        "pipeline": args.pipeline,
+        "duration": round(elapsed, 3),
+        "targets": len(targets),
+        "requests": total,
+        "rps": round(total / elapsed, 1) if elapsed else 0,
+        "latencyMs": {
+            "p50": round(percentile(latencies, 0.50), 3),
+            "p95": round(percentile(latencies, 0.95), 3),
+            "p99": round(percentile(latencies, 0.99), 3),
+        },
+        "statuses": {str(k): v for k, v in sorted(statuses.items())},
+        "disconnects": sum(disconnects),
+    }
+
+
+async def wait_for_port(host: str, port: int, timeout: float = 10.0) -> None:
+    deadline = time.perf_counter() + timeout
+    while True:
+        try:
+            _, writer = await asyncio.open_connection(host, port)
+            writer.close()
+            return
+        except OSError:
+            if time.perf_counter() > deadline:
+                raise
+            await asyncio.sleep(0.05)
+
+
+def main() -> int:
+    args = parse_args()
+    contract = json.loads(Path(args.contract).read_text(encoding="utf-8"))
+    methods = [m.strip().upper() for m in args.methods.split(",") if m.strip()]
+    targets = build_targets(contract, methods)
+    if not targets:
+        print(f"[loadtest] 契约中没有 {','.join(methods)} 接口可压测")
+        return 1
+
+    server: Optional[subprocess.Popen] = None
+    if args.spawn:
+        server = subprocess.Popen([
+            sys.executable, str(Path(__file__).resolve().parent / "mock_server.py"),
+            "--contract", args.contract, "--host", args.host, "--port", str(args.port), "--no-delay",
+        ], stdout=subprocess.DEVNULL)
+
+    try:
+        asyncio.run(wait_for_port(args.host, args.port))
+        print(f"[loadtest] 目标：{len(targets)} 个接口，{args.connections} 连接 × pipelining {args.pipeline}，{args.duration}s")
+        result = asyncio.run(run(args, targets))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+    print(f"[loadtest] 请求数：{result['requests']}，RPS：{result['rps']}")
+    lat = result["latencyMs"]
+    print(f"[loadtest] 延迟（ms）：p50 {lat['p50']} / p95 {lat['p95']} / p99 {lat['p99']}")
+    print(f"[loadtest] 状态码：{result['statuses']}，断连（模拟超时）：{result['disconnects']}")
+    if args.output:
+        Path(args.output).write_text(json.dumps(result, ensure_ascii=False, indent=2), encoding="utf-8")
+        print(f"[loadtest] 输出：{args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,169 @@
+"""
+mock_profiles.py — Mock 网络画像：延迟分布（p50/p95/p99 + 抖动 + 超时）与错误率
+generate_msw.py 将画像编译进 handler，运行时（RUNTIME_JS）使用可设种子的随机数采样
+"""
+import json
+from typing import Any, Callable, Dict, Optional, Tuple
+
+# 全局预设（毫秒）
+PRESETS: Dict[str, Dict[str, Any]] = {
+    "fast-lan": {
+        "latency": {"p50": 5, "p95": 15, "p99": 30, "jitter": 2, "timeout": 10000},
+        "errorRate": 0,
+        "timeoutRate": 0,
+    },
+    "3g": {
+        "latency": {"p50": 400, "p95": 1200, "p99": 2500, "jitter": 100, "timeout": 15000},
+        "errorRate": 0.01,
+        "timeoutRate": 0.005,
+    },
+    "degraded": {
+        "latency": {"p50": 800, "p95": 3000, "p99": 8000, "jitter": 300, "timeout": 5000},
+        "errorRate": 0.1,
+        "timeoutRate": 0.03,
+    },
+}
+
+
+def resolve_profile(ep: Dict, default: Optional[str] = None) -> Optional[Dict]:
+    """解析接口的网络画像
+
+    契约 `mockProfile` 可为预设名，或 `{"preset": "3g", "latency": {...}, "errorRate": 0.2}` 形式的覆盖；
+    未声明时使用全局预设 default，均无则返回 None（保持原有固定延迟行为）
+    """
+    raw = ep.get("mockProfile", default)
+    if raw is None:
+        return None
+    if isinstance(raw, str):
+        raw = {"preset": raw}
+    if not isinstance(raw, dict):
+        raise ValueError(f"{ep.get('endpoint', 'unknown')}: mockProfile 必须是预设名或对象")
+
+    preset_name = raw.get("preset", default)
+    if preset_name is not None and preset_name not in PRESETS:
+        raise ValueError(f"未知网络画像预设：{preset_name}（可选：{', '.join(PRESETS)}）")
+    base = PRESETS[preset_name] if preset_name else {"latency": {}, "errorRate": 0, "timeoutRate": 0}
+
+    latency = dict(base["latency"])
+    latency.update(raw.get("latency", {}))
+    p50 = _num(latency.get("p50", 0))
+    p95 = max(p50, _num(latency.get("p95", p50)))
+    p99 = max(p95, _num(latency.get("p99", p95)))
+    profile: Dict[str, Any] = {
+        "name": preset_name or "custom",
+        "latency": {
+            "p50": p50,
+            "p95": p95,
+            "p99": p99,
+            "jitter": _num(latency.get("jitter", 0)),
+            "timeout": _num(latency.get("timeout", 0)),
+        },
+        "errorRate": _num(raw.get("errorRate", base["errorRate"])),
+        "timeoutRate": _num(raw.get("timeoutRate", base["timeoutRate"])),
+    }
+    return profile
+
+
+def _num(v: Any) -> Any:
+    """整数值保持为 int，避免输出 800.0 这类字面量"""
+    f = float(v)
+    return int(f) if f.is_integer() else f
+
+
+def chance(rng: Callable[[], float], rate: float) -> bool:
+    """按概率返回 True（rate 为 0 时不消耗随机数，与 JS 端一致）"""
+    return rate > 0 and rng() < rate
+
+
+def sample_latency(profile: Dict, rng: Callable[[], float]) -> int:
+    """按分位点分段线性插值采样延迟（毫秒）"""
+    lat = profile.get("latency", {})
+    p50 = lat.get("p50", 0)
+    p95 = lat.get("p95", p50)
+    p99 = lat.get("p99", p95)
+    u = rng()
+    if u < 0.5:
+        ms = p50 * (0.5 + u)
+    elif u < 0.95:
+        ms = p50 + (p95 - p50) * (u - 0.5) / 0.45
+    elif u < 0.99:
+        ms = p95 + (p99 - p95) * (u - 0.95) / 0.04
+    else:
+        ms = p99 + p99 * 0.5 * (u - 0.99) / 0.01
+    ms += (rng() * 2 - 1) * lat.get("jitter", 0)
+    return max(0, int(ms + 0.5))
+
+
+def simulate_network(profile: Dict, rng: Callable[[], float]) -> Tuple[int, bool]:
+    """返回 (等待毫秒数, 是否超时)"""
+    timeout = profile.get("latency", {}).get("timeout", 0)
+    ms = sample_latency(profile, rng)
+    timed_out = chance(rng, profile.get("timeoutRate", 0)) or (timeout > 0 and ms >= timeout)
+    if timed_out and timeout > 0:
+        ms = int(timeout)
+    return ms, timed_out
+
+
+# =====================================================
+# JS 运行时（写入 mock/runtime.js）
+# =====================================================
+
+RUNTIME_JS = """// @generated by api-extractor-pro generate_msw.py
+// Mock 运行时：可设种子的随机数、延迟分布采样、错误率注入
+import { delay } from 'msw'
+import { mulberry32 } from './data/generator'
+
+const DEFAULT_SEED = %(seed)d
+
+let rng = mulberry32(globalThis.__MOCK_SEED__ ?? DEFAULT_SEED)
+
+// 重置随机种子（测试前调用可复现同一请求序列的延迟与错误）
+export function setMockSeed(seed) {
+  rng = mulberry32(seed)
+}
+
+export function chance(rate) {
+  return rate > 0 && rng() < rate
+}
+
+export function sampleLatency(profile) {
+  const { p50 = 0, p95 = p50, p99 = p95, jitter = 0 } = profile.latency || {}
+  const u = rng()
+  let ms
+  if (u < 0.5) {
+    ms = p50 * (0.5 + u)
+  } else if (u < 0.95) {
+    ms = p50 + (p95 - p50) * (u - 0.5) / 0.45
+  } else if (u < 0.99) {
+    ms = p95 + (p99 - p95) * (u - 0.95) / 0.04
+  } else {
+    ms = p99 + p99 * 0.5 * (u - 0.99) / 0.01
+  }
+  ms += (rng() * 2 - 1) * jitter
+  return Math.max(0, Math.floor(ms + 0.5))
+}
+
+// 按画像等待；返回 true 表示请求超时，handler 应返回网络错误
+export async function simulateNetwork(profile) {
+  const timeout = (profile.latency && profile.latency.timeout) || 0
+  let ms = sampleLatency(profile)
+  const timedOut = chance(profile.timeoutRate || 0) || (timeout > 0 && ms >= timeout)
+  if (timedOut && timeout > 0) {
+    ms = timeout
+  }
+  if (ms > 0) {
+    await delay(ms)
+  }
+  return timedOut
+}
+"""
+
+
+def runtime_js(seed: int) -> str:
+    """渲染 JS 运行时源码"""
+    return RUNTIME_JS % {"seed": seed}
+
+
+def profile_literal(profile: Dict) -> str:
+    """画像的紧凑 JS 字面量"""
+    return json.dumps(profile, ensure_ascii=False, separators=(",", ":"))
@@ -0,0 +1,349 @@
+#!/usr/bin/env python3
+"""
+mock_server.py — 直接读取 contract.json 的独立 Mock 服务器（仅依赖标准库）
+与 generate_msw.py 生成的 handler 保持一致的鉴权、分页与 mockStrategy 语义，
+适用于无后端压测和小程序开发（MSW 无法在小程序中运行）
+
+性能要点：asyncio Protocol 事件循环、预编译路由索引、预序列化响应字节、HTTP/1.1 keep-alive 与 pipelining
+"""
+import argparse
+import asyncio
+import json
+import re
+from collections import OrderedDict, deque
+from pathlib import Path
+from typing import Deque, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, unquote, urlsplit
+
+from generate_msw import is_paginated, needs_auth, pick_error_example, pick_success_example
+from mock_data import DEFAULT_SEED, DEFAULT_TOTAL, build_generator_spec, generate_page, mulberry32
+from mock_profiles import PRESETS, chance, resolve_profile, simulate_network
+
+MAX_HEADER_BYTES = 64 * 1024
+PAGE_CACHE_SIZE = 4096
+WRITE_METHODS = {"POST", "PUT", "PATCH"}
+
+STATUS_TEXT = {
+    200: "OK", 204: "No Content", 400: "Bad Request", 401: "Unauthorized", 404: "Not Found",
+    405: "Method Not Allowed", 413: "Payload Too Large", 431: "Request Header Fields Too Large",
+    500: "Internal Server Error", 501: "Not Implemented",
+}
+
+UNAUTHORIZED_BODY = {"code": 401, "data": None, "message": "Token 无效或已过期"}
+NOT_FOUND_BODY = {"code": 404, "data": None, "message": "接口不存在"}
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="基于 contract.json 的独立 Mock 服务器")
+    parser.add_argument("--contract", required=True, help="contract.json 路径")
+    parser.add_argument("--host", default="127.0.0.1", help="监听地址")
+    parser.add_argument("--port", type=int, default=3000, help="监听端口")
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED, help="数据生成与延迟/错误采样的随机种子")
+    parser.add_argument("--mock-total", type=int, default=DEFAULT_TOTAL, help="分页接口默认数据总条数")
+    parser.add_argument("--profile", choices=sorted(PRESETS), default=None, help="全局网络画像预设")
+    parser.add_argument("--no-delay", action="store_true", help="关闭所有模拟延迟（纯吞吐压测）")
+    return parser.parse_args()
+
+
+# =====================================================
+# 响应序列化
+# =====================================================
+
+def encode_json(obj) -> bytes:
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def build_response(status: int, body: bytes, keep_alive: bool = True) -> bytes:
+    """拼装完整 HTTP/1.1 响应字节"""
+    head = (
+        f"HTTP/1.1 {status} {STATUS_TEXT.get(status, 'OK')}\r\n"
+        "Content-Type: application/json; charset=utf-8\r\n"
+        "Access-Control-Allow-Origin: *\r\n"
+        f"Content-Length: {len(body)}\r\n"
+        f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n"
+        "\r\n"
+    )
+    return head.encode("latin-1") + body
+
+
+PREFLIGHT_RESPONSE = (
+    b"HTTP/1.1 204 No Content\r\n"
+    b"Access-Control-Allow-Origin: *\r\n"
+    b"Access-Control-Allow-Methods: GET, POST, PUT, PATCH, DELETE, OPTIONS\r\n"
+    b"Access-Control-Allow-Headers: *\r\n"
+    b"Access-Control-Max-Age: 86400\r\n"
+    b"Content-Length: 0\r\n"
+    b"\r\n"
+)
+
+
+def parse_int(raw: Optional[str]) -> Optional[int]:
+    """与 JS parseInt 一致：取前导整数，无法解析时返回 None"""
+    if not raw:
+        return None
+    m = re.match(r"\s*([+-]?\d+)", raw)
+    return int(m.group(1)) if m else None
+
+
+# =====================================================
+# 路由
+# =====================================================
+
+class Route:
+    """单个接口的预编译路由与预序列化响应"""
+
+    __slots__ = (
+        "endpoint", "method", "auth", "strategy", "profile", "list_spec",
+        "envelope", "ok", "error", "unauthorized", "page_cache",
+    )
+
+    def __init__(self, ep: Dict, seed: int, total: int, profile: Optional[str]):
+        self.endpoint = ep.get("endpoint", "unknown")
+        self.method = str(ep.get("method", "GET")).upper()
+        self.auth = needs_auth(ep)
+        self.strategy = ep.get("mockStrategy", "success")
+        self.profile = resolve_profile(ep, profile)
+        self.list_spec = build_generator_spec(ep, seed, total) if is_paginated(ep) else None
+
+        success = pick_success_example(ep)
+        self.envelope = {k: v for k, v in success.items() if k != "data"}
+        self.ok = build_response(200, encode_json(success))
+        self.error = build_response(400, encode_json(pick_error_example(ep)))
+        self.unauthorized = build_response(401, encode_json(UNAUTHORIZED_BODY))
+        self.page_cache: "OrderedDict[Tuple[int, int], bytes]" = OrderedDict()
+
+    def page_response(self, query: str) -> bytes:
+        """分页响应：同一 (page, pageSize) 的结果确定，缓存序列化后的字节"""
+        params = parse_qs(query)
+        page = parse_int(params.get("page", [None])[0]) or 1
+        page_size = parse_int(params.get("pageSize", [None])[0]) or 10
+        key = (page, page_size)
+        cached = self.page_cache.get(key)
+        if cached is not None:
+            self.page_cache.move_to_end(key)
+            return cached
+        body = dict(self.envelope)
+        body["data"] = generate_page(self.list_spec, page, page_size)
+        response = build_response(200, encode_json(body))
+        self.page_cache[key] = response
+        if len(self.page_cache) > PAGE_CACHE_SIZE:
+            self.page_cache.popitem(last=False)
+        return response
+
+
+def split_segments(path: str) -> List[str]:
+    if path.startswith(("http://", "https://")):
+        path = urlsplit(path).path or "/"
+    return [s for s in path.strip("/").split("/")]
+
+
+class RouteIndex:
+    """静态路径哈希直查，带参数路径按 (method, 段数) 分桶逐段比对"""
+
+    def __init__(self) -> None:
+        self.static: Dict[Tuple[str, str], Route] = {}
+        self.dynamic: Dict[Tuple[str, int], List[Tuple[List[Optional[str]], Route]]] = {}
+
+    def add(self, path: str, route: Route) -> None:
+        segments = split_segments(path)
+        pattern = [None if re.fullmatch(r"\{[^{}]+\}|:\w+", s) else s for s in segments]
+        norm = "/" + "/".join(segments)
+        if all(p is not None for p in pattern):
+            self.static.setdefault((route.method, norm), route)
+        else:
+            self.dynamic.setdefault((route.method, len(pattern)), []).append((pattern, route))
+
+    def match(self, method: str, path: str) -> Optional[Route]:
+        route = self.static.get((method, path.rstrip("/") or "/"))
+        if route is not None:
+            return route
+        segments = path.strip("/").split("/")
+        for pattern, candidate in self.dynamic.get((method, len(segments)), ()):
+            for p, s in zip(pattern, segments):
+                if p is not None and p != s:
+                    break
+            else:
+                return candidate
+        return None
+
+
+def build_index(contract: Dict, seed: int, total: int, profile: Optional[str]) -> RouteIndex:
+    index = RouteIndex()
+    for ep in contract.get("endpoints", []):
+        index.add(ep.get("path", "/"), Route(ep, seed, total, profile))
+    # 更具体的路由（静态段更多）优先匹配
+    for bucket in index.dynamic.values():
+        bucket.sort(key=lambda item: -sum(p is not None for p in item[0]))
+    return index
+
+
+# =====================================================
+# 请求处理
+# =====================================================
+
+class MockApp:
+    """路由分发与 mockStrategy / 网络画像语义（与 generate_msw.py 生成的 handler 一致）"""
+
+    def __init__(self, index: RouteIndex, seed: int, no_delay: bool):
+        self.index = index
+        self.rng = mulberry32(seed)
+        self.no_delay = no_delay
+        self.not_found = build_response(404, encode_json(NOT_FOUND_BODY))
+        self.requests = 0
+
+    def handle(self, method: str, target: str, headers: Dict[str, str]) -> Tuple[int, Optional[bytes]]:
+        """返回 (延迟毫秒, 响应字节)；响应为 None 表示模拟超时（断开连接）"""
+        self.requests += 1
+        if method == "OPTIONS":
+            return 0, PREFLIGHT_RESPONSE
+        path, _, query = target.partition("?")
+        if "%" in path:
+            path = unquote(path)  # 按 UTF-8 解码百分号编码的路径（契约中的路径为原文）
+        route = self.index.match(method, path)
+        if route is None:
+            return 0, self.not_found
+
+        delay_ms = 0
+        if route.profile is not None:
+            delay_ms, timed_out = simulate_network(route.profile, self.rng)
+            if timed_out:
+                return (0 if self.no_delay else delay_ms), None
+        elif method in WRITE_METHODS:
+            delay_ms = 300
+        if self.no_delay:
+            delay_ms = 0
+
+        if route.auth and not headers.get("authorization", "").startswith("Bearer "):
+            return delay_ms, route.unauthorized
+
+        error_rate = route.profile["errorRate"] if route.profile else 0
+        if route.strategy == "error":
+            return delay_ms, route.error
+        if route.strategy == "random":
+            if chance(self.rng, error_rate if error_rate > 0 else 0.5):
+                return delay_ms, route.error
+        elif error_rate > 0 and chance(self.rng, error_rate):
+            return delay_ms, route.error
+
+        if route.list_spec is not None:
+            return delay_ms, route.page_response(query)
+        return delay_ms, route.ok
+
+
+class HttpProtocol(asyncio.Protocol):
+    """最小 HTTP/1.1 解析：Content-Length 请求体、keep-alive、pipelining，响应按请求顺序写回"""
+
+    def __init__(self, app: MockApp):
+        self.app = app
+        self.loop = asyncio.get_event_loop()
+        self.transport: Optional[asyncio.Transport] = None
+        self.buffer = bytearray()
+        self.pending: Deque[List] = deque()  # [响应字节或 None, 是否就绪, 是否关闭连接]
+
+    def connection_made(self, transport: asyncio.BaseTransport) -> None:
+        self.transport = transport  # type: ignore[assignment]
+
+    def connection_lost(self, exc: Optional[Exception]) -> None:
+        self.transport = None
+        self.pending.clear()
+
+    def data_received(self, data: bytes) -> None:
+        self.buffer += data
+        while self.transport is not None:
+            end = self.buffer.find(b"\r\n\r\n")
+            if end < 0:
+                if len(self.buffer) > MAX_HEADER_BYTES:
+                    self._fail(431)
+                return
+            head = bytes(self.buffer[:end]).decode("latin-1")
+            lines = head.split("\r\n")
+            parts = lines[0].split(" ")
+            if len(parts) != 3:
+                self._fail(400)
+                return
+            method, target, version = parts
+            headers: Dict[str, str] = {}
+            for line in lines[1:]:
+                name, _, value = line.partition(":")
+                headers[name.strip().lower()] = value.strip()
+            if "chunked" in headers.get("transfer-encoding", "").lower():
+                self._fail(501)
+                return
+            try:
+                length = int(headers.get("content-length", "0") or 0)
+            except ValueError:
+                length = -1
+            if length < 0:
+                self._fail(400)
+                return
+            total = end + 4 + length
+            if len(self.buffer) < total:
+                return
+            del self.buffer[:total]
+
+            connection = headers.get("connection", "").lower()
+            close = connection == "close" or (version == "HTTP/1.0" and connection != "keep-alive")
+            if target.startswith(("http://", "https://")):
+                split = urlsplit(target)
+                target = split.path + ("?" + split.query if split.query else "")
+            delay_ms, response = self.app.handle(method.upper(), target, headers)
+            self._enqueue(delay_ms, response, close or response is None)
+
+    def _enqueue(self, delay_ms: int, response: Optional[bytes], close: bool) -> None:
+        if delay_ms <= 0 and not self.pending:
+            self._write(response, close)
+            return
+        item = [response, delay_ms <= 0, close]
+        self.pending.append(item)
+        if delay_ms > 0:
+            self.loop.call_later(delay_ms / 1000, self._ready, item)
+
+    def _ready(self, item: List) -> None:
+        item[1] = True
+        while self.pending and self.pending[0][1] and self.transport is not None:
+            response, _, close = self.pending.popleft()
+            self._write(response, close)
+
+    def _write(self, response: Optional[bytes], close: bool) -> None:
+        if self.transport is None:
+            return
+        if response is not None:
+            if close:
+                response = response.replace(b"Connection: keep-alive\r\n", b"Connection: close\r\n", 1)
+            self.transport.write(response)
+        if close:
+            self.transport.close()
+            self.transport = None
+
+    def _fail(self, status: int) -> None:
+        body = encode_json({"code": status, "data": None, "message": STATUS_TEXT.get(status, "")})
+        self._write(build_response(status, body, keep_alive=False), close=True)
+
+
+async def serve(app: MockApp, host: str, port: int) -> None:
+    loop = asyncio.get_running_loop()
+    server = await loop.create_server(lambda: HttpProtocol(app), host, port, backlog=1024, reuse_address=True)
+    print(f"[mock-server] 监听 http://{host}:{port}")
+    async with server:
+        await server.serve_forever()
+
+
+def main() -> int:
+    args = parse_args()
+    contract = json.loads(Path(args.contract).read_text(encoding="utf-8"))
+    index = build_index(contract, args.seed, args.mock_total, args.profile)
+    app = MockApp(index, args.seed, args.no_delay)
+
+    routes = len(index.static) + sum(len(b) for b in index.dynamic.values())
+    print(f"[mock-server] 路由：{routes} 个（静态 {len(index.static)}，带参数 {routes - len(index.static)}）")
+    if args.profile:
+        print(f"[mock-server] 网络画像：{args.profile}")
+    try:
+        asyncio.run(serve(app, args.host, args.port))
+    except KeyboardInterrupt:
+        print(f"\n[mock-server] 已停止，共处理 {app.requests} 个请求")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
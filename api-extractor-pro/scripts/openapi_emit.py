@@ -0,0 +1,150 @@
+"""
+openapi_emit.py — OpenAPI 流式输出
+YAML / JSON 按节点直接写入文件句柄，不在内存中拼接整份文本；
+StreamMap 包装的映射在输出时才逐项生成，可用于按接口惰性构建 paths
+"""
+import itertools
+import json
+import re
+from typing import IO, Any, Callable, Iterable, Tuple
+
+from yaml_stream import resolve_plain
+
+_YAML_SPECIAL = set(":#{}[],&*?|-<>=!%@`\"'")
+# YAML 1.1（PyYAML 等）会解析为布尔 / 数字的无引号文本；YAML 1.2 core schema 的规则见 yaml_stream.resolve_plain
+_YAML11_RESERVED = re.compile(
+    r"^(?:yes|Yes|YES|no|No|NO|on|On|ON|off|Off|OFF"
+    r"|[-+]?[0-9][0-9_]*\.[0-9_]*(?:[eE][-+][0-9]+)?|\.[0-9][0-9_]*(?:[eE][-+][0-9]+)?"
+    r"|[-+]?0b[0-1_]+|[-+]?0[0-7_]+|[-+]?(?:0|[1-9][0-9_]*)|[-+]?0x[0-9a-fA-F_]+"
+    r"|[-+]?[0-9][0-9_]*(?::[0-5]?[0-9])+(?:\.[0-9_]*)?|[-+]?\.(?:inf|Inf|INF)|\.(?:nan|NaN|NAN))$"
+)
+
+
+class StreamMap:
+    """惰性映射：items() 每次调用 factory 重新生成键值对，输出时逐项求值
+
+    optional 为 True 时，作为映射的值且没有任何项时整个键被省略（如没有可复用组件时的 components）
+    """
+
+    def __init__(self, factory: Callable[[], Iterable[Tuple[str, Any]]], optional: bool = False):
+        self.factory = factory
+        self.optional = optional
+
+    def items(self) -> Iterable[Tuple[str, Any]]:
+        return self.factory()
+
+
+def _is_map(v: Any) -> bool:
+    return isinstance(v, (dict, StreamMap))
+
+
+_OMIT = object()
+
+
+def _realize(v: Any) -> Any:
+    """StreamMap 先取出第一项判断是否为空：空时返回 {}（optional 时返回 _OMIT），否则返回从第一项接续的单次映射"""
+    if not isinstance(v, StreamMap):
+        return v
+    it = iter(v.items())
+    first = next(it, None)
+    if first is None:
+        return _OMIT if v.optional else {}
+    return StreamMap(lambda: itertools.chain([first], it))
+
+
+def _entries(obj: Any) -> Iterable[Tuple[Any, Any]]:
+    """映射的键值对，值为 StreamMap 时先判断是否为空，省略空的可选映射"""
+    for k, v in obj.items():
+        v = _realize(v)
+        if v is not _OMIT:
+            yield k, v
+
+
+def yaml_scalar(v: Any) -> str:
+    """转换为 YAML 标量；含特殊字符或按 YAML 1.2 / 1.1 规则会被解析为非字符串的文本使用双引号"""
+    if isinstance(v, bool):
+        return "true" if v else "false"
+    if v is None:
+        return "null"
+    if isinstance(v, (int, float)):
+        return str(v)
+    s = str(v)
+    if (
+        not s
+        or s != s.strip()
+        or any(c in _YAML_SPECIAL for c in s)
+        or any(c in s for c in "\n\r\t\\")
+        or not isinstance(resolve_plain(s), str)
+        or _YAML11_RESERVED.match(s)
+    ):
+        return json.dumps(s, ensure_ascii=False)
+    return s
+
+
+def emit_yaml(obj: Any, fh: IO[str], indent: int = 0) -> None:
+    """将映射 / 列表以块格式逐行写入 fh"""
+    space = "  " * indent
+    if _is_map(obj):
+        for k, v in _entries(obj):
+            _emit_entry(fh, f"{space}{yaml_scalar(k)}:", v, indent)
+    elif isinstance(obj, list):
+        for item in obj:
+            _emit_item(fh, space, item, indent)
+    else:
+        fh.write(f"{space}{yaml_scalar(obj)}\n")
+
+
+def _emit_entry(fh: IO[str], head: str, v: Any, indent: int) -> None:
+    if isinstance(v, dict) and not v:
+        fh.write(f"{head} {{}}\n")
+    elif isinstance(v, list) and not v:
+        fh.write(f"{head} []\n")
+    elif _is_map(v) or isinstance(v, list):
+        fh.write(f"{head}\n")
+        emit_yaml(v, fh, indent + 1)
+    else:
+        fh.write(f"{head} {yaml_scalar(v)}\n")
+
+
+def _emit_item(fh: IO[str], space: str, item: Any, indent: int) -> None:
+    """列表项：映射的首个键与 "- " 同行，其余键缩进对齐"""
+    if _is_map(item):
+        first = True
+        for k, v in _entries(item):
+            prefix = f"{space}- " if first else f"{space}  "
+            _emit_entry(fh, f"{prefix}{yaml_scalar(k)}:", v, indent + 1)
+            first = False
+        if first:
+            fh.write(f"{space}- {{}}\n")
+    elif isinstance(item, list):
+        if item:
+            fh.write(f"{space}-\n")
+            emit_yaml(item, fh, indent + 1)
+        else:
+            fh.write(f"{space}- []\n")
+    else:
+        fh.write(f"{space}- {yaml_scalar(item)}\n")
+
+
+def emit_json(obj: Any, fh: IO[str]) -> None:
+    """紧凑 JSON 流式写入 fh（StreamMap 逐项求值）"""
+    if _is_map(obj):
+        fh.write("{")
+        first = True
+        for k, v in _entries(obj):
+            if not first:
+                fh.write(",")
+            fh.write(json.dumps(str(k), ensure_ascii=False))
+            fh.write(":")
+            emit_json(v, fh)
+            first = False
+        fh.write("}")
+    elif isinstance(obj, list):
+        fh.write("[")
+        for i, item in enumerate(obj):
+            if i:
+                fh.write(",")
+            emit_json(item, fh)
+        fh.write("]")
+    else:
+        fh.write(json.dumps(obj, ensure_ascii=False))
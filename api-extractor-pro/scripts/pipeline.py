@@ -0,0 +1,182 @@
+"""
+pipeline.py — 工作流阶段 DAG 调度
+每个阶段声明依赖、输入与输出；按输入内容哈希 + 命令参数计算阶段指纹，
+指纹与上次成功运行一致且输出未被改动时跳过（类似 make），互不依赖的阶段并行执行
+"""
+import json
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from artifacts import ArtifactWriter, sha256_bytes, sha256_file
+from fingerprint import canonical
+
+STATE_VERSION = 1
+
+# 阶段执行器：(阶段, 上游阶段结果) → (退出码, 阶段结果)
+Runner = Callable[["Stage", Dict[str, Any]], Tuple[int, Any]]
+
+
+@dataclass
+class Stage:
+    """工作流阶段"""
+    name: str
+    label: str
+    deps: List[str] = field(default_factory=list)
+    inputs: List[Path] = field(default_factory=list)
+    outputs: List[Path] = field(default_factory=list)
+    module: str = ""                                      # 脚本模块名，如 generate_docs
+    argv: List[str] = field(default_factory=list)
+    objects: Dict[str, str] = field(default_factory=dict)  # run() 关键字参数 → 上游阶段名（进程内模式传递对象）
+    action: Optional[Callable[[Dict[str, Any]], int]] = None  # 非脚本阶段
+    fatal: bool = True                                    # 失败时停止调度后续阶段
+
+
+def path_digest(path: Path) -> str:
+    """文件取内容哈希；目录取其下全部文件（相对路径 + 哈希）的汇总哈希；不存在为 missing"""
+    path = Path(path)
+    if path.is_file():
+        return sha256_file(path) or "missing"
+    if path.is_dir():
+        entries = sorted(
+            f"{p.relative_to(path).as_posix()}={sha256_file(p)}" for p in path.rglob("*") if p.is_file()
+        )
+        return sha256_bytes("\n".join(entries).encode("utf-8"))
+    return "missing"
+
+
+def stage_fingerprint(stage: Stage) -> str:
+    """阶段指纹：名称 + 命令参数 + 各输入的内容哈希"""
+    payload = {
+        "name": stage.name,
+        "module": stage.module,
+        "argv": stage.argv,
+        "inputs": [[str(p), path_digest(p)] for p in stage.inputs],
+    }
+    return sha256_bytes(canonical(payload).encode("utf-8"))[:32]
+
+
+class PipelineState:
+    """上次成功运行的阶段指纹与输出哈希，保存在 state.json"""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            data = {}
+        self.stages: Dict[str, Dict] = data.get("stages", {}) if data.get("version") == STATE_VERSION else {}
+
+    def up_to_date(self, stage: Stage, fingerprint: str) -> bool:
+        entry = self.stages.get(stage.name)
+        if not entry or entry.get("fingerprint") != fingerprint:
+            return False
+        outputs = entry.get("outputs", {})
+        return all(outputs.get(str(p)) == path_digest(p) for p in stage.outputs)
+
+    def record(self, stage: Stage, fingerprint: str) -> None:
+        self.stages[stage.name] = {
+            "fingerprint": fingerprint,
+            "outputs": {str(p): path_digest(p) for p in stage.outputs},
+        }
+
+    def forget(self, name: str) -> None:
+        self.stages.pop(name, None)
+
+    def save(self) -> None:
+        data = {"version": STATE_VERSION, "stages": dict(sorted(self.stages.items()))}
+        ArtifactWriter().write_text(self.path, json.dumps(data, ensure_ascii=False, indent=2) + "\n")
+
+
+def select_stages(stages: List[Stage], only: Iterable[str]) -> Set[str]:
+    """--only 指定的阶段及其全部上游依赖；未指定时为全部阶段"""
+    by_name = {s.name: s for s in stages}
+    wanted = list(only)
+    if not wanted:
+        return set(by_name)
+    unknown = [n for n in wanted if n not in by_name]
+    if unknown:
+        raise ValueError(f"未知阶段：{', '.join(unknown)}（可选：{', '.join(by_name)}）")
+    selected: Set[str] = set()
+    while wanted:
+        name = wanted.pop()
+        if name not in selected:
+            selected.add(name)
+            wanted.extend(by_name[name].deps)
+    return selected
+
+
+def run_pipeline(
+    stages: List[Stage],
+    runner: Runner,
+    state: PipelineState,
+    jobs: int = 2,
+    force: bool = False,
+    only: Iterable[str] = (),
+    done: Iterable[str] = (),
+    log: Callable[[str], None] = print,
+) -> Tuple[int, Dict[str, str]]:
+    """按依赖调度阶段；返回 (退出码, 阶段名 → ran / skipped / failed / blocked)
+
+    依赖全部完成（运行或跳过）的阶段进入就绪队列；就绪时计算指纹，与上次一致则跳过，
+    否则提交到线程池运行（子进程模式下各阶段真正并行）。致命阶段失败后不再提交新阶段；
+    done 为本次已在前一轮完成的阶段（如交互确认前运行的阶段），视为跳过
+    """
+    selected = select_stages(stages, only)
+    status: Dict[str, str] = {name: "skipped" for name in done if name in selected}
+    results: Dict[str, Any] = {}
+    fingerprints: Dict[str, str] = {}
+    exit_code = 0
+    running: Dict[Future, Stage] = {}
+
+    def ready() -> List[Stage]:
+        out = []
+        for s in stages:
+            if s.name not in selected or s.name in status or any(s is r for r in running.values()):
+                continue
+            deps = [d for d in s.deps if d in selected]
+            if any(status.get(d) in ("failed", "blocked") for d in deps):
+                status[s.name] = "blocked"
+                log(f"[workflow] ⛔ {s.label}：上游阶段失败，未执行")
+                continue
+            if all(status.get(d) in ("ran", "skipped") for d in deps):
+                out.append(s)
+        return out
+
+    with ThreadPoolExecutor(max_workers=max(1, jobs)) as pool:
+        while True:
+            # 跳过的阶段会立即使下游就绪，因此反复收集直到没有新的就绪阶段
+            batch = ready() if exit_code == 0 else []
+            while batch:
+                for stage in batch:
+                    fingerprint = stage_fingerprint(stage)
+                    fingerprints[stage.name] = fingerprint
+                    if not force and state.up_to_date(stage, fingerprint):
+                        status[stage.name] = "skipped"
+                        log(f"[workflow] ⏭  {stage.label}：输入未变化，跳过")
+                        continue
+                    upstream = {k: results.get(v) for k, v in stage.objects.items()}
+                    running[pool.submit(runner, stage, upstream)] = stage
+                batch = ready()
+            if not running:
+                break
+            done, _ = wait(list(running), return_when=FIRST_COMPLETED)
+            for future in done:
+                stage = running.pop(future)
+                code, result = future.result()
+                if code == 0:
+                    status[stage.name] = "ran"
+                    results[stage.name] = result
+                    state.record(stage, fingerprints[stage.name])
+                else:
+                    status[stage.name] = "failed"
+                    state.forget(stage.name)
+                    if stage.fatal and exit_code == 0:
+                        exit_code = code
+    state.save()
+    for s in stages:
+        if s.name in selected and s.name not in status:
+            status[s.name] = "blocked"
+    return exit_code, status
+
@@ -0,0 +1,379 @@
+#!/usr/bin/env python3
+"""
+recordings.py — Mock 响应录制与回放存储
+以反向代理方式录制真实后端（或任意本地替身后端）的 JSON 响应，写入内容寻址存储 mock/recordings：
+
+  mock/recordings/index.json          (method, path, 规范化 query) → 响应元数据
+  mock/recordings/objects/<hash>.json 紧凑 JSON 响应体，相同内容只存一份
+
+存储总大小超过上限时按最近使用时间（LRU）淘汰；generate_msw.py --recordings 据此生成回放 handler
+"""
+import argparse
+import http.client
+import json
+import re
+import threading
+import time
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+from urllib.parse import parse_qsl, quote_plus, urlsplit
+
+from artifacts import ArtifactWriter, sha256_bytes
+
+INDEX_VERSION = 1
+HASH_LENGTH = 16
+DEFAULT_MAX_BYTES = 50 * 1024 * 1024
+DEFAULT_IGNORED_PARAMS = ["_", "t", "timestamp"]
+HOP_BY_HOP = {
+    "connection", "keep-alive", "proxy-authenticate", "proxy-authorization",
+    "te", "trailers", "transfer-encoding", "upgrade", "content-length", "host", "accept-encoding",
+}
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="录制 / 回放 Mock 响应")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    proxy = sub.add_parser("proxy", help="启动录制代理")
+    proxy.add_argument("--upstream", required=True, help="被代理的后端地址，如 http://localhost:8080")
+    proxy.add_argument("--output-root", required=True, help="输出根目录（录制到 mock/recordings）")
+    proxy.add_argument("--host", default="127.0.0.1", help="监听地址")
+    proxy.add_argument("--port", type=int, default=3100, help="监听端口")
+    proxy.add_argument("--mode", choices=["record", "replay", "auto"], default="record",
+                       help="record：始终转发并录制；replay：只回放；auto：命中回放，未命中转发录制")
+    proxy.add_argument("--max-bytes", type=int, default=DEFAULT_MAX_BYTES, help="存储大小上限（字节）")
+    proxy.add_argument("--ignore-params", default=",".join(DEFAULT_IGNORED_PARAMS), help="规范化 query 时忽略的参数（逗号分隔）")
+
+    stats = sub.add_parser("stats", help="查看录制存储统计")
+    stats.add_argument("--output-root", required=True, help="输出根目录")
+
+    evict = sub.add_parser("evict", help="按 LRU 淘汰到指定大小")
+    evict.add_argument("--output-root", required=True, help="输出根目录")
+    evict.add_argument("--max-bytes", type=int, required=True, help="存储大小上限（字节）")
+    return parser.parse_args()
+
+
+# =====================================================
+# 请求键规范化（与 replay.js 中 recordingKey 一致）
+# =====================================================
+
+def encode_component(s: str) -> str:
+    """与 JS URLSearchParams#toString 相同的编码规则"""
+    return quote_plus(s, safe="*").replace("~", "%7E")
+
+
+def normalize_query(query: str, ignored: Iterable[str] = DEFAULT_IGNORED_PARAMS) -> str:
+    """排序并去除易变参数后的 query"""
+    ignored_set = set(ignored)
+    pairs = sorted((k, v) for k, v in parse_qsl(query, keep_blank_values=True) if k not in ignored_set)
+    return "&".join(f"{encode_component(k)}={encode_component(v)}" for k, v in pairs)
+
+
+def recording_key(method: str, path: str, query: str = "", ignored: Iterable[str] = DEFAULT_IGNORED_PARAMS) -> str:
+    normalized = normalize_query(query, ignored)
+    return f"{method.upper()} {path}" + (f"?{normalized}" if normalized else "")
+
+
+# =====================================================
+# 内容寻址存储
+# =====================================================
+
+class RecordingStore:
+    """index.json + objects/ 的内容寻址存储，带 LRU 淘汰"""
+
+    def __init__(self, root: Path, max_bytes: int = DEFAULT_MAX_BYTES, ignored: Optional[List[str]] = None):
+        self.root = Path(root)
+        self.objects_dir = self.root / "objects"
+        self.index_path = self.root / "index.json"
+        self.max_bytes = max_bytes
+        self.ignored = ignored if ignored is not None else list(DEFAULT_IGNORED_PARAMS)
+        self.entries: Dict[str, Dict] = {}
+        self.lock = threading.Lock()
+        self.dirty = False
+        self.last_flush = 0.0
+        self.load()
+
+    def load(self) -> None:
+        if not self.index_path.is_file():
+            return
+        data = json.loads(self.index_path.read_text(encoding="utf-8"))
+        self.entries = data.get("entries", {})
+        self.ignored = data.get("ignoredParams", self.ignored)
+
+    def object_path(self, digest: str) -> Path:
+        return self.objects_dir / f"{digest}.json"
+
+    def total_bytes(self) -> int:
+        """去重后的对象总大小"""
+        sizes: Dict[str, int] = {}
+        for e in self.entries.values():
+            sizes[e["hash"]] = e["size"]
+        return sum(sizes.values())
+
+    def get(self, key: str) -> Optional[Tuple[Dict, bytes]]:
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            try:
+                body = self.object_path(entry["hash"]).read_bytes()
+            except OSError:
+                return None
+            entry["lastUsed"] = time.time()
+            self.dirty = True
+        return entry, body
+
+    def put(self, method: str, path: str, query: str, status: int, body: bytes) -> Optional[str]:
+        """录制一条 JSON 响应；非 JSON 响应体返回 None"""
+        try:
+            compact = json.dumps(json.loads(body), ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        except ValueError:
+            return None
+        digest = sha256_bytes(compact)[:HASH_LENGTH]
+        key = recording_key(method, path, query, self.ignored)
+        with self.lock:
+            obj = self.object_path(digest)
+            if not obj.is_file():
+                self.objects_dir.mkdir(parents=True, exist_ok=True)
+                ArtifactWriter().write_bytes(obj, compact)
+            now = time.time()
+            self.entries[key] = {
+                "method": method.upper(),
+                "path": path,
+                "query": normalize_query(query, self.ignored),
+                "status": status,
+                "hash": digest,
+                "size": len(compact),
+                "recordedAt": datetime.now(timezone.utc).isoformat(),
+                "lastUsed": now,
+            }
+            self.dirty = True
+            self._evict_locked()
+        return key
+
+    def evict(self, max_bytes: Optional[int] = None) -> List[str]:
+        with self.lock:
+            return self._evict_locked(max_bytes)
+
+    def _evict_locked(self, max_bytes: Optional[int] = None) -> List[str]:
+        """按 lastUsed 从旧到新淘汰，直到去重后总大小不超过上限，并删除无引用对象"""
+        limit = self.max_bytes if max_bytes is None else max_bytes
+        refs: Dict[str, int] = {}
+        for e in self.entries.values():
+            refs[e["hash"]] = refs.get(e["hash"], 0) + 1
+        total = self.total_bytes()
+        evicted: List[str] = []
+        if total <= limit:
+            return evicted
+        for key, entry in sorted(self.entries.items(), key=lambda kv: kv[1]["lastUsed"]):
+            if total <= limit:
+                break
+            del self.entries[key]
+            evicted.append(key)
+            refs[entry["hash"]] -= 1
+            if refs[entry["hash"]] == 0:
+                total -= entry["size"]
+                try:
+                    self.object_path(entry["hash"]).unlink()
+                except OSError:
+                    pass
+        self.dirty = True
+        return evicted
+
+    def flush(self, force: bool = False) -> None:
+        """写回 index.json（默认最多每秒一次）"""
+        with self.lock:
+            if not self.dirty or (not force and time.time() - self.last_flush < 1.0):
+                return
+            data = {
+                "version": INDEX_VERSION,
+                "ignoredParams": self.ignored,
+                "maxBytes": self.max_bytes,
+                "entries": dict(sorted(self.entries.items())),
+            }
+            ArtifactWriter().write_text(self.index_path, json.dumps(data, ensure_ascii=False, indent=2))
+            self.dirty = False
+            self.last_flush = time.time()
+
+
+def recordings_root(output_root: Path) -> Path:
+    return Path(output_root) / "mock" / "recordings"
+
+
+def path_template_regex(path: str) -> "re.Pattern[str]":
+    """契约路径模板转正则：{id} / :id 匹配单个路径段"""
+    if path.startswith(("http://", "https://")):
+        path = urlsplit(path).path or "/"
+    parts = re.split(r"(\{[^{}]+\}|:\w+)", path)
+    pattern = "".join("[^/]+" if re.fullmatch(r"\{[^{}]+\}|:\w+", p) else re.escape(p) for p in parts)
+    return re.compile(f"^{pattern}/?$")
+
+
+def recorded_endpoints(store: RecordingStore, endpoints: List[Dict]) -> set:
+    """有录制数据的接口（method, path）集合"""
+    matched = set()
+    for ep in endpoints:
+        method = str(ep.get("method", "GET")).upper()
+        regex = path_template_regex(ep.get("path", "/"))
+        if any(e["method"] == method and regex.match(e["path"]) for e in store.entries.values()):
+            matched.add((method, ep.get("path", "/")))
+    return matched
+
+
+# =====================================================
+# 回放运行时（写入 mock/recordings/replay.js）
+# =====================================================
+
+def replay_js(store: RecordingStore) -> str:
+    """生成回放运行时：请求键 → (对象哈希, 状态码) 索引 + 按需动态 import 的对象加载表"""
+    entries = sorted(store.entries.items())
+    hashes = sorted({e["hash"] for _, e in entries})
+    lines = []
+    lines.append("// @generated by api-extractor-pro generate_msw.py")
+    lines.append("// 录制回放：按 (method, path, 规范化 query) 查找录制的响应，响应体按需加载")
+    lines.append("")
+    lines.append(f"const IGNORED_PARAMS = {json.dumps(store.ignored)}")
+    lines.append("")
+    lines.append("const recordings = {")
+    for key, e in entries:
+        lines.append(f"  {json.dumps(key, ensure_ascii=False)}: [{json.dumps(e['hash'])}, {int(e['status'])}],")
+    lines.append("}")
+    lines.append("")
+    lines.append("const objects = {")
+    for h in hashes:
+        lines.append(f"  {json.dumps(h)}: () => import('./objects/{h}.json'),")
+    lines.append("}")
+    lines.append("")
+    lines.append("function compareEntries(a, b) {")
+    lines.append("  if (a[0] !== b[0]) return a[0] < b[0] ? -1 : 1")
+    lines.append("  if (a[1] !== b[1]) return a[1] < b[1] ? -1 : 1")
+    lines.append("  return 0")
+    lines.append("}")
+    lines.append("")
+    lines.append("export function recordingKey(request) {")
+    lines.append("  const url = new URL(request.url)")
+    lines.append("  const params = [...url.searchParams].filter(([k]) => !IGNORED_PARAMS.includes(k))")
+    lines.append("  params.sort(compareEntries)")
+    lines.append("  const query = new URLSearchParams(params).toString()")
+    lines.append("  return `${request.method} ${url.pathname}${query ? '?' + query : ''}`")
+    lines.append("}")
+    lines.append("")
+    lines.append("// 命中时返回 { body, status }，未命中返回 null")
+    lines.append("export async function replay(request) {")
+    lines.append("  const hit = recordings[recordingKey(request)]")
+    lines.append("  if (!hit) {")
+    lines.append("    return null")
+    lines.append("  }")
+    lines.append("  const mod = await objects[hit[0]]()")
+    lines.append("  return { body: mod.default, status: hit[1] }")
+    lines.append("}")
+    lines.append("")
+    return "\n".join(lines)
+
+
+# =====================================================
+# 录制代理
+# =====================================================
+
+def make_handler(store: RecordingStore, upstream: str, mode: str):
+    target = urlsplit(upstream)
+    conn_cls = http.client.HTTPSConnection if target.scheme == "https" else http.client.HTTPConnection
+
+    class ProxyHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, fmt: str, *args) -> None:
+            pass
+
+        def _send(self, status: int, body: bytes, content_type: str, source: str) -> None:
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.send_header("X-Mock-Recording", source)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _handle(self) -> None:
+            split = urlsplit(self.path)
+            length = int(self.headers.get("Content-Length", "0") or 0)
+            payload = self.rfile.read(length) if length else None
+
+            if mode in ("replay", "auto"):
+                hit = store.get(recording_key(self.command, split.path, split.query, store.ignored))
+                if hit is not None:
+                    entry, body = hit
+                    self._send(entry["status"], body, "application/json; charset=utf-8", "replay")
+                    store.flush()
+                    return
+                if mode == "replay":
+                    self._send(404, b'{"code":404,"data":null,"message":"no recording"}', "application/json", "miss")
+                    return
+
+            headers = {k: v for k, v in self.headers.items() if k.lower() not in HOP_BY_HOP}
+            headers["Accept-Encoding"] = "identity"
+            conn = conn_cls(target.netloc, timeout=30)
+            try:
+                base = target.path.rstrip("/")
+                conn.request(self.command, base + self.path, body=payload, headers=headers)
+                resp = conn.getresponse()
+                body = resp.read()
+                content_type = resp.getheader("Content-Type", "application/octet-stream")
+            except OSError as e:
+                self._send(502, json.dumps({"code": 502, "data": None, "message": str(e)}).encode("utf-8"),
+                           "application/json", "error")
+                return
+            finally:
+                conn.close()
+
+            source = "pass"
+            if "json" in content_type.lower() and store.put(self.command, split.path, split.query, resp.status, body):
+                source = "record"
+                store.flush()
+            self._send(resp.status, body, content_type, source)
+
+        do_GET = do_POST = do_PUT = do_PATCH = do_DELETE = _handle
+
+    return ProxyHandler
+
+
+def cmd_proxy(args: argparse.Namespace) -> int:
+    ignored = [p.strip() for p in args.ignore_params.split(",") if p.strip()]
+    store = RecordingStore(recordings_root(Path(args.output_root)), args.max_bytes, ignored)
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(store, args.upstream, args.mode))
+    print(f"[recordings] {args.mode} 代理：http://{args.host}:{args.port} → {args.upstream}")
+    print(f"[recordings] 存储：{store.root}（{len(store.entries)} 条，上限 {args.max_bytes} 字节）")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        store.flush(force=True)
+        print(f"\n[recordings] 已保存：{len(store.entries)} 条，{store.total_bytes()} 字节")
+    return 0
+
+
+def cmd_stats(args: argparse.Namespace) -> int:
+    store = RecordingStore(recordings_root(Path(args.output_root)))
+    unique = len({e["hash"] for e in store.entries.values()})
+    print(f"[recordings] 条目：{len(store.entries)}，对象：{unique}，大小：{store.total_bytes()} 字节")
+    return 0
+
+
+def cmd_evict(args: argparse.Namespace) -> int:
+    store = RecordingStore(recordings_root(Path(args.output_root)), args.max_bytes)
+    evicted = store.evict()
+    store.flush(force=True)
+    print(f"[recordings] 淘汰 {len(evicted)} 条，剩余 {store.total_bytes()} 字节")
+    return 0
+
+
+def main() -> int:
+    args = parse_args()
+    return {"proxy": cmd_proxy, "stats": cmd_stats, "evict": cmd_evict}[args.command](args)
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,325 @@
+#!/usr/bin/env python3
+"""
+run_fleet.py — 批量运行多个项目的工作流
+对一组配置文件（或包含配置文件的目录）逐个运行 run_workflow.py：每个项目一个子进程，最多 --jobs 个同时运行，
+单个项目失败（配置错误、异常、非零退出）不影响其余项目；各项目的扫描共用一个按文件内容寻址的缓存（scan.ScanCache），
+结束后输出汇总报告 fleet-report.json / fleet-report.md（接口数、破坏性变更、一致性问题、失败阶段）
+
+  run_fleet.py configs/ [other-config.json ...] [--jobs 4] [--output fleet-reports] [--force] [--in-process]
+"""
+import argparse
+import json
+import os
+import re
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from artifacts import ArtifactWriter
+from metrics import spawn
+from contract_diff import diff_contracts
+from run_workflow import load_config
+from scan import SCAN_CACHE_ENV
+
+FLEET_VERSION = 1
+ISSUES_RE = re.compile(r"发现 \*\*(\d+)\*\* 个问题")
+LOG_TAIL_LINES = 20
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="批量运行多个项目的 API 工作流")
+    parser.add_argument("configs", nargs="+", help="配置文件，或包含配置文件（*.json）的目录")
+    parser.add_argument("--jobs", type=int, default=max(1, min(4, os.cpu_count() or 1)), help="同时运行的项目数")
+    parser.add_argument("--output", default="fleet-reports", help="汇总报告与各项目日志的输出目录")
+    parser.add_argument("--cache-dir", default="", help="共享扫描缓存目录（默认：<output>/.cache/scan）")
+    parser.add_argument("--no-scan-cache", action="store_true", help="不使用共享扫描缓存")
+    parser.add_argument("--force", action="store_true", help="传给 run_workflow.py：忽略阶段指纹重新运行")
+    parser.add_argument("--in-process", action="store_true", help="传给 run_workflow.py：项目内各阶段在同一进程中运行")
+    return parser.parse_args(argv)
+
+
+def discover_configs(inputs: List[str]) -> List[Path]:
+    """展开目录（其下的 *.json），去重并保持给定顺序"""
+    out: List[Path] = []
+    seen = set()
+    for raw in inputs:
+        p = Path(raw)
+        if p.is_dir():
+            candidates = sorted(p.glob("*.json"))
+        elif p.is_file():
+            candidates = [p]
+        else:
+            print(f"[fleet] 警告：配置不存在 {raw}")
+            continue
+        for c in candidates:
+            resolved = c.resolve()
+            if resolved not in seen:
+                seen.add(resolved)
+                out.append(resolved)
+    return out
+
+
+def project_names(configs: List[Path]) -> Dict[Path, str]:
+    """报告中的项目名：配置文件名；重名时（如各仓库都叫 sample-config.json）加上所在目录名"""
+    stems: Dict[str, int] = {}
+    for c in configs:
+        stems[c.stem] = stems.get(c.stem, 0) + 1
+    names: Dict[Path, str] = {}
+    used = set()
+    for c in configs:
+        name = c.stem if stems[c.stem] == 1 else f"{c.parent.name}/{c.stem}"
+        base, i = name, 2
+        while name in used:
+            name, i = f"{base}-{i}", i + 1
+        used.add(name)
+        names[c] = name
+    return names
+
+
+def read_json(path: Path) -> Optional[Dict]:
+    try:
+        return json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+
+
+def consistency_issues(report: Path) -> Optional[int]:
+    """一致性报告中的问题总数；报告不存在时为 None"""
+    try:
+        text = report.read_text(encoding="utf-8")
+    except OSError:
+        return None
+    m = ISSUES_RE.search(text)
+    return int(m.group(1)) if m else 0
+
+
+def project_summary(output_dir: Path, started: float) -> Dict[str, Any]:
+    """从项目产物中提取汇总信息：接口数、相对上次契约的破坏性变更、一致性问题、各阶段状态"""
+    contract = read_json(output_dir / "contract.json")
+    prev = read_json(output_dir / ".contract.prev.json")
+    summary: Dict[str, Any] = {
+        "endpoints": len(contract.get("endpoints", [])) if contract else None,
+        "baseline": prev is not None,
+        "changes": {},
+        "breaking": [],
+        "consistencyIssues": consistency_issues(output_dir / "reports" / "consistency-report.md"),
+        "stages": {},
+    }
+    if contract and prev:
+        diff = diff_contracts(prev, contract)
+        for status in ("added", "modified", "removed"):
+            summary["changes"][status] = diff.count(status)
+        summary["breaking"] = [
+            {
+                "method": d.method, "path": d.path, "change": d.label(),
+                "details": [c.message for c in d.changes if c.breaking],
+            }
+            for d in diff.breaking
+        ]
+    # 只采用本次运行写出的指标（运行提前失败时留下的是上次的文件）
+    metrics_path = output_dir / "reports" / "workflow-metrics.json"
+    try:
+        fresh = metrics_path.stat().st_mtime >= started
+    except OSError:
+        fresh = False
+    metrics = read_json(metrics_path) if fresh else None
+    if metrics:
+        summary["stages"] = {s["name"]: s["status"] for s in metrics.get("stages", [])}
+    return summary
+
+
+def run_project(
+    config_path: Path, name: str, args: argparse.Namespace, env: Dict[str, str], log_dir: Path
+) -> Dict[str, Any]:
+    """运行单个项目并汇总结果；任何失败都记录在结果中而不抛出"""
+    result: Dict[str, Any] = {"name": name, "config": str(config_path), "status": "failed", "exitCode": None}
+    started = time.time()
+    try:
+        config = load_config(config_path)
+    except (OSError, ValueError) as e:
+        result["error"] = f"配置无效：{e}"
+        result["wall_s"] = 0.0
+        return result
+    output_dir = Path(config.get("output_dir", config["project_root"])).resolve()
+    result["projectName"] = config.get("project_name")
+    result["outputDir"] = str(output_dir)
+
+    cmd = [
+        sys.executable, str(Path(__file__).resolve().parent / "run_workflow.py"),
+        "--config", str(config_path), "--no-interactive",
+    ]
+    if args.force:
+        cmd.append("--force")
+    if args.in_process:
+        cmd.append("--in-process")
+    log_path = log_dir / f"{name.replace('/', '__')}.log"
+    try:
+        code, output, usage = spawn(cmd, capture=True, env=env)
+    except OSError as e:
+        code, output, usage = -1, f"[fleet] 无法启动：{e}\n", {}
+    log_path.parent.mkdir(parents=True, exist_ok=True)
+    log_path.write_text(output, encoding="utf-8")
+
+    result.update({
+        "status": "ok" if code == 0 else "failed",
+        "exitCode": code,
+        "wall_s": round(time.time() - started, 3),
+        "cpu_s": round(usage.get("cpu", 0.0), 3),
+        "peak_rss_kb": int(usage.get("peak_rss_kb", 0)),
+        "log": str(log_path),
+    })
+    if code != 0:
+        result["error"] = "\n".join(output.rstrip().splitlines()[-LOG_TAIL_LINES:])
+    result.update(project_summary(output_dir, started))
+    return result
+
+
+def fleet_markdown(report: Dict[str, Any]) -> str:
+    projects = report["projects"]
+    totals = report["totals"]
+    lines = [
+        "# 多项目工作流汇总",
+        "",
+        f"- 生成时间：`{report['generatedAt']}`",
+        f"- 项目数：`{totals['projects']}`（成功 `{totals['ok']}`，失败 `{totals['failed']}`）",
+        f"- 接口总数：`{totals['endpoints']}`",
+        f"- 破坏性变更：`{totals['breaking']}`（涉及 `{totals['breakingProjects']}` 个项目）",
+        f"- 一致性问题：`{totals['consistencyIssues']}`",
+        f"- 总耗时：`{report['wall_s']:.2f}s`，并发 `{report['jobs']}`",
+        f"- 共享扫描缓存：`{report['scanCache'] or '未启用'}`",
+        "",
+        "| 项目 | 状态 | 耗时 (s) | 接口数 | 变更（新增 / 修改 / 删除） | 破坏性变更 | 一致性问题 | 未完成阶段 |",
+        "|------|------|----------|--------|----------------------------|------------|------------|------------|",
+    ]
+    for p in projects:
+        status = "✅ 成功" if p["status"] == "ok" else f"❌ 失败（{p['exitCode']}）"
+        changes = p.get("changes") or {}
+        change_cell = f"{changes['added']} / {changes['modified']} / {changes['removed']}" if changes else "—"
+        unfinished = [k for k, v in (p.get("stages") or {}).items() if v in ("failed", "blocked")]
+        lines.append(
+            f"| {p['name']} | {status} | {p.get('wall_s', 0):.2f} | {_cell(p.get('endpoints'))} | {change_cell} "
+            f"| {len(p.get('breaking', []))} | {_cell(p.get('consistencyIssues'))} | {', '.join(unfinished) or '—'} |"
+        )
+    lines.append("")
+
+    broken = [p for p in projects if p.get("breaking")]
+    if broken:
+        lines.append("## 破坏性变更")
+        lines.append("")
+        for p in broken:
+            lines.append(f"### {p['name']}")
+            lines.append("")
+            for b in p["breaking"]:
+                lines.append(f"- `{b['method']}` `{b['path']}` {b['change']}")
+                lines.extend(f"  - {d}" for d in b["details"])
+            lines.append("")
+
+    failed = [p for p in projects if p["status"] != "ok"]
+    if failed:
+        lines.append("## 失败项目")
+        lines.append("")
+        for p in failed:
+            lines.append(f"### {p['name']}")
+            lines.append("")
+            lines.append(f"- 配置：`{p['config']}`")
+            if p.get("log"):
+                lines.append(f"- 日志：`{p['log']}`")
+            lines.append("")
+            lines.append("```")
+            lines.append(p.get("error", ""))
+            lines.append("```")
+            lines.append("")
+    return "\n".join(lines)
+
+
+def _cell(v: Optional[int]) -> str:
+    return "—" if v is None else str(v)
+
+
+def write_fleet_report(output_dir: Path, report: Dict[str, Any]) -> Tuple[Path, Path]:
+    json_path = output_dir / "fleet-report.json"
+    md_path = output_dir / "fleet-report.md"
+    writer = ArtifactWriter()
+    writer.write_text(json_path, json.dumps(report, ensure_ascii=False, indent=2) + "\n")
+    writer.write_text(md_path, fleet_markdown(report))
+    return json_path, md_path
+
+
+def run(args: argparse.Namespace) -> int:
+    started = time.perf_counter()
+    output_dir = Path(args.output).resolve()
+    configs = discover_configs(args.configs)
+    if not configs:
+        print("[fleet] ❌ 未找到配置文件")
+        return 2
+    names = project_names(configs)
+    jobs = max(1, min(args.jobs, len(configs)))
+
+    env = dict(os.environ)
+    cache_dir = "" if args.no_scan_cache else str(Path(args.cache_dir or output_dir / ".cache" / "scan").resolve())
+    if cache_dir:
+        env[SCAN_CACHE_ENV] = cache_dir
+    print(f"[fleet] {len(configs)} 个项目，并发 {jobs}，共享扫描缓存：{cache_dir or '未启用'}")
+
+    results: Dict[Path, Dict[str, Any]] = {}
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        futures = {
+            pool.submit(run_project, c, names[c], args, env, output_dir / "logs"): c for c in configs
+        }
+        for future in as_completed(futures):
+            config_path = futures[future]
+            try:
+                r = future.result()
+            except Exception as e:  # 汇总阶段的意外错误同样只影响该项目
+                r = {"name": names[config_path], "config": str(config_path), "status": "failed",
+                     "exitCode": None, "error": repr(e)}
+            results[config_path] = r
+            if r["status"] == "ok":
+                print(
+                    f"[fleet] ✅ {r['name']}：{r.get('wall_s', 0):.1f}s，接口 {_cell(r.get('endpoints'))}，"
+                    f"破坏性变更 {len(r.get('breaking', []))}，一致性问题 {_cell(r.get('consistencyIssues'))}"
+                )
+            else:
+                where = f"，日志 {r['log']}" if r.get("log") else ""
+                print(f"[fleet] ❌ {r['name']}：失败（退出码 {r.get('exitCode')}）{where}")
+                if not r.get("log") and r.get("error"):
+                    print(f"[fleet]    {r['error']}")
+
+    projects = [results[c] for c in configs]
+    ok = [p for p in projects if p["status"] == "ok"]
+    report = {
+        "version": FLEET_VERSION,
+        "generatedAt": datetime.now(timezone.utc).isoformat(),
+        "wall_s": round(time.perf_counter() - started, 3),
+        "jobs": jobs,
+        "scanCache": cache_dir,
+        "totals": {
+            "projects": len(projects),
+            "ok": len(ok),
+            "failed": len(projects) - len(ok),
+            "endpoints": sum(p.get("endpoints") or 0 for p in projects),
+            "breaking": sum(len(p.get("breaking", [])) for p in projects),
+            "breakingProjects": sum(1 for p in projects if p.get("breaking")),
+            "consistencyIssues": sum(p.get("consistencyIssues") or 0 for p in projects),
+        },
+        "projects": projects,
+    }
+    _, md_path = write_fleet_report(output_dir, report)
+    totals = report["totals"]
+    print(
+        f"[fleet] 完成：成功 {totals['ok']}，失败 {totals['failed']}，接口 {totals['endpoints']}，"
+        f"破坏性变更 {totals['breaking']}，耗时 {report['wall_s']:.1f}s"
+    )
+    print(f"[fleet] 汇总报告：{md_path}")
+    return 1 if totals["failed"] else 0
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    return run(parse_args(argv))
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
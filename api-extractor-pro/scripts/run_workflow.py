@@ -8,17 +8,42 @@ run_workflow.py — 流水线主控
 2) 再使用本工作流统一生成接口治理产物
 """
 import argparse
+import importlib
+import io
 import json
-import subprocess
 import sys
+import time
+import traceback
+from contextlib import redirect_stdout
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Any, Dict, List, Tuple
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+import tracing
+from contract_diff import STATUS_LABELS, diff_contracts
+from contract_store import record_contract, store_dir
+from generate_docs import SPEC_FORMATS
+from metrics import build_metrics, measure_in_process, spawn, stage_record, stopwatch, write_metrics
+from pipeline import PipelineState, Stage, run_pipeline, select_stages, stage_fingerprint
+from scan import IncrementalScan, parse_csv, scan_inputs, write_result
+from watch import watch
 
 
 def parse_args() -> argparse.Namespace:
     parser = argparse.ArgumentParser(description="运行前端 API 工作流")
     parser.add_argument("--config", required=True, help="JSON 配置文件路径")
+    parser.add_argument("--in-process", action="store_true", help="在当前进程内调用各阶段，扫描结果与契约在内存中传递")
+    parser.add_argument("--force", action="store_true", help="忽略阶段指纹，重新运行全部（或 --only 选中的）阶段")
+    parser.add_argument("--only", default="", help="只运行指定阶段及其上游依赖，逗号分隔：scan,contract,msw,docs,check,diff")
+    parser.add_argument("--jobs", type=int, default=2, help="可并行阶段的最大并发数（子进程模式）")
+    parser.add_argument("--metrics-history", default="", help="追加每次运行指标的历史文件（JSON Lines），用于跟踪性能回退")
+    parser.add_argument("--no-interactive", action="store_true", help="忽略配置中的 interactive，不等待确认（批量运行时使用）")
+    parser.add_argument("--watch", action="store_true", help="完成后持续监听扫描范围内的文件变化，增量更新受影响的模块")
+    parser.add_argument("--watch-interval", type=float, default=0.2, help="--watch 的轮询间隔（秒）")
+    parser.add_argument(
+        "--trace", default="",
+        help=f"输出 Chrome trace 追踪文件，子进程阶段的追踪合并到同一时间线（也可用环境变量 {tracing.TRACE_ENV}）",
+    )
     return parser.parse_args()
 
 
@@ -35,6 +60,8 @@ def load_config(path: Path) -> Dict[str, Any]:
     config.setdefault("project_name", "项目")
     config.setdefault("strict_mode", False)
     config.setdefault("interactive", False)
+    config.setdefault("docs_split", False)
+    config.setdefault("in_process", False)
     return config
 
 
@@ -47,19 +74,83 @@ def list_to_csv(v: Any) -> str:
     return ""
 
 
-def run_cmd(cmd: List[str], label: str) -> int:
-    """运行子命令"""
+def openapi_path(config: Dict[str, Any], output_dir: Path) -> Path:
+    """一致性校验读取的 OpenAPI 文件：docs_formats 中的第一个格式（默认 YAML）"""
+    formats = parse_csv(list_to_csv(config.get("docs_formats"))) or ["yaml"]
+    return output_dir / "docs" / SPEC_FORMATS.get(formats[0], SPEC_FORMATS["yaml"])
+
+
+def generated_dirs(config: Dict[str, Any], output_dir: Path) -> List[Path]:
+    """工作流写出的目录：输出目录位于项目内（缺省即项目根目录）时，扫描须跳过，否则生成的 handler 会被当作调用点"""
+    dirs = [output_dir / "mock", output_dir / "docs", output_dir / "reports"]
+    history = store_dir(config, output_dir)
+    return dirs + ([history] if history is not None else [])
+
+
+def run_cmd(
+    cmd: List[str], label: str, capture: bool = False, usage: Optional[Dict[str, float]] = None,
+    env: Optional[Dict[str, str]] = None,
+) -> int:
+    """运行子命令；capture 时收集输出，结束后整体打印（并行阶段的日志不交错）
+
+    usage 用于回传子进程的 CPU 时间与峰值内存
+    """
+    banner = f"\n{'='*60}\n[workflow] {label}\n[workflow] cmd: {' '.join(cmd)}\n{'='*60}"
+    if not capture:
+        print(banner)
+    returncode, output, stats = spawn(cmd, capture, env)
+    if capture:
+        print(f"{banner}\n{output}", end="" if output.endswith("\n") else "\n")
+    if usage is not None:
+        usage.update(stats)
+    if returncode != 0:
+        print(f"[workflow] ❌ {label} 失败（退出码 {returncode}）")
+        return returncode
+    print(f"[workflow] ✅ {label} 完成")
+    return 0
+
+
+def run_in_process(
+    module_name: str, argv: List[str], label: str, usage: Optional[Dict[str, float]] = None, **inputs: Any
+) -> Tuple[int, Any]:
+    """进程内运行阶段：导入脚本模块并调用 run(args, **inputs)，返回 (退出码, 阶段结果)"""
     print(f"\n{'='*60}")
     print(f"[workflow] {label}")
-    print(f"[workflow] cmd: {' '.join(cmd)}")
+    print(f"[workflow] 进程内：{module_name}.run {' '.join(argv)}")
     print(f"{'='*60}")
 
-    result = subprocess.run(cmd)
-    if result.returncode != 0:
-        print(f"[workflow] ❌ {label} 失败（退出码 {result.returncode}）")
-        return result.returncode
+    script_dir = str(Path(__file__).resolve().parent)
+    if script_dir not in sys.path:
+        sys.path.insert(0, script_dir)
+    result: Any = None
+    try:
+        module = importlib.import_module(module_name)
+        with measure_in_process(usage if usage is not None else {}):
+            result = module.run(module.parse_args(argv), **inputs)
+        code = result if isinstance(result, int) else 0
+    except SystemExit as e:
+        code = e.code if isinstance(e.code, int) else 1
+    except Exception:
+        traceback.print_exc()
+        code = 1
+    if code != 0:
+        print(f"[workflow] ❌ {label} 失败（退出码 {code}）")
+        return code, None
     print(f"[workflow] ✅ {label} 完成")
-    return 0
+    return 0, result
+
+
+def run_stage(
+    module_name: str, argv: List[str], label: str, in_process: bool, capture: bool = False,
+    usage: Optional[Dict[str, float]] = None, **inputs: Any
+) -> Tuple[int, Any]:
+    """按模式运行阶段：子进程模式下 inputs 被忽略，阶段结果为 None（由下游读取文件）"""
+    if in_process:
+        return run_in_process(module_name, argv, label, usage, **inputs)
+    script = Path(__file__).resolve().parent / f"{module_name}.py"
+    # 追踪开启时子进程写入 <trace>.<模块>.part，结束时由 tracing.save() 合并
+    env = tracing.child_env(tracing.part_path(module_name)) if tracing.enabled() else None
+    return run_cmd([sys.executable, str(script)] + argv, label, capture, usage, env), None
 
 
 def endpoint_map(contract: Dict) -> Dict[Tuple[str, str], Dict]:
@@ -71,101 +162,66 @@ def endpoint_map(contract: Dict) -> Dict[Tuple[str, str], Dict]:
     return out
 
 
-def classify_change(old: Dict, new: Dict) -> str:
-    """分类变更类型"""
-    if not old and new:
-        return "non-breaking（新增接口）"
-    if old and not new:
-        return "⚠️ breaking（删除接口）"
-
-    old_params = {p.get("name") for p in old.get("pathParams", []) + old.get("query", [])}
-    new_params = {p.get("name") for p in new.get("pathParams", []) + new.get("query", [])}
-    if not old_params.issubset(new_params):
-        return "⚠️ breaking（参数移除）"
-
-    return "non-breaking（兼容更新）"
-
-
-def generate_diff_report(prev_path: Path, curr_path: Path, report_path: Path) -> None:
-    """生成变更报告"""
-    curr = json.loads(curr_path.read_text(encoding="utf-8"))
+def generate_diff_report(prev_path: Path, curr_path: Path, report_path: Path, curr: Optional[Dict] = None) -> None:
+    """生成变更报告（curr 为内存中的当前契约，缺省时读取 curr_path）"""
+    if curr is None:
+        curr = json.loads(curr_path.read_text(encoding="utf-8"))
     prev = json.loads(prev_path.read_text(encoding="utf-8")) if prev_path.exists() else {"endpoints": []}
-
-    prev_map = endpoint_map(prev)
-    curr_map = endpoint_map(curr)
-    keys = sorted(set(prev_map.keys()) | set(curr_map.keys()))
+    diff = diff_contracts(prev, curr)
 
     lines: List[str] = []
     lines.append("# 接口变更报告")
     lines.append("")
     lines.append(f"- 生成时间：`{datetime.now(timezone.utc).isoformat()}`")
-    lines.append(f"- 上次接口数：`{len(prev_map)}`")
-    lines.append(f"- 当前接口数：`{len(curr_map)}`")
+    lines.append(f"- 上次接口数：`{diff.old_total}`")
+    lines.append(f"- 当前接口数：`{diff.new_total}`")
+    lines.append(
+        f"- 比较：共有接口语义一致 `{diff.unchanged}`，字段级比较 `{diff.stats['compared']}` 个接口"
+        f"（`{diff.stats['sections']}` 个分段）；来源位置、示例与说明的变化不计入"
+    )
     lines.append("")
 
-    added = removed = modified = 0
-
-    if not keys:
+    if not diff.old_total and not diff.new_total:
         lines.append("暂无接口数据。")
+    elif not diff.endpoints:
+        lines.append("✅ 接口无变化。")
     else:
         lines.append("| 状态 | Method | Path | 变更类型 |")
         lines.append("|------|--------|------|----------|")
-
-        for method, path in keys:
-            old = prev_map.get((method, path))
-            new = curr_map.get((method, path))
-            cls = classify_change(old, new)
-
-            if old and not new:
-                status = "🔴 删除"
-                removed += 1
-            elif not old and new:
-                status = "🟢 新增"
-                added += 1
-            elif old != new:
-                status = "🟡 修改"
-                modified += 1
-            else:
-                status = "⚪ 未变"
-
-            lines.append(f"| {status} | `{method}` | `{path}` | {cls} |")
-
+        for d in diff.endpoints:
+            lines.append(f"| {STATUS_LABELS[d.status]} | `{d.method}` | `{d.path}` | {d.label()} |")
         lines.append("")
-        lines.append(f"**汇总**：新增 {added}、修改 {modified}、删除 {removed}")
+        lines.append(
+            f"**汇总**：新增 {diff.count('added')}、修改 {diff.count('modified')}、删除 {diff.count('removed')}、"
+            f"未变 {diff.unchanged}；破坏性变更 {len(diff.breaking)}"
+        )
+
+        modified = [d for d in diff.endpoints if d.changes]
+        if modified:
+            lines.append("")
+            lines.append("## 变更明细")
+            for d in modified:
+                lines.append("")
+                lines.append(f"### `{d.method}` `{d.path}`")
+                lines.append("")
+                for c in d.changes:
+                    lines.append(f"- {'⚠️' if c.breaking else '✅'} {c.message}")
 
     report_path.parent.mkdir(parents=True, exist_ok=True)
     report_path.write_text("\n".join(lines) + "\n", encoding="utf-8")
     print(f"[workflow] 变更报告：{report_path}")
 
 
-def main() -> int:
-    args = parse_args()
-    script_dir = Path(__file__).resolve().parent
-    config = load_config(Path(args.config).resolve())
-
+def build_stages(config: Dict[str, Any], output_dir: Path) -> List[Stage]:
+    """工作流 DAG：scan → contract → (msw ∥ docs) → check；diff 只依赖 contract"""
     project_root = Path(config["project_root"]).resolve()
-    output_dir = Path(config.get("output_dir", project_root)).resolve()
-    output_dir.mkdir(parents=True, exist_ok=True)
-
     scan_result = output_dir / "scan_result.json"
     contract_path = output_dir / "contract.json"
     prev_contract = output_dir / ".contract.prev.json"
-
-    # 保存上次契约
-    if contract_path.exists():
-        prev_contract.write_text(contract_path.read_text(encoding="utf-8"), encoding="utf-8")
-        print("[workflow] 已备份上次契约")
-
-    print(f"\n{'#'*60}")
-    print(f"# API Extractor Pro — 全流程工作流")
-    print(f"# 项目：{project_root}")
-    print(f"# 输出：{output_dir}")
-    print(f"{'#'*60}")
+    reports_dir = output_dir / "reports"
 
     # ---- 阶段 1：扫描 ----
     scan_cmd = [
-        sys.executable,
-        str(script_dir / "scan.py"),
         "--project-root", str(project_root),
         "--output", str(scan_result),
     ]
@@ -175,15 +231,13 @@ def main() -> int:
     entry_hints = list_to_csv(config.get("entry_hints", []))
     if entry_hints:
         scan_cmd.extend(["--entry-hints", entry_hints])
-
-    ret = run_cmd(scan_cmd, "阶段 1：扫描分析")
-    if ret != 0:
-        return ret
+    generated = generated_dirs(config, output_dir)
+    scan_cmd.extend(["--exclude", ",".join(str(d) for d in generated)])
+    if config.get("scan_cache"):
+        scan_cmd.extend(["--cache-dir", str(Path(config["scan_cache"]).resolve())])
 
     # ---- 阶段 2：生成契约 ----
     contract_cmd = [
-        sys.executable,
-        str(script_dir / "build_contract.py"),
         "--scan-result", str(scan_result),
         "--auth-mode", config.get("auth_mode", "bearer"),
         "--output", str(contract_path),
@@ -191,77 +245,326 @@ def main() -> int:
     if config.get("strict_mode"):
         contract_cmd.append("--strict-mode")
 
-    ret = run_cmd(contract_cmd, "阶段 2：生成契约")
-    if ret != 0:
-        return ret
-
-    # ---- 阶段 3：用户确认（交互模式）----
-    if config.get("interactive"):
-        print("\n[workflow] ⏳ 阶段 3：等待用户确认")
-        print("[workflow] 请查看 contract.json，确认后按 Enter 继续...")
-        try:
-            input()
-        except (EOFError, KeyboardInterrupt):
-            print("\n[workflow] 用户取消")
-            return 1
-
     # ---- 阶段 4：生成 MSW Mock ----
     msw_cmd = [
-        sys.executable,
-        str(script_dir / "generate_msw.py"),
         "--contract", str(contract_path),
         "--output-root", str(output_dir),
     ]
-    ret = run_cmd(msw_cmd, "阶段 4：生成 MSW Mock")
-    if ret != 0:
-        return ret
 
     # ---- 阶段 5：生成文档 ----
     docs_cmd = [
-        sys.executable,
-        str(script_dir / "generate_docs.py"),
         "--contract", str(contract_path),
         "--output-root", str(output_dir),
         "--project-name", config.get("project_name", "项目"),
     ]
-    ret = run_cmd(docs_cmd, "阶段 5：生成接口文档")
-    if ret != 0:
-        return ret
+    if config.get("docs_split"):
+        docs_cmd.append("--split")
+    if config.get("docs_formats"):
+        docs_cmd.extend(["--formats", list_to_csv(config["docs_formats"])])
 
     # ---- 阶段 6：一致性校验 ----
     consistency_cmd = [
-        sys.executable,
-        str(script_dir / "check_consistency.py"),
         "--contract", str(contract_path),
-        "--openapi", str(output_dir / "docs" / "openapi.yaml"),
+        "--openapi", str(openapi_path(config, output_dir)),
         "--handlers", str(output_dir / "mock" / "handlers"),
-        "--report", str(output_dir / "reports" / "consistency-report.md"),
+        "--report", str(reports_dir / "consistency-report.md"),
     ]
     if config.get("strict_mode"):
         consistency_cmd.append("--strict-mode")
-
-    ret = run_cmd(consistency_cmd, "阶段 6：一致性校验")
-    if ret != 0 and config.get("strict_mode"):
-        return ret
+    lint_plugins = config.get("lint_plugins")
+    if lint_plugins:
+        consistency_cmd.extend(["--lint-plugins", list_to_csv(lint_plugins)])
+    if config.get("lint_rules"):
+        consistency_cmd.extend(["--lint-rules", list_to_csv(config["lint_rules"])])
+    if config.get("lint_skip_rules"):
+        consistency_cmd.extend(["--skip-rules", list_to_csv(config["lint_skip_rules"])])
+    plugin_files = [Path(p) for p in list_to_csv(lint_plugins).split(",") if p] if lint_plugins else []
 
     # ---- 阶段 7：变更报告 ----
-    print(f"\n{'='*60}")
-    print("[workflow] 阶段 7：生成变更报告")
-    print(f"{'='*60}")
-    generate_diff_report(prev_contract, contract_path, output_dir / "reports" / "api-diff.md")
+    def diff_report(upstream: Dict[str, Any]) -> int:
+        print(f"\n{'='*60}")
+        print("[workflow] 阶段 7：生成变更报告")
+        print(f"{'='*60}")
+        generate_diff_report(prev_contract, contract_path, reports_dir / "api-diff.md", upstream.get("contract"))
+        return 0
+
+    return [
+        Stage("scan", "阶段 1：扫描分析", [], scan_inputs(project_root, parse_csv(scope), generated), [scan_result],
+              module="scan", argv=scan_cmd),
+        Stage("contract", "阶段 2：生成契约", ["scan"], [scan_result], [contract_path],
+              module="build_contract", argv=contract_cmd, objects={"scan_result": "scan"}),
+        Stage("msw", "阶段 4：生成 MSW Mock", ["contract"], [contract_path], [output_dir / "mock"],
+              module="generate_msw", argv=msw_cmd, objects={"contract": "contract"}),
+        Stage("docs", "阶段 5：生成接口文档", ["contract"], [contract_path], [output_dir / "docs"],
+              module="generate_docs", argv=docs_cmd, objects={"contract": "contract"}),
+        Stage("check", "阶段 6：一致性校验", ["msw", "docs"],
+              [contract_path, output_dir / "docs", output_dir / "mock" / "handlers"] + plugin_files,
+              [reports_dir / "consistency-report.md"],
+              module="check_consistency", argv=consistency_cmd, objects={"contract": "contract"},
+              fatal=bool(config.get("strict_mode"))),
+        Stage("diff", "阶段 7：生成变更报告", ["contract"], [prev_contract, contract_path], [reports_dir / "api-diff.md"],
+              objects={"contract": "contract"}, action=diff_report),
+    ]
+
+
+def affected_modules(old: Optional[Dict], new: Dict) -> Set[str]:
+    """契约变化影响的模块：接口列表有变化的模块，以及与之共享路径的模块（拆分文档中路径片段的归属可能随之改变）；
+    meta（生成时间与接口总数除外）变化时为全部模块"""
+    def group(contract: Optional[Dict]) -> Dict[str, List[Dict]]:
+        modules: Dict[str, List[Dict]] = {}
+        for ep in (contract or {}).get("endpoints", []):
+            modules.setdefault(ep.get("module", "default"), []).append(ep)
+        return modules
+
+    def meta(contract: Optional[Dict]) -> Dict:
+        return {k: v for k, v in (contract or {}).get("meta", {}).items() if k not in ("generatedAt", "totalEndpoints")}
+
+    old_modules, new_modules = group(old), group(new)
+    if old is None or meta(old) != meta(new):
+        return set(old_modules) | set(new_modules)
+    changed = {m for m in set(old_modules) | set(new_modules) if old_modules.get(m) != new_modules.get(m)}
+    paths = {ep.get("path") for m in changed for ep in old_modules.get(m, []) + new_modules.get(m, [])}
+    changed |= {m for m, eps in new_modules.items() if any(ep.get("path") in paths for ep in eps)}
+    return changed
+
+
+class WatchSession:
+    """--watch 模式的常驻状态：增量扫描器、契约端点缓存与上一轮契约；各阶段在当前进程内调用"""
+
+    def __init__(self, config: Dict[str, Any], output_dir: Path, state: PipelineState):
+        self.config = config
+        self.output_dir = output_dir
+        self.state = state
+        script_dir = str(Path(__file__).resolve().parent)
+        if script_dir not in sys.path:
+            sys.path.insert(0, script_dir)
+        stages = {s.name: s for s in build_stages(config, output_dir)}
+        self.diff_action = stages["diff"].action
+        self.modules: Dict[str, Any] = {}
+        self.args: Dict[str, argparse.Namespace] = {}
+        for name in ("scan", "contract", "msw", "docs", "check"):
+            module = importlib.import_module(stages[name].module)
+            self.modules[name] = module
+            self.args[name] = module.parse_args(stages[name].argv)
+        scan_args = self.args["scan"]
+        # 排除工作流自身的输出目录：本轮写出的 handler 不应触发下一轮
+        self.scanner = IncrementalScan(
+            Path(scan_args.project_root), parse_csv(scan_args.scope), parse_csv(scan_args.entry_hints),
+            [Path(p) for p in parse_csv(scan_args.exclude)],
+        )
+        # 预热：扫描全部文件并构建一次端点缓存，之后每轮只处理变化部分
+        self.reuse: Dict[str, Dict] = {}
+        self.modules["contract"].assemble_contract(self.args["contract"], self.scanner.update(), self.reuse)
+        contract_path = output_dir / "contract.json"
+        self.contract = json.loads(contract_path.read_text(encoding="utf-8")) if contract_path.exists() else None
+
+    def paths(self) -> List[Path]:
+        return scan_inputs(self.scanner.project_root, self.scanner.scopes, self.scanner.exclude)
+
+    def cycle(self, changed: Set[Path]) -> None:
+        """一轮增量更新：重新扫描变化的文件 → 修补契约 → 重新生成受影响模块的 Mock 与文档 → 校验与变更报告；
+        Mock 先于 scan_result.json、contract.json 等其余产物写出以尽快生效；各阶段输出只在失败时打印"""
+        started = time.perf_counter()
+        log = io.StringIO()
+        mock_elapsed: Optional[float] = None
+        check_code = 0
+        try:
+            with redirect_stdout(log):
+                scan_result = self.scanner.update(changed)
+                builder = self.modules["contract"]
+                contract = builder.assemble_contract(self.args["contract"], scan_result, self.reuse)
+                affected = affected_modules(self.contract, contract)
+                if affected:
+                    self.modules["msw"].run(self.args["msw"], contract, affected)
+                    mock_elapsed = time.perf_counter() - started
+                write_result(scan_result, Path(self.args["scan"].output))
+                builder.write_contract(contract, Path(self.args["contract"].output))
+                if affected:
+                    self.modules["docs"].run(self.args["docs"], contract, affected)
+                    check_code = self.modules["check"].run(self.args["check"], contract)
+                    self.diff_action({"contract": contract})
+        except Exception:
+            print(log.getvalue(), end="")
+            traceback.print_exc()
+            print("[watch] ❌ 本轮更新失败，等待下一次修改")
+            return
+        self.contract = contract
+
+        # 记录阶段指纹：退出监听后再运行工作流时各阶段直接跳过
+        for stage in build_stages(self.config, self.output_dir):
+            if stage.name == "check" and check_code != 0:
+                self.state.forget(stage.name)
+            else:
+                self.state.record(stage, stage_fingerprint(stage))
+        self.state.save()
+
+        names = ", ".join(sorted(affected)) or "无"
+        print(
+            f"[watch] {len(changed)} 个文件变化 → 重新扫描 {self.scanner.rescanned} 个，"
+            f"接口 {len(contract.get('endpoints', []))} 个，受影响模块：{names}"
+        )
+        timing = f"Mock 更新 {mock_elapsed:.2f}s，" if mock_elapsed is not None else ""
+        print(f"[watch] ✅ {timing}全部完成 {time.perf_counter() - started:.2f}s")
+        if check_code != 0:
+            print("[watch] ⚠️ 一致性校验发现问题，见 reports/consistency-report.md")
+
+
+def run_watch(config: Dict[str, Any], output_dir: Path, state: PipelineState, interval: float) -> int:
+    session = WatchSession(config, output_dir, state)
+    scopes = session.scanner.scopes
+    print(f"\n[watch] 👀 监听 {session.scanner.project_root}（{scopes or '全项目'}）的变化，Ctrl+C 退出")
+    try:
+        watch(session.paths, session.cycle, interval=interval)
+    except KeyboardInterrupt:
+        print("\n[watch] 已停止监听")
+    return 0
+
+
+def make_runner(
+    in_process: bool, capture: bool, usages: Dict[str, Dict[str, float]]
+) -> Callable[[Stage, Dict[str, Any]], Tuple[int, Any]]:
+    """阶段执行器：脚本阶段按模式在子进程或进程内运行，其余阶段调用 action；资源占用记入 usages"""
+    def runner(stage: Stage, upstream: Dict[str, Any]) -> Tuple[int, Any]:
+        usage = usages.setdefault(stage.name, {})
+        with stopwatch(usage), tracing.span(f"stage.{stage.name}", "stage", label=stage.label):
+            if stage.action is None:
+                return run_stage(
+                    stage.module, stage.argv, stage.label, in_process, capture=capture, usage=usage, **upstream
+                )
+            try:
+                with measure_in_process(usage):
+                    return stage.action(upstream), None
+            except Exception:
+                traceback.print_exc()
+                return 1, None
+    return runner
+
+
+def endpoint_counts(scan_result: Path, contract_path: Path) -> Tuple[Optional[int], Optional[int]]:
+    """(扫描到的调用数, 契约接口数)，文件缺失时为 None"""
+    counts: List[Optional[int]] = []
+    for path, key in ((scan_result, "matches"), (contract_path, "endpoints")):
+        try:
+            counts.append(len(json.loads(path.read_text(encoding="utf-8")).get(key, [])))
+        except (OSError, ValueError):
+            counts.append(None)
+    return counts[0], counts[1]
+
+
+def report_metrics(
+    config: Dict[str, Any], output_dir: Path, stages: List[Stage], statuses: Dict[str, str],
+    usages: Dict[str, Dict[str, float]], in_process: bool, wall: float, history: str,
+) -> None:
+    """写出 reports/workflow-metrics.json / .md，可选追加历史记录"""
+    scan_count, contract_count = endpoint_counts(output_dir / "scan_result.json", output_dir / "contract.json")
+    records = [
+        stage_record(
+            s.name, s.label, statuses[s.name], usages.get(s.name), s.inputs, s.outputs,
+            scan_count if s.name == "scan" else contract_count,
+        )
+        for s in stages if s.name in statuses
+    ]
+    metrics = build_metrics("in-process" if in_process else "subprocess", config["project_root"], wall, records)
+    _, md_path = write_metrics(output_dir / "reports", metrics, Path(history) if history else None)
+    print(f"[workflow] 性能指标：{md_path}")
+
+
+def main() -> int:
+    args = parse_args()
+    with tracing.session(args.trace, "run_workflow"):
+        return run(args)
+
+
+def run(args: argparse.Namespace) -> int:
+    started = time.perf_counter()
+    config = load_config(Path(args.config).resolve())
+    in_process = args.in_process or bool(config.get("in_process"))
+    # 进程内模式共享解释器与标准输出，阶段串行执行
+    jobs = 1 if in_process else max(1, args.jobs)
+
+    project_root = Path(config["project_root"]).resolve()
+    output_dir = Path(config.get("output_dir", project_root)).resolve()
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    scan_result = output_dir / "scan_result.json"
+    contract_path = output_dir / "contract.json"
+    prev_contract = output_dir / ".contract.prev.json"
+
+    # 保存上次契约
+    if contract_path.exists():
+        prev_contract.write_text(contract_path.read_text(encoding="utf-8"), encoding="utf-8")
+        print("[workflow] 已备份上次契约")
+
+    print(f"\n{'#'*60}")
+    print(f"# API Extractor Pro — 全流程工作流")
+    print(f"# 项目：{project_root}")
+    print(f"# 输出：{output_dir}")
+    print(f"{'#'*60}")
+
+    stages = build_stages(config, output_dir)
+    only = parse_csv(args.only)
+    try:
+        selected = select_stages(stages, only)
+    except ValueError as e:
+        print(f"[workflow] ❌ {e}")
+        return 2
+    state = PipelineState(output_dir / "reports" / ".cache" / "workflow-state.json")
+    usages: Dict[str, Dict[str, float]] = {}
+    runner = make_runner(in_process, jobs > 1, usages)
+    statuses: Dict[str, str] = {}
+    done: List[str] = []
+    history = args.metrics_history or config.get("metrics_history", "")
+
+    # ---- 阶段 3：用户确认（交互模式）----
+    if config.get("interactive") and not args.no_interactive and "contract" in selected:
+        ret, statuses = run_pipeline(stages, runner, state, jobs, args.force, ["contract"])
+        if ret != 0:
+            return ret
+        print("\n[workflow] ⏳ 阶段 3：等待用户确认")
+        print("[workflow] 请查看 contract.json，确认后按 Enter 继续...")
+        try:
+            input()
+        except (EOFError, KeyboardInterrupt):
+            print("\n[workflow] 用户取消")
+            return 1
+        # 确认期间可能手工修改了 contract.json：记为契约阶段的输出，后续阶段重新读取
+        contract_stage = next(s for s in stages if s.name == "contract")
+        state.record(contract_stage, stage_fingerprint(contract_stage))
+        state.save()
+        done = list(statuses)
+
+    ret, more = run_pipeline(stages, runner, state, jobs, args.force, only, done=done)
+    statuses.update({k: v for k, v in more.items() if k not in done})
+    if statuses.get("contract") != "failed":
+        try:
+            record_contract(config, output_dir)
+        except (OSError, ValueError) as e:
+            print(f"[workflow] ⚠️ 契约历史记录失败：{e}")
+    report_metrics(config, output_dir, stages, statuses, usages, in_process, time.perf_counter() - started, history)
+    if args.watch:
+        return run_watch(config, output_dir, state, args.watch_interval)
+    if ret != 0:
+        return ret
 
     # ---- 完成 ----
+    labels = {"ran": "运行", "skipped": "跳过（未变化）", "failed": "失败", "blocked": "未执行"}
     print(f"\n{'#'*60}")
     print("# ✅ 全流程完成！")
     print(f"#")
+    print(f"# 阶段状态：")
+    for stage in stages:
+        if stage.name in statuses:
+            print(f"#   {stage.name:<9}{labels[statuses[stage.name]]}")
+    print(f"#")
     print(f"# 产物清单：")
     print(f"#   扫描结果：   {scan_result}")
     print(f"#   接口契约：   {contract_path}")
     print(f"#   MSW Mock：   {output_dir / 'mock/'}")
     print(f"#   接口文档：   {output_dir / 'docs/api-docs.md'}")
-    print(f"#   OpenAPI：    {output_dir / 'docs/openapi.yaml'}")
+    print(f"#   OpenAPI：    {openapi_path(config, output_dir)}")
     print(f"#   一致性报告： {output_dir / 'reports/consistency-report.md'}")
     print(f"#   变更报告：   {output_dir / 'reports/api-diff.md'}")
+    print(f"#   性能指标：   {output_dir / 'reports/workflow-metrics.md'}")
     print(f"{'#'*60}")
 
     return 0
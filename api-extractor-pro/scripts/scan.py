@@ -7,9 +7,12 @@ import argparse
 import json
 import os
 import re
-from dataclasses import asdict, dataclass, field
+from dataclasses import asdict, dataclass, field, replace
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import tracing
+from artifacts import ArtifactWriter, sha256_bytes, sha256_file
 
 
 # =====================================================
@@ -17,6 +20,7 @@ from typing import Any, Dict, List, Optional
 # =====================================================
 TEXT_EXT = {".js", ".ts", ".jsx", ".tsx", ".vue", ".wxml"}
 IGNORE_DIRS = {"node_modules", "dist", "build", ".git", "coverage", "__tests__", ".nuxt", ".output", ".cache", ".next"}
+SCAN_CACHE_ENV = "API_EXTRACTOR_SCAN_CACHE"
 
 # =====================================================
 # 匹配模式：6 大类
@@ -90,13 +94,19 @@ class ScanResult:
     matches: List[Dict[str, Any]] = field(default_factory=list)
 
 
-def parse_args() -> argparse.Namespace:
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
     parser = argparse.ArgumentParser(description="扫描前端项目中的 API 调用")
     parser.add_argument("--project-root", required=True, help="项目根目录")
     parser.add_argument("--scope", default="", help="扫描范围（逗号分隔目录）")
     parser.add_argument("--entry-hints", default="", help="API 封装层目录提示（逗号分隔）")
     parser.add_argument("--output", default="", help="输出文件路径（默认：项目根目录下 scan_result.json）")
-    return parser.parse_args()
+    parser.add_argument("--exclude", default="", help="不扫描的目录（逗号分隔，相对项目根目录，如输出目录在项目内时生成的 mock/、docs/）")
+    parser.add_argument(
+        "--cache-dir", default="",
+        help=f"按文件内容共享的扫描缓存目录，可供多个项目共用（也可用环境变量 {SCAN_CACHE_ENV}）",
+    )
+    parser.add_argument("--trace", default="", help=f"输出 Chrome trace 追踪文件（也可用环境变量 {tracing.TRACE_ENV}）")
+    return parser.parse_args(argv)
 
 
 def parse_csv(raw: str) -> List[str]:
@@ -150,27 +160,29 @@ def detect_framework(project_root: Path) -> str:
     return "未知"
 
 
-def detect_base_url(project_root: Path, files: List[Path]) -> str:
-    """检测 BaseURL 配置"""
-    patterns = ["baseURL", "BASE_URL", "VITE_API", "REACT_APP_API", "VUE_APP_API", "API_BASE"]
-    for fp in files:
-        try:
-            content = fp.read_text(encoding="utf-8", errors="ignore")
-        except OSError:
-            continue
-        for p in patterns:
-            if p in content:
-                # 提取包含该模式的行
-                for line in content.splitlines():
-                    if p in line:
-                        return line.strip()[:100]
-    # 检查 .env 文件
+BASE_URL_PATTERNS = ["baseURL", "BASE_URL", "VITE_API", "REACT_APP_API", "VUE_APP_API", "API_BASE"]
+AUTH_KEYWORDS = ["Authorization", "Bearer", "Access-Token", "interceptors.request"]
+
+
+def base_url_in(content: str) -> str:
+    """单个文件中的 BaseURL 配置行"""
+    for p in BASE_URL_PATTERNS:
+        if p in content:
+            # 提取包含该模式的行
+            for line in content.splitlines():
+                if p in line:
+                    return line.strip()[:100]
+    return ""
+
+
+def base_url_from_env(project_root: Path) -> str:
+    """从 .env 文件检测 BaseURL"""
     for env_file in [".env", ".env.local", ".env.development"]:
         env_path = project_root / env_file
         if env_path.exists():
             try:
                 for line in env_path.read_text(encoding="utf-8").splitlines():
-                    for p in patterns:
+                    for p in BASE_URL_PATTERNS:
                         if p in line:
                             return line.strip()
             except OSError:
@@ -178,21 +190,15 @@ def detect_base_url(project_root: Path, files: List[Path]) -> str:
     return ""
 
 
-def detect_auth(files: List[Path]) -> str:
-    """检测认证方式"""
-    auth_keywords = ["Authorization", "Bearer", "Access-Token", "interceptors.request"]
-    for fp in files:
-        try:
-            content = fp.read_text(encoding="utf-8", errors="ignore")
-        except OSError:
-            continue
-        for kw in auth_keywords:
-            if kw in content:
-                if "Bearer" in content:
-                    return "Bearer Token"
-                if "Access-Token" in content:
-                    return "Access-Token Header"
-                return f"检测到: {kw}"
+def auth_in(content: str) -> str:
+    """单个文件中检测到的认证方式"""
+    for kw in AUTH_KEYWORDS:
+        if kw in content:
+            if "Bearer" in content:
+                return "Bearer Token"
+            if "Access-Token" in content:
+                return "Access-Token Header"
+            return f"检测到: {kw}"
     return ""
 
 
@@ -210,15 +216,18 @@ def discover_api_dirs(project_root: Path) -> List[str]:
 # 文件遍历
 # =====================================================
 
-def iter_files(project_root: Path, scopes: List[str]) -> List[Path]:
-    """遍历目标文件"""
+def iter_files(project_root: Path, scopes: List[str], exclude: Iterable[Path] = ()) -> List[Path]:
+    """遍历目标文件；exclude 为不进入的目录（工作流自身生成的 mock/、docs/ 等输出目录）"""
     roots = [project_root / s for s in scopes] if scopes else [project_root]
+    skipped = {Path(p).resolve() for p in exclude}
     files: List[Path] = []
     for root in roots:
-        if not root.exists():
+        if not root.exists() or root.resolve() in skipped:
             continue
         for dirpath, dirnames, filenames in os.walk(root):
-            dirnames[:] = [d for d in dirnames if d not in IGNORE_DIRS]
+            dirnames[:] = [
+                d for d in dirnames if d not in IGNORE_DIRS and not (skipped and Path(dirpath, d) in skipped)
+            ]
             for filename in filenames:
                 p = Path(dirpath) / filename
                 if p.suffix in TEXT_EXT:
@@ -226,6 +235,18 @@ def iter_files(project_root: Path, scopes: List[str]) -> List[Path]:
     return files
 
 
+# 源码之外影响扫描结果的项目文件（框架识别、baseURL 检测）
+PROJECT_MARKER_FILES = [
+    "package.json", "next.config.js", "next.config.mjs", "next.config.ts", "nuxt.config.ts", "nuxt.config.js",
+    "vue.config.js", "vite.config.ts", "vite.config.js", ".env", ".env.local", ".env.development",
+]
+
+
+def scan_inputs(project_root: Path, scopes: List[str], exclude: Iterable[Path] = ()) -> List[Path]:
+    """扫描阶段的全部输入文件（run_workflow.py 据此判断是否需要重新扫描）"""
+    return sorted(iter_files(project_root, scopes, exclude)) + [project_root / f for f in PROJECT_MARKER_FILES]
+
+
 # =====================================================
 # 核心扫描逻辑
 # =====================================================
@@ -379,52 +400,93 @@ def dedupe_matches(matches: List[ScanMatch]) -> List[ScanMatch]:
 
 
 # =====================================================
-# 主函数
+# 单文件扫描与结果汇总（--watch 模式按文件增量复用）
 # =====================================================
 
-def main() -> int:
-    args = parse_args()
-    project_root = Path(args.project_root).resolve()
-    scopes = parse_csv(args.scope)
-    entry_hints = parse_csv(args.entry_hints)
-    output_path = Path(args.output) if args.output else project_root / "scan_result.json"
+@dataclass
+class FileScan:
+    """单个文件的扫描结果：API 调用（路径已转为相对项目根目录）+ BaseURL / 认证检测"""
+    matches: List[ScanMatch]
+    base_url: str = ""
+    auth: str = ""
 
-    print(f"[scan] 项目根目录：{project_root}")
-    print(f"[scan] 扫描范围：{scopes or '全项目'}")
 
-    # 项目结构分析
-    framework = detect_framework(project_root)
-    api_dirs = discover_api_dirs(project_root)
-    # 合并 entry_hints
-    for hint in entry_hints:
-        if hint not in api_dirs and (project_root / hint).is_dir():
-            api_dirs.append(hint)
+class ScanCache:
+    """内容寻址的逐文件扫描缓存：键为 (扫描器源码, 文件内容) 的哈希，与文件路径和所属项目无关，
+    多个项目（run_fleet.py 的并行子进程）可共用同一目录；条目原子写入，并发读写安全"""
 
-    # 收集文件
-    files = iter_files(project_root, scopes)
-    print(f"[scan] 文件数量：{len(files)}")
-    print(f"[scan] 框架：{framework}")
-    print(f"[scan] API 目录：{api_dirs or '未发现'}")
+    # 扫描规则变化（本文件被修改）时自动失效
+    SIGNATURE = (sha256_file(Path(__file__)) or "").encode("utf-8")
 
-    # 检测 baseURL 和认证
-    base_url = detect_base_url(project_root, files)
-    auth_pattern = detect_auth(files)
+    def __init__(self, root: Path):
+        self.root = Path(root)
+        self.writer = ArtifactWriter()
+        self.hits = 0
+        self.misses = 0
 
-    # 扫描所有文件
-    all_matches: List[ScanMatch] = []
-    for fp in files:
+    def key(self, content: str) -> str:
+        return sha256_bytes(self.SIGNATURE + content.encode("utf-8"))
+
+    def _entry(self, key: str) -> Path:
+        return self.root / key[:2] / f"{key}.json"
+
+    def get(self, key: str, rel_file: str) -> Optional[FileScan]:
         try:
-            content = fp.read_text(encoding="utf-8", errors="ignore")
+            data = json.loads(self._entry(key).read_text(encoding="utf-8"))
+            fs = FileScan([ScanMatch(file=rel_file, **m) for m in data["matches"]], data["base_url"], data["auth"])
+        except (OSError, ValueError, KeyError, TypeError):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return fs
+
+    def put(self, key: str, fs: FileScan) -> None:
+        matches = [{k: v for k, v in asdict(m).items() if k != "file"} for m in fs.matches]
+        data = {"matches": matches, "base_url": fs.base_url, "auth": fs.auth}
+        try:
+            self.writer.write_text(self._entry(key), json.dumps(data, ensure_ascii=False, separators=(",", ":")))
         except OSError:
-            continue
+            pass  # 缓存不可写时照常扫描
+
+
+def scan_path(fp: Path, project_root: Path, cache: Optional[ScanCache] = None) -> Optional[FileScan]:
+    """读取并扫描单个文件，文件不可读时返回 None；指定 cache 时内容相同的文件直接复用缓存结果"""
+    try:
+        content = fp.read_text(encoding="utf-8", errors="ignore")
+    except OSError:
+        return None
+    key = ""
+    if cache is not None:
+        key = cache.key(content)
+        try:
+            rel_file = str(fp.relative_to(project_root))
+        except ValueError:
+            rel_file = str(fp)
+        cached = cache.get(key, rel_file)
+        if cached is not None:
+            return cached
+    with tracing.span("scan.file", file=fp.name):
         file_matches = scan_file(fp, content)
-        # 转换为相对路径
-        for m in file_matches:
-            try:
-                m.file = str(Path(m.file).relative_to(project_root))
-            except ValueError:
-                pass
-        all_matches.extend(file_matches)
+    # 转换为相对路径
+    for m in file_matches:
+        try:
+            m.file = str(Path(m.file).relative_to(project_root))
+        except ValueError:
+            pass
+    fs = FileScan(file_matches, base_url_in(content), auth_in(content))
+    if cache is not None:
+        cache.put(key, fs)
+    return fs
+
+
+def assemble_result(
+    project_root: Path, framework: str, api_dirs: List[str], files: List[Path], scans: Dict[Path, FileScan]
+) -> ScanResult:
+    """按文件顺序汇总各文件扫描结果：排序、去重、过滤非 API 路径（不修改 scans 中的匹配）"""
+    present = [scans[fp] for fp in files if fp in scans]
+    base_url = next((fs.base_url for fs in present if fs.base_url), "") or base_url_from_env(project_root)
+    auth_pattern = next((fs.auth for fs in present if fs.auth), "")
+    all_matches = [replace(m) for fs in present for m in fs.matches]
 
     # 优先排序：API 封装层目录中的匹配排在前面
     def sort_key(m: ScanMatch) -> int:
@@ -433,16 +495,14 @@ def main() -> int:
                 return i
         return 999
 
-    all_matches.sort(key=sort_key)
-    all_matches = dedupe_matches(all_matches)
+    with tracing.span("scan.dedupe", matches=len(all_matches)):
+        all_matches.sort(key=sort_key)
+        all_matches = dedupe_matches(all_matches)
 
     # 过滤掉非 API 路径
     valid_matches = [m for m in all_matches if m.path.startswith("/") or m.path.startswith("http") or m.path == "[需要 AI 分析]"]
 
-    print(f"[scan] 识别到 {len(valid_matches)} 个 API 调用")
-
-    # 构建输出
-    result = ScanResult(
+    return ScanResult(
         projectRoot=str(project_root),
         framework=framework,
         baseURL=base_url,
@@ -451,11 +511,107 @@ def main() -> int:
         matches=[asdict(m) for m in valid_matches],
     )
 
-    output_path.write_text(
-        json.dumps(asdict(result), ensure_ascii=False, indent=2),
-        encoding="utf-8",
-    )
+
+def discover_project(project_root: Path, entry_hints: List[str]) -> Tuple[str, List[str]]:
+    """项目结构分析：(框架, API 目录)"""
+    framework = detect_framework(project_root)
+    api_dirs = discover_api_dirs(project_root)
+    # 合并 entry_hints
+    for hint in entry_hints:
+        if hint not in api_dirs and (project_root / hint).is_dir():
+            api_dirs.append(hint)
+    return framework, api_dirs
+
+
+def write_result(data: Dict[str, Any], output_path: Path) -> None:
+    with tracing.span("scan.write"):
+        output_path.write_text(
+            json.dumps(data, ensure_ascii=False, indent=2),
+            encoding="utf-8",
+        )
+
+
+class IncrementalScan:
+    """--watch 模式的增量扫描：保留各文件的扫描结果，每轮只重新扫描变化 / 新增的文件"""
+
+    def __init__(
+        self, project_root: Path, scopes: List[str], entry_hints: List[str], exclude: Iterable[Path] = ()
+    ):
+        self.project_root = Path(project_root).resolve()
+        self.scopes = scopes
+        self.entry_hints = entry_hints
+        self.exclude = [self.project_root / p for p in exclude]
+        self.scans: Dict[Path, FileScan] = {}
+        self.rescanned = 0
+
+    def update(self, changed: Optional[Iterable[Path]] = None) -> Dict[str, Any]:
+        """changed 为变化的文件（None 表示全部重新扫描）；返回与 scan_result.json 相同结构的结果"""
+        changed_set = None if changed is None else {Path(p) for p in changed}
+        framework, api_dirs = discover_project(self.project_root, self.entry_hints)
+        files = iter_files(self.project_root, self.scopes, self.exclude)
+        present = set(files)
+        for fp in [fp for fp in self.scans if fp not in present]:
+            del self.scans[fp]
+        self.rescanned = 0
+        for fp in files:
+            if changed_set is not None and fp in self.scans and fp not in changed_set:
+                continue
+            fs = scan_path(fp, self.project_root)
+            self.rescanned += 1
+            if fs is None:
+                self.scans.pop(fp, None)
+            else:
+                self.scans[fp] = fs
+        return asdict(assemble_result(self.project_root, framework, api_dirs, files, self.scans))
+
+
+# =====================================================
+# 主函数
+# =====================================================
+
+def run(args: argparse.Namespace) -> Dict[str, Any]:
+    """执行扫描并写出 scan_result.json，返回扫描结果（供 run_workflow.py 进程内传递）"""
+    project_root = Path(args.project_root).resolve()
+    scopes = parse_csv(args.scope)
+    entry_hints = parse_csv(args.entry_hints)
+    output_path = Path(args.output) if args.output else project_root / "scan_result.json"
+    cache_dir = args.cache_dir or os.environ.get(SCAN_CACHE_ENV, "")
+    cache = ScanCache(Path(cache_dir)) if cache_dir else None
+
+    print(f"[scan] 项目根目录：{project_root}")
+    print(f"[scan] 扫描范围：{scopes or '全项目'}")
+
+    framework, api_dirs = discover_project(project_root, entry_hints)
+
+    # 收集文件
+    with tracing.span("scan.walk"):
+        files = iter_files(project_root, scopes, [project_root / p for p in parse_csv(args.exclude)])
+    print(f"[scan] 文件数量：{len(files)}")
+    print(f"[scan] 框架：{framework}")
+    print(f"[scan] API 目录：{api_dirs or '未发现'}")
+
+    # 扫描所有文件（同时检测 baseURL 和认证）
+    scans: Dict[Path, FileScan] = {}
+    for fp in files:
+        fs = scan_path(fp, project_root, cache)
+        if fs is not None:
+            scans[fp] = fs
+    if cache is not None:
+        print(f"[scan] 扫描缓存：命中 {cache.hits}，新扫描 {cache.misses}（{cache.root}）")
+
+    result = assemble_result(project_root, framework, api_dirs, files, scans)
+    print(f"[scan] 识别到 {len(result.matches)} 个 API 调用")
+
+    data = asdict(result)
+    write_result(data, output_path)
     print(f"[scan] 输出：{output_path}")
+    return data
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    with tracing.session(args.trace, "scan"):
+        run(args)
     return 0
 
 
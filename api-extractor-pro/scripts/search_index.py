@@ -0,0 +1,226 @@
+"""
+search_index.py — 接口文档全文检索索引
+从契约预计算倒排索引（路径段、接口名、说明、参数名，中文按二元组切分），
+配合静态页面 search.html 在浏览器端直接查表，无需扫描 Markdown
+"""
+import json
+import re
+from typing import Callable, Dict, Iterable, List, Set
+
+INDEX_VERSION = 1
+
+_CJK_RUN = re.compile(r"[㐀-䶿一-鿿豈-﫿]+")
+_WORD = re.compile(r"[A-Za-z0-9]+")
+_CAMEL = re.compile(r"[A-Z]+(?=[A-Z][a-z])|[A-Z]?[a-z]+|[A-Z]+|[0-9]+")
+
+
+def tokenize(text: str) -> Set[str]:
+    """切词：ASCII 按单词（含 camelCase 拆分）小写化，中文连续片段取二元组（单字片段保留单字）"""
+    tokens: Set[str] = set()
+    if not text:
+        return tokens
+    for m in _WORD.finditer(text):
+        word = m.group(0)
+        tokens.add(word.lower())
+        parts = _CAMEL.findall(word)
+        if len(parts) > 1:
+            tokens.update(p.lower() for p in parts)
+    for m in _CJK_RUN.finditer(text):
+        run = m.group(0)
+        if len(run) == 1:
+            tokens.add(run)
+        else:
+            tokens.update(run[i:i + 2] for i in range(len(run) - 1))
+    return tokens
+
+
+def heading_anchor(heading: str) -> str:
+    """GitHub 风格标题锚点：小写，去除标点，空格转连字符"""
+    slug = re.sub(r"[^\w\- ]", "", heading.strip().lower())
+    return slug.replace(" ", "-")
+
+
+def endpoint_texts(ep: Dict) -> Iterable[str]:
+    """参与索引的接口文本"""
+    yield ep.get("path", "")
+    yield ep.get("endpoint", "")
+    yield ep.get("module", "")
+    yield ep.get("method", "")
+    for key in ("summary", "description"):
+        if ep.get(key):
+            yield str(ep[key])
+    for group in ("pathParams", "query", "headers"):
+        for p in ep.get(group, []) or []:
+            yield str(p.get("name", ""))
+            yield str(p.get("description", ""))
+    body = ep.get("requestBody") or {}
+    for name, info in (body.get("schema", {}) or {}).get("properties", {}).items():
+        yield name
+        if isinstance(info, dict):
+            yield str(info.get("description", ""))
+    for r in ep.get("responses", []) or []:
+        yield str(r.get("description", ""))
+    for e in ep.get("errors", []) or []:
+        yield str(e.get("message", ""))
+
+
+def build_search_index(endpoints: List[Dict], href_for: Callable[[Dict], str]) -> Dict:
+    """构建倒排索引：docs 为接口列表，terms 为词 → 接口序号（差分编码）"""
+    docs: List[List] = []
+    postings: Dict[str, List[int]] = {}
+    for doc_id, ep in enumerate(endpoints):
+        method = ep.get("method", "GET")
+        path = ep.get("path", "/")
+        name = ep.get("endpoint", "")
+        desc = name.split(".")[-1] if "." in name else name
+        href = f"{href_for(ep)}#{heading_anchor(f'{method} {path} — {desc}')}"
+        docs.append([method, path, name, ep.get("module", "default"), href])
+        tokens: Set[str] = set()
+        for text in endpoint_texts(ep):
+            tokens |= tokenize(text)
+        for token in tokens:
+            postings.setdefault(token, []).append(doc_id)
+
+    terms: Dict[str, List[int]] = {}
+    for token in sorted(postings):
+        ids = postings[token]
+        terms[token] = [ids[0]] + [b - a for a, b in zip(ids, ids[1:])]
+    return {"version": INDEX_VERSION, "docs": docs, "terms": terms}
+
+
+def search_index_json(index: Dict) -> str:
+    return json.dumps(index, ensure_ascii=False, separators=(",", ":"))
+
+
+SEARCH_HTML = """<!DOCTYPE html>
+<!-- @generated by api-extractor-pro generate_docs.py -->
+<html lang="zh-CN">
+<head>
+<meta charset="utf-8">
+<title>%(title)s — 接口搜索</title>
+<style>
+  body { font: 14px/1.6 -apple-system, "PingFang SC", "Microsoft YaHei", sans-serif; max-width: 960px; margin: 32px auto; padding: 0 16px; color: #1f2328; }
+  input { width: 100%%; box-sizing: border-box; padding: 10px 12px; font-size: 16px; border: 1px solid #d0d7de; border-radius: 6px; }
+  #meta { color: #656d76; margin: 8px 0 16px; }
+  li { list-style: none; padding: 6px 0; border-bottom: 1px solid #eaeef2; }
+  ul { padding: 0; }
+  code { font-weight: 600; margin-right: 8px; }
+  .module { color: #656d76; margin-left: 8px; }
+</style>
+</head>
+<body>
+<h1>%(title)s 接口搜索</h1>
+<input id="q" placeholder="输入路径、接口名、参数名或中文说明，如：订单 列表 / pageSize" autofocus>
+<div id="meta">正在加载索引…</div>
+<ul id="results"></ul>
+<script>
+const LIMIT = 200
+let index = null
+let keys = []
+let cjkKeys = []
+
+const CJK = /^[\\u3400-\\u4dbf\\u4e00-\\u9fff\\uf900-\\ufaff]/
+
+function tokenize(text) {
+  const tokens = new Set()
+  for (const word of text.match(/[A-Za-z0-9]+/g) || []) {
+    tokens.add(word.toLowerCase())
+    const parts = word.match(/[A-Z]+(?=[A-Z][a-z])|[A-Z]?[a-z]+|[A-Z]+|[0-9]+/g) || []
+    if (parts.length > 1) parts.forEach((p) => tokens.add(p.toLowerCase()))
+  }
+  for (const run of text.match(/[\\u3400-\\u4dbf\\u4e00-\\u9fff\\uf900-\\ufaff]+/g) || []) {
+    if (run.length === 1) tokens.add(run)
+    for (let i = 0; i + 1 < run.length; i++) tokens.add(run.slice(i, i + 2))
+  }
+  return [...tokens].sort()
+}
+
+// 有序词表中二分查找前缀范围
+function prefixRange(prefix) {
+  let lo = 0, hi = keys.length
+  while (lo < hi) {
+    const mid = (lo + hi) >> 1
+    if (keys[mid] < prefix) lo = mid + 1
+    else hi = mid
+  }
+  const out = []
+  for (let i = lo; i < keys.length && keys[i].startsWith(prefix); i++) out.push(keys[i])
+  return out
+}
+
+// 单个汉字：索引只收录二元组（单字片段除外），取以该字开头或结尾的全部词
+function cjkTerms(token) {
+  if (token.length > 1) return token in index.terms ? [token] : []
+  const out = prefixRange(token)
+  for (const k of cjkKeys) if (k[1] === token) out.push(k)
+  return out
+}
+
+function postings(term) {
+  const ids = []
+  let total = 0
+  for (const delta of index.terms[term]) {
+    total += delta
+    ids.push(total)
+  }
+  return ids
+}
+
+function search(query) {
+  let result = null
+  for (const token of tokenize(query)) {
+    const matched = CJK.test(token) ? cjkTerms(token) : prefixRange(token)
+    const ids = new Set()
+    matched.forEach((t) => postings(t).forEach((id) => ids.add(id)))
+    result = result === null ? ids : new Set([...result].filter((id) => ids.has(id)))
+    if (result.size === 0) break
+  }
+  return result === null ? [] : [...result].sort((a, b) => a - b)
+}
+
+function render() {
+  const q = document.getElementById('q').value.trim()
+  const list = document.getElementById('results')
+  list.innerHTML = ''
+  if (!q) {
+    document.getElementById('meta').textContent = `共 ${index.docs.length} 个接口`
+    return
+  }
+  const ids = search(q)
+  document.getElementById('meta').textContent = `找到 ${ids.length} 个接口`
+  for (const id of ids.slice(0, LIMIT)) {
+    const [method, path, name, module, href] = index.docs[id]
+    const li = document.createElement('li')
+    const a = document.createElement('a')
+    a.href = href
+    a.innerHTML = '<code></code><span></span>'
+    a.firstChild.textContent = method
+    a.lastChild.textContent = path
+    const extra = document.createElement('span')
+    extra.className = 'module'
+    extra.textContent = `${name} · ${module}`
+    li.append(a, extra)
+    list.append(li)
+  }
+}
+
+fetch('search-index.json')
+  .then((r) => r.json())
+  .then((data) => {
+    index = data
+    keys = Object.keys(index.terms).sort()
+    cjkKeys = keys.filter((k) => k.length === 2 && CJK.test(k))
+    document.getElementById('q').addEventListener('input', render)
+    render()
+  })
+  .catch(() => {
+    document.getElementById('meta').textContent = '索引加载失败：请通过 HTTP 服务打开（如 python3 -m http.server）'
+  })
+</script>
+</body>
+</html>
+"""
+
+
+def search_html(title: str) -> str:
+    return SEARCH_HTML % {"title": title.replace("&", "&amp;").replace("<", "&lt;")}
@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+"""
+selfcheck.py — 手写实现的回归自检（仅依赖标准库，node 可选）
+1) YAML：openapi_emit.emit_yaml → yaml_stream.load 往返一致（固定用例 + 定种子随机文档），
+   块标量与无引号数字按固定文本校验解析结果
+2) Mock 数据：mock_data 的 Python 实现与 GENERATOR_JS 在固定种子下逐行一致——
+   对照 fixtures/mock-data-parity.json（由 JS 运行时生成）；有 node 时同时直接运行 JS 运行时比对
+任一检查失败时退出码为 1
+"""
+import argparse
+import io
+import json
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from mock_data import generate_page, generator_js
+from openapi_emit import emit_yaml
+from yaml_stream import load
+
+FIXTURE = Path(__file__).resolve().parent / "fixtures" / "mock-data-parity.json"
+
+# (YAML 文本, 期望的解析结果)：块标量折叠 / chomping 与 YAML 1.2 数字
+PARSE_CASES: List[Tuple[str, Any]] = [
+    ("a: |\n  x\n\n  y\n", {"a": "x\n\ny\n"}),
+    ("a: >\n  one\n  two\n\n  three\n", {"a": "one two\nthree\n"}),
+    ("a: >\n  one\n    code\n  two\n", {"a": "one\n  code\ntwo\n"}),
+    ("a: >\n\n  lead\n", {"a": "\nlead\n"}),
+    ("a: |\n  x\n\n\n", {"a": "x\n"}),
+    ("a: |-\n  x\n\n", {"a": "x"}),
+    ("a: >-\n  x\n\n  y\n", {"a": "x\ny"}),
+    ("a: |+\n  x\n\n\nb: 1\n", {"a": "x\n\n\n", "b": 1}),
+    ("a: >+\n  x\n  y\n\n", {"a": "x y\n\n"}),
+    ("a:\n  - |\n    l1\n    l2\n  - b\n", {"a": ["l1\nl2\n", "b"]}),
+    (
+        "n: [012, 1., 1e3, .5, 1_000, 0x1F, 0o17, -.inf, 1_, 0b101, 9.x]\n",
+        {"n": [12, 1.0, 1000.0, 0.5, 1000, 31, 15, float("-inf"), 1, "0b101", "9.x"]},
+    ),
+]
+
+# 输出后必须按原样读回的值：形似数字 / 布尔 / null 的字符串、特殊字符与空白
+ROUND_TRIP_VALUES: List[Any] = [
+    "9.", "012.", "1_", "0b101", "0x1F_", "012", "1e3", "1.5e3", ".5", "+1", "1:30", "0o17", ".inf", ".NaN",
+    "yes", "On", "NO", "~", "null", "True", "", " lead", "trail ", "-", "- a", "a: b", "#x", "x #y", "{a}",
+    "multi\nline", "tab\tx", "back\\slash", "中文说明", "😀",
+    0, -7, 12.5, True, False, None, {}, [], {"k": [1, {"x": "y"}]},
+]
+
+# 覆盖全部字段类型；total 取大值以覆盖较大的行号
+PARITY_SPEC: Dict[str, Any] = {
+    "seed": 682571851,
+    "total": 10000000,
+    "fields": [
+        {"name": "id", "kind": "id"}, {"name": "sid", "kind": "sid"}, {"name": "n", "kind": "int"},
+        {"name": "amount", "kind": "number"}, {"name": "ok", "kind": "bool"},
+        {"name": "status", "kind": "enum", "values": ["active", "pending", "disabled"]},
+        {"name": "createdAt", "kind": "datetime"}, {"name": "day", "kind": "date"}, {"name": "u", "kind": "uuid"},
+        {"name": "email", "kind": "email"}, {"name": "phone", "kind": "phone"}, {"name": "url", "kind": "url"},
+        {"name": "name", "kind": "person"}, {"name": "title", "kind": "title"}, {"name": "note", "kind": "text"},
+    ],
+}
+PARITY_PAGES: List[Tuple[int, int]] = [(1, 20), (3, 7), (99999, 5), (2000000, 5)]
+
+JS_RUNNER = """import { generatePage } from './generator.mjs'
+const { spec, pages } = JSON.parse(process.argv[2])
+console.log(JSON.stringify(pages.map(([page, size]) => generatePage(spec, page, size))))
+"""
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="YAML 读取器与 Mock 数据生成器回归自检")
+    parser.add_argument("--node", default="node", help="node 可执行文件（找不到时跳过 JS 直接比对）")
+    parser.add_argument("--fuzz", type=int, default=500, help="定种子随机往返文档数")
+    parser.add_argument("--update-fixture", action="store_true", help="用 JS 运行时重新生成对照数据（需要 node）")
+    return parser.parse_args()
+
+
+def same(a: Any, b: Any) -> bool:
+    """结构相等，且布尔 / 数字 / 字符串类型一致（True 与 1、1.0 与 1 视为不同）"""
+    if type(a) is not type(b):
+        return False
+    if isinstance(a, dict):
+        return list(a) == list(b) and all(same(a[k], b[k]) for k in a)
+    if isinstance(a, list):
+        return len(a) == len(b) and all(same(x, y) for x, y in zip(a, b))
+    return a == b
+
+
+def round_trip(doc: Dict) -> Tuple[bool, str]:
+    buf = io.StringIO()
+    emit_yaml(doc, buf)
+    text = buf.getvalue()
+    try:
+        back = load(io.StringIO(text))
+    except ValueError as e:
+        return False, f"{text}=> {e}"
+    return same(doc, back), f"{text}=> {back!r}"
+
+
+def random_doc(rnd: random.Random) -> Dict:
+    pool = [v for v in ROUND_TRIP_VALUES if not isinstance(v, (dict, list))]
+    chars = list("abcXYZ019 -_:#{}[],&*?|<>=!%@`\"'\\/\n\t.~é中") + ["null", "1e3", "0x1F", "012", ".5"]
+
+    def text() -> str:
+        return "".join(rnd.choice(chars) for _ in range(rnd.randint(1, 6)))
+
+    def value(depth: int) -> Any:
+        r = rnd.random()
+        if depth > 3 or r < 0.5:
+            return rnd.choice([rnd.choice(pool), text(), rnd.randint(-5, 1000), round(rnd.random() * 100, 3)])
+        if r < 0.75:
+            return {text(): value(depth + 1) for _ in range(rnd.randint(0, 4))}
+        return [value(depth + 1) for _ in range(rnd.randint(0, 4))]
+
+    return {text(): value(0) for _ in range(rnd.randint(1, 4))}
+
+
+def check_yaml(fuzz: int) -> List[str]:
+    failures: List[str] = []
+    for text, expected in PARSE_CASES:
+        got = load(io.StringIO(text))
+        if not same(got, expected):
+            failures.append(f"解析 {text!r}：期望 {expected!r}，得到 {got!r}")
+    for v in ROUND_TRIP_VALUES:
+        ok, detail = round_trip({"value": v, "list": [v]})
+        if not ok:
+            failures.append(f"往返 {v!r}：\n{detail}")
+    rnd = random.Random(20240101)
+    for i in range(fuzz):
+        ok, detail = round_trip(random_doc(rnd))
+        if not ok:
+            failures.append(f"随机文档 #{i}：\n{detail}")
+    return failures
+
+
+def run_js(node: str) -> Optional[List[Dict]]:
+    """运行 GENERATOR_JS 生成对照页；找不到 node 时返回 None"""
+    exe = shutil.which(node)
+    if exe is None:
+        return None
+    with tempfile.TemporaryDirectory() as tmp:
+        (Path(tmp) / "generator.mjs").write_text(generator_js(), encoding="utf-8")
+        (Path(tmp) / "run.mjs").write_text(JS_RUNNER, encoding="utf-8")
+        payload = json.dumps({"spec": PARITY_SPEC, "pages": PARITY_PAGES}, ensure_ascii=False)
+        out = subprocess.run(
+            [exe, str(Path(tmp) / "run.mjs"), payload], capture_output=True, text=True, encoding="utf-8", check=True
+        )
+    return json.loads(out.stdout)
+
+
+def compare_pages(label: str, expected: List[Dict]) -> List[str]:
+    """Python 实现与 JS 输出逐行比对（JSON 中 JS 的 100 与 Python 的 100.0 视为相同）"""
+    failures: List[str] = []
+    for (page, size), want in zip(PARITY_PAGES, expected):
+        got = json.loads(json.dumps(generate_page(PARITY_SPEC, page, size), ensure_ascii=False))
+        if got == want:
+            continue
+        rows = [i for i, (a, b) in enumerate(zip(got["list"], want["list"])) if a != b]
+        first = f"，首个差异行 {rows[0]}：\n  Python {got['list'][rows[0]]}\n  JS     {want['list'][rows[0]]}" if rows else ""
+        failures.append(f"{label}：page={page} pageSize={size} 不一致{first}")
+    if len(expected) != len(PARITY_PAGES):
+        failures.append(f"{label}：页数 {len(expected)}，期望 {len(PARITY_PAGES)}")
+    return failures
+
+
+def check_mock_data(node: str) -> Tuple[List[str], bool]:
+    """返回 (失败项, 是否运行了 JS)"""
+    failures: List[str] = []
+    fixture = json.loads(FIXTURE.read_text(encoding="utf-8"))
+    if fixture.get("spec") != PARITY_SPEC or [tuple(p) for p in fixture.get("pages", [])] != PARITY_PAGES:
+        failures.append(f"{FIXTURE.name} 与 PARITY_SPEC / PARITY_PAGES 不符，请用 --update-fixture 重新生成")
+    else:
+        failures += compare_pages(FIXTURE.name, fixture["expected"])
+    js = run_js(node)
+    if js is not None:
+        failures += compare_pages("GENERATOR_JS", js)
+    return failures, js is not None
+
+
+def update_fixture(node: str) -> int:
+    js = run_js(node)
+    if js is None:
+        print(f"[selfcheck] ❌ 找不到 {node}，无法生成对照数据")
+        return 1
+    FIXTURE.parent.mkdir(parents=True, exist_ok=True)
+    data = {"spec": PARITY_SPEC, "pages": PARITY_PAGES, "expected": js}
+    FIXTURE.write_text(json.dumps(data, ensure_ascii=False, indent=1) + "\n", encoding="utf-8")
+    print(f"[selfcheck] 已写出 {FIXTURE}")
+    return 0
+
+
+def main() -> int:
+    args = parse_args()
+    if args.update_fixture:
+        return update_fixture(args.node)
+
+    yaml_failures = check_yaml(args.fuzz)
+    print(
+        f"[selfcheck] YAML：固定解析 {len(PARSE_CASES)} 例，往返 {len(ROUND_TRIP_VALUES)} 例 + 随机文档 {args.fuzz} 个"
+        f"，失败 {len(yaml_failures)}"
+    )
+    data_failures, ran_js = check_mock_data(args.node)
+    source = "对照数据 + JS 运行时" if ran_js else "对照数据（未找到 node，跳过 JS 直接比对）"
+    print(f"[selfcheck] Mock 数据：{len(PARITY_PAGES)} 页，{source}，失败 {len(data_failures)}")
+
+    failures = yaml_failures + data_failures
+    for f in failures[:20]:
+        print(f"[selfcheck] ❌ {f}")
+    if len(failures) > 20:
+        print(f"[selfcheck] … 另有 {len(failures) - 20} 项失败")
+    if failures:
+        return 1
+    print("[selfcheck] ✅ 全部通过")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
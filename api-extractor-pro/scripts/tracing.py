@@ -0,0 +1,163 @@
+"""
+tracing.py — Chrome trace-event 格式的可选性能追踪
+通过 --trace out.json 或环境变量 API_EXTRACTOR_TRACE 启用；span() 记录耗时区间，
+输出文件可在 chrome://tracing 或 Perfetto 中打开。时间戳取自系统时钟（微秒），
+因此子进程、进程池 worker 各自写出的追踪可直接合并到同一时间线
+"""
+import glob
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+TRACE_ENV = "API_EXTRACTOR_TRACE"
+
+_events: List[Dict[str, Any]] = []
+_lock = threading.Lock()
+_path: Optional[Path] = None
+_owner_pid: Optional[int] = None  # 负责 save() 的进程
+_threads: Dict[int, int] = {}
+
+
+def enabled() -> bool:
+    return _path is not None
+
+
+def _now_us() -> int:
+    return time.time_ns() // 1000
+
+
+def _tid() -> int:
+    """线程在追踪中的序号（1 起）；查找与分配在锁内完成，并发线程不会分到同一序号"""
+    ident = threading.get_ident()
+    with _lock:
+        tid = _threads.get(ident)
+        if tid is None:
+            tid = _threads[ident] = len(_threads) + 1
+        return tid
+
+
+def _metadata(process_name: str) -> Dict[str, Any]:
+    return {"name": "process_name", "ph": "M", "pid": os.getpid(), "tid": 0, "args": {"name": process_name}}
+
+
+@contextmanager
+def span(name: str, cat: str = "pipeline", **args: Any) -> Iterator[None]:
+    """记录一个完整事件（ph=X）；未启用时几乎无开销"""
+    if _path is None:
+        yield
+        return
+    start = _now_us()
+    try:
+        yield
+    finally:
+        event = {
+            "name": name, "cat": cat, "ph": "X", "ts": start, "dur": _now_us() - start,
+            "pid": os.getpid(), "tid": _tid(),
+        }
+        if args:
+            event["args"] = {k: v if isinstance(v, (int, float, bool)) else str(v) for k, v in args.items()}
+        with _lock:
+            _events.append(event)
+
+
+def enable(path: Path, process_name: str) -> None:
+    global _path, _owner_pid
+    _path = Path(path)
+    _owner_pid = os.getpid()
+    _events.append(_metadata(process_name))
+
+
+def attach(path: Optional[str]) -> None:
+    """进程池 worker 调用：以 spawn 方式启动（未继承父进程状态）时按 path 启用追踪，事件由 flush_part() 写出"""
+    global _path
+    if path and _path is None:
+        _path = Path(path)
+
+
+def current_path() -> Optional[str]:
+    return str(_path) if _path is not None else None
+
+
+def child_env(path: Path) -> Dict[str, str]:
+    """子进程环境变量：追踪写入指定文件"""
+    return {**os.environ, TRACE_ENV: str(path)}
+
+
+def flush_part() -> None:
+    """进程池 worker 调用：把本进程事件追加到 <trace>.<pid>.part（JSON Lines），由主进程 save() 合并；
+    在主进程内串行执行时不做任何事"""
+    if _path is None or os.getpid() == _owner_pid:
+        return
+    pid = os.getpid()
+    with _lock:
+        # fork 出的 worker 继承了父进程已记录的事件，只写出本进程的部分
+        events = [e for e in _events if e.get("pid") == pid and e.get("ph") != "M"]
+        _events.clear()
+    part = part_path(str(pid))
+    if not part.exists():
+        events.insert(0, _metadata(f"worker {pid}"))
+    with open(part, "a", encoding="utf-8") as fh:
+        for event in events:
+            fh.write(json.dumps(event, ensure_ascii=False) + "\n")
+
+
+def load_events(path: Path) -> List[Dict[str, Any]]:
+    """读取追踪文件（对象格式、数组格式或 worker 分片的 JSON Lines）中的事件"""
+    try:
+        text = Path(path).read_text(encoding="utf-8")
+    except OSError:
+        return []
+    try:
+        data = json.loads(text)
+    except ValueError:
+        data = []
+        for line in text.splitlines():
+            try:
+                data.append(json.loads(line))
+            except ValueError:
+                continue
+    return data.get("traceEvents", []) if isinstance(data, dict) else data
+
+
+def part_path(name: str) -> Path:
+    """子进程追踪文件 <trace>.<name>.part，save() 时自动合并"""
+    return Path(f"{_path}.{name}.part")
+
+
+def save() -> Optional[Path]:
+    """写出追踪文件：合并本进程事件与 <trace>.*.part 分片（worker / 子进程写出，合并后删除）"""
+    if _path is None:
+        return None
+    events = list(_events)
+    for part in sorted(glob.glob(glob.escape(str(_path)) + ".*.part")):
+        events.extend(load_events(Path(part)))
+        try:
+            os.unlink(part)
+        except OSError:
+            pass
+    _path.parent.mkdir(parents=True, exist_ok=True)
+    events.sort(key=lambda e: (e.get("ph") != "M", e.get("ts", 0)))
+    _path.write_text(json.dumps({"traceEvents": events, "displayTimeUnit": "ms"}, ensure_ascii=False), encoding="utf-8")
+    return _path
+
+
+@contextmanager
+def session(path: Optional[str], process_name: str) -> Iterator[None]:
+    """脚本入口使用：path 或环境变量指定输出文件时启用追踪，结束时写出"""
+    target = path or os.environ.get(TRACE_ENV)
+    if not target or enabled():
+        yield
+        return
+    enable(Path(target), process_name)
+    try:
+        with span(process_name, "script"):
+            yield
+    finally:
+        out = save()
+        # 工作流子进程的分片文件由主进程合并，不单独提示
+        if out is not None and out.suffix != ".part":
+            print(f"[trace] 追踪：{out}")
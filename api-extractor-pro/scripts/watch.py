@@ -0,0 +1,62 @@
+"""
+watch.py — 文件变化监听（轮询 + 去抖）
+按固定间隔比较文件的 (mtime, size) 快照；发现变化后等待一段静默期（保存时编辑器往往连续写入多次），
+再把这段时间内累计变化的文件一次性交给回调，供 run_workflow.py --watch 增量重跑
+"""
+import os
+import time
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Optional, Set, Tuple
+
+Snapshot = Dict[Path, Tuple[int, int]]
+
+
+def snapshot(paths: Iterable[Path]) -> Snapshot:
+    """文件 → (mtime_ns, size)；不存在的文件不计入"""
+    out: Snapshot = {}
+    for p in paths:
+        try:
+            st = os.stat(p)
+        except OSError:
+            continue
+        out[Path(p)] = (st.st_mtime_ns, st.st_size)
+    return out
+
+
+def changed_paths(old: Snapshot, new: Snapshot) -> Set[Path]:
+    """新增、修改或删除的文件"""
+    changed = {p for p, sig in new.items() if old.get(p) != sig}
+    changed |= set(old) - set(new)
+    return changed
+
+
+def watch(
+    list_paths: Callable[[], Iterable[Path]],
+    on_change: Callable[[Set[Path]], None],
+    interval: float = 0.2,
+    debounce: float = 0.1,
+    should_stop: Optional[Callable[[], bool]] = None,
+) -> None:
+    """轮询监听 list_paths() 返回的文件，直到 should_stop() 为真（或 KeyboardInterrupt）
+
+    每轮重新调用 list_paths()，因此新增 / 删除的文件也会被发现；
+    on_change 执行期间发生的变化在下一轮快照中体现，不会丢失
+    """
+    current = snapshot(list_paths())
+    while not (should_stop and should_stop()):
+        time.sleep(interval)
+        latest = snapshot(list_paths())
+        pending = changed_paths(current, latest)
+        if not pending:
+            continue
+        # 去抖：持续变化时继续等待，直到一个静默期内没有新的变化
+        while True:
+            time.sleep(debounce)
+            settled = snapshot(list_paths())
+            more = changed_paths(latest, settled)
+            latest = settled
+            if not more:
+                break
+            pending |= more
+        current = latest
+        on_change(pending)
@@ -0,0 +1,567 @@
+"""
+yaml_stream.py — 仅依赖标准库的流式 YAML 子集读取器
+逐行读取并产出事件（映射 / 序列开始与结束、标量、别名），不构建整棵文档树；
+支持块格式映射与序列、引号键、流式集合 {…} / […]、锚点 & / 别名 * / 合并键 <<、
+块标量 | / >（含 chomping 指示符 - / +）、注释与文档标记，足以读取常见 OpenAPI 规范。
+不支持的写法：标签 !! / !（忽略，按无标签解析）、块标量的显式缩进指示符（|2，按自动检测的缩进处理）、
+复杂键 ? …；无引号数字按 YAML 1.2 core schema 解析（012 为整数 12、1e3 为浮点数），与 PyYAML 的 YAML 1.1 规则不同。
+
+iter_path_items() 只为 paths 下的单个 path item 构建子树，内存占用与规范总大小无关
+"""
+import re
+from typing import IO, Any, Dict, Iterator, List, Optional, Tuple
+
+Event = Tuple  # ("MAP", anchor) / ("SEQ", anchor) / ("END",) / ("SCALAR", value, anchor, quoted) / ("ALIAS", name)
+
+_INT = re.compile(r"[-+]?[0-9][0-9_]*$")
+_FLOAT = re.compile(r"[-+]?(\.[0-9]+|[0-9][0-9_]*(\.[0-9_]*)?)([eE][-+]?[0-9]+)?$")
+_ESCAPES = {"0": "\0", "a": "\a", "b": "\b", "t": "\t", "\t": "\t", "n": "\n", "v": "\v", "f": "\f",
+            "r": "\r", "e": "\x1b", " ": " ", '"': '"', "/": "/", "\\": "\\", "N": "\x85", "_": "\xa0"}
+
+
+class YAMLStreamError(ValueError):
+    pass
+
+
+def resolve_plain(text: str) -> Any:
+    """无引号标量的类型推断（YAML 1.2 core schema）"""
+    if text in ("", "~", "null", "Null", "NULL"):
+        return None
+    if text in ("true", "True", "TRUE"):
+        return True
+    if text in ("false", "False", "FALSE"):
+        return False
+    if _INT.match(text):
+        return int(text.replace("_", ""))
+    if text.startswith(("0x", "0o")):
+        try:
+            return int(text, 0)
+        except ValueError:
+            return text
+    if _FLOAT.match(text) and any(c.isdigit() for c in text):
+        return float(text.replace("_", ""))
+    if text in (".inf", "+.inf", ".Inf"):
+        return float("inf")
+    if text in ("-.inf", "-.Inf"):
+        return float("-inf")
+    if text in (".nan", ".NaN"):
+        return float("nan")
+    return text
+
+
+def _unquote_double(body: str) -> str:
+    out: List[str] = []
+    i = 0
+    while i < len(body):
+        c = body[i]
+        if c != "\\":
+            out.append(c)
+            i += 1
+            continue
+        nxt = body[i + 1] if i + 1 < len(body) else ""
+        if nxt in _ESCAPES:
+            out.append(_ESCAPES[nxt])
+            i += 2
+        elif nxt in "xuU":
+            width = {"x": 2, "u": 4, "U": 8}[nxt]
+            out.append(chr(int(body[i + 2:i + 2 + width], 16)))
+            i += 2 + width
+        else:
+            out.append(nxt)
+            i += 2
+    return "".join(out)
+
+
+def _quoted_end(text: str, start: int) -> int:
+    """返回引号字符串结束位置（含结束引号之后的下标）"""
+    q = text[start]
+    i = start + 1
+    while i < len(text):
+        if q == '"' and text[i] == "\\":
+            i += 2
+            continue
+        if text[i] == q:
+            if q == "'" and i + 1 < len(text) and text[i + 1] == "'":
+                i += 2
+                continue
+            return i + 1
+        i += 1
+    raise YAMLStreamError(f"引号未闭合：{text}")
+
+
+def _unquote(token: str) -> str:
+    if token.startswith('"'):
+        return _unquote_double(token[1:-1])
+    return token[1:-1].replace("''", "'")
+
+
+def _strip_comment(text: str) -> str:
+    """去掉行尾注释（# 前需为空白，引号内的 # 保留）"""
+    i = 0
+    while i < len(text):
+        c = text[i]
+        if c in "\"'" and (i == 0 or text[i - 1] in " \t[{,:-?"):
+            try:
+                i = _quoted_end(text, i)
+            except YAMLStreamError:
+                return text.rstrip()
+            continue
+        if c == "#" and (i == 0 or text[i - 1] in " \t"):
+            return text[:i].rstrip()
+        i += 1
+    return text.rstrip()
+
+
+def _find_colon(text: str) -> int:
+    """映射键后的冒号位置（冒号后为空白或行尾），不在引号 / 流式集合内；无则 -1"""
+    i = 0
+    depth = 0
+    while i < len(text):
+        c = text[i]
+        if c in "\"'" and (i == 0 or text[i - 1] in " \t[{,"):
+            i = _quoted_end(text, i)
+            continue
+        if c in "[{":
+            depth += 1
+        elif c in "]}":
+            depth -= 1
+        elif c == ":" and depth == 0 and (i + 1 == len(text) or text[i + 1] in " \t"):
+            return i
+        i += 1
+    return -1
+
+
+class _Lines:
+    """逐行读取（保留原始行供块标量使用），支持回看与改写当前行"""
+
+    def __init__(self, fh: IO[str]):
+        self.fh = fh
+        self.pending: List[Tuple[int, str]] = []
+        self.lineno = 0
+        self.done = False
+
+    def _read_raw(self) -> Optional[str]:
+        line = self.fh.readline()
+        if not line:
+            return None
+        self.lineno += 1
+        return line.rstrip("\r\n")
+
+    def peek(self) -> Optional[Tuple[int, str]]:
+        """下一条逻辑行 (缩进, 去注释内容)，跳过空行 / 注释 / 文档开始标记"""
+        while not self.pending and not self.done:
+            raw = self._read_raw()
+            if raw is None:
+                self.done = True
+                break
+            content = _strip_comment(raw.strip())
+            if not content or content.startswith("%"):
+                continue
+            if content == "---" or content.startswith("--- "):
+                rest = content[3:].strip()
+                if not rest:
+                    continue
+                content = rest
+            if content == "...":
+                self.done = True
+                break
+            self.pending.append((len(raw) - len(raw.lstrip(" ")), content))
+        return self.pending[0] if self.pending else None
+
+    def next(self) -> Tuple[int, str]:
+        line = self.peek()
+        if line is None:
+            raise YAMLStreamError("意外的文件结尾")
+        self.pending.pop(0)
+        return line
+
+    def replace(self, indent: int, content: str) -> None:
+        """把当前行改写为 (indent, content)，用于 "- key: v" 这类同行开启的映射"""
+        self.pending.insert(0, (indent, content))
+
+    def raw_block(self, parent_indent: int) -> List[str]:
+        """读取块标量内容：缩进大于 parent_indent 的原始行（含空行与末尾空行，由 chomping 指示符决定是否保留）"""
+        assert not self.pending, "块标量前不应有预读行"
+        lines: List[str] = []
+        while True:
+            raw = self._read_raw()
+            if raw is None:
+                self.done = True
+                break
+            indent = len(raw) - len(raw.lstrip(" "))
+            if raw.strip() and indent <= parent_indent:
+                # 已越过块标量，把该行交回逻辑行队列
+                content = _strip_comment(raw.strip())
+                if content == "...":
+                    self.done = True
+                elif content and not content.startswith("#"):
+                    self.pending.append((indent, content))
+                break
+            lines.append(raw)
+        return lines
+
+
+def _block_scalar(header: str, lines: List[str]) -> str:
+    """块标量：| 保留换行，> 折叠换行；chomping 指示符 - 去掉末尾换行、+ 保留末尾空行、默认保留一个换行"""
+    style = header[0]
+    chomp = "-" if "-" in header else "+" if "+" in header else ""
+    content = [l for l in lines if l.strip()]
+    if not content:
+        return "\n" * len(lines) if chomp == "+" else ""
+    indent = min(len(l) - len(l.lstrip(" ")) for l in content)
+    body = [l[indent:] if l.strip() else "" for l in lines]
+    last = max(i for i, line in enumerate(body) if line)
+    trailing = len(body) - 1 - last
+    body = body[:last + 1]
+    if style == "|":
+        text = "\n".join(body)
+    else:
+        # 折叠：相邻普通行之间的换行变为空格，空行各保留一个换行；更深缩进的行及其前后保留原换行
+        text = ""
+        prev: Optional[str] = None
+        empty = 0
+        for line in body:
+            if not line:
+                empty += 1
+                continue
+            if prev is None:
+                text += "\n" * empty
+            else:
+                literal = prev.startswith((" ", "\t")) or line.startswith((" ", "\t"))
+                text += ("\n" * (empty + 1) if literal else "\n" * empty) if empty else ("\n" if literal else " ")
+            text += line
+            prev, empty = line, 0
+    if chomp == "-":
+        return text
+    return text + "\n" + ("\n" * trailing if chomp == "+" else "")
+
+
+def _flow_events(text: str) -> Iterator[Event]:
+    """解析单个流式集合 / 标量文本"""
+    pos = [0]
+
+    def skip_ws() -> None:
+        while pos[0] < len(text) and text[pos[0]] in " \t\n":
+            pos[0] += 1
+
+    def scalar_token() -> Tuple[str, bool]:
+        skip_ws()
+        if text[pos[0]] in "\"'":
+            end = _quoted_end(text, pos[0])
+            token = text[pos[0]:end]
+            pos[0] = end
+            return _unquote(token), True
+        start = pos[0]
+        while pos[0] < len(text) and text[pos[0]] not in ",]}" and not (
+            text[pos[0]] == ":" and (pos[0] + 1 == len(text) or text[pos[0] + 1] in " ,]}")
+        ):
+            pos[0] += 1
+        return text[start:pos[0]].strip(), False
+
+    def node() -> Iterator[Event]:
+        skip_ws()
+        anchor = None
+        if text.startswith("&", pos[0]):
+            m = re.compile(r"&(\S+?)(?=[\s,\]}]|$)").match(text, pos[0])
+            anchor = m.group(1)
+            pos[0] = m.end()
+            skip_ws()
+        c = text[pos[0]] if pos[0] < len(text) else ""
+        if c == "*":
+            m = re.compile(r"\*([^\s,\]}]+)").match(text, pos[0])
+            pos[0] = m.end()
+            yield ("ALIAS", m.group(1))
+        elif c == "{":
+            pos[0] += 1
+            yield ("MAP", anchor)
+            while True:
+                skip_ws()
+                if text[pos[0]] == "}":
+                    pos[0] += 1
+                    break
+                key, quoted = scalar_token()
+                yield ("SCALAR", key if quoted else resolve_plain(key), None, quoted)
+                skip_ws()
+                if text[pos[0]] == ":":
+                    pos[0] += 1
+                    yield from node()
+                else:
+                    yield ("SCALAR", None, None, False)
+                skip_ws()
+                if text[pos[0]] == ",":
+                    pos[0] += 1
+            yield ("END",)
+        elif c == "[":
+            pos[0] += 1
+            yield ("SEQ", anchor)
+            while True:
+                skip_ws()
+                if text[pos[0]] == "]":
+                    pos[0] += 1
+                    break
+                yield from node()
+                skip_ws()
+                if text[pos[0]] == ",":
+                    pos[0] += 1
+            yield ("END",)
+        else:
+            value, quoted = scalar_token()
+            yield ("SCALAR", value if quoted else resolve_plain(value), anchor, quoted)
+
+    yield from node()
+
+
+def _balanced(text: str) -> bool:
+    depth = 0
+    i = 0
+    while i < len(text):
+        c = text[i]
+        if c in "\"'" and (i == 0 or text[i - 1] in " \t[{,:"):
+            try:
+                i = _quoted_end(text, i)
+            except YAMLStreamError:
+                return False
+            continue
+        if c in "[{":
+            depth += 1
+        elif c in "]}":
+            depth -= 1
+        i += 1
+    return depth <= 0
+
+
+class _Parser:
+    def __init__(self, fh: IO[str]):
+        self.lines = _Lines(fh)
+
+    def events(self) -> Iterator[Event]:
+        first = self.lines.peek()
+        if first is None:
+            return
+        yield from self.block(first[0], -1)
+
+    def block(self, indent: int, parent_indent: int, anchor: Optional[str] = None) -> Iterator[Event]:
+        """解析从当前行开始、缩进为 indent 的块节点"""
+        _, content = self.lines.peek()
+        if content == "-" or content.startswith("- "):
+            yield from self.sequence(indent, anchor)
+        elif _find_colon(content) >= 0 and not content.startswith(("{", "[")):
+            yield from self.mapping(indent, anchor)
+        else:
+            self.lines.next()
+            yield from self.inline(content, parent_indent, anchor)
+
+    def mapping(self, indent: int, anchor: Optional[str]) -> Iterator[Event]:
+        yield ("MAP", anchor)
+        while True:
+            line = self.lines.peek()
+            if line is None or line[0] != indent:
+                break
+            _, content = line
+            colon = _find_colon(content)
+            if colon < 0 or content.startswith("- ") or content == "-":
+                break
+            self.lines.next()
+            key_text = content[:colon].strip()
+            if key_text[:1] in "\"'":
+                yield ("SCALAR", _unquote(key_text), None, True)
+            else:
+                yield ("SCALAR", resolve_plain(key_text), None, False)
+            yield from self.value(content[colon + 1:].strip(), indent)
+        yield ("END",)
+
+    def sequence(self, indent: int, anchor: Optional[str]) -> Iterator[Event]:
+        yield ("SEQ", anchor)
+        while True:
+            line = self.lines.peek()
+            if line is None or line[0] != indent or not (line[1] == "-" or line[1].startswith("- ")):
+                break
+            self.lines.next()
+            rest = line[1][1:].lstrip()
+            if not rest:
+                yield from self.nested(indent, None)
+                continue
+            item_indent = indent + len(line[1]) - len(rest)
+            if _find_colon(rest) >= 0 and rest[0] not in "{[\"'&*!|>" or (
+                rest[0] in "\"'" and _find_colon(rest) > 0
+            ):
+                # "- key: value" 开启映射，后续键与 key 对齐
+                self.lines.replace(item_indent, rest)
+                yield from self.mapping(item_indent, None)
+            elif rest.startswith("- "):
+                self.lines.replace(item_indent, rest)
+                yield from self.sequence(item_indent, None)
+            else:
+                yield from self.value(rest, indent)
+        yield ("END",)
+
+    def nested(self, indent: int, anchor: Optional[str]) -> Iterator[Event]:
+        """值位于下一行：更深缩进的块，或同缩进的序列（映射值允许不缩进的 "- "）"""
+        line = self.lines.peek()
+        if line is not None and (line[0] > indent or (line[0] == indent and (line[1] == "-" or line[1].startswith("- ")))):
+            yield from self.block(line[0], indent, anchor)
+        else:
+            yield ("SCALAR", None, anchor, False)
+
+    def value(self, text: str, indent: int) -> Iterator[Event]:
+        """冒号 / "- " 之后的值"""
+        anchor = None
+        while text.startswith(("&", "!")):
+            token, _, text = text.partition(" ")
+            if token.startswith("&"):
+                anchor = token[1:]
+            text = text.strip()
+        if not text:
+            yield from self.nested(indent, anchor)
+        else:
+            yield from self.inline(text, indent, anchor)
+
+    def inline(self, text: str, indent: int, anchor: Optional[str]) -> Iterator[Event]:
+        if text.startswith("*"):
+            yield ("ALIAS", text[1:].strip())
+        elif text[0] in "|>":
+            yield ("SCALAR", _block_scalar(text, self.lines.raw_block(indent)), anchor, True)
+        elif text[0] in "{[":
+            while not _balanced(text):
+                _, more = self.lines.next()
+                text += " " + more
+            events = _flow_events(text)
+            first = next(events)
+            if first[0] in ("MAP", "SEQ"):
+                yield (first[0], anchor)
+            else:
+                yield first
+            yield from events
+        elif text[0] in "\"'":
+            while True:
+                try:
+                    end = _quoted_end(text, 0)
+                    break
+                except YAMLStreamError:
+                    _, more = self.lines.next()
+                    text += " " + more
+            yield ("SCALAR", _unquote(text[:end]), anchor, True)
+        else:
+            # 多行普通标量：后续更深缩进且非映射的行折叠为空格
+            parts = [text]
+            while True:
+                line = self.lines.peek()
+                if line is None or line[0] <= indent or _find_colon(line[1]) >= 0 or line[1].startswith("- "):
+                    break
+                parts.append(self.lines.next()[1])
+            yield ("SCALAR", resolve_plain(" ".join(parts)), anchor, False)
+
+
+def iter_events(fh: IO[str]) -> Iterator[Event]:
+    """产出 YAML 事件流"""
+    return _Parser(fh).events()
+
+
+# =====================================================
+# 事件 → 节点
+# =====================================================
+
+def build(events: Iterator[Event], first: Event, anchors: Dict[str, Any]) -> Any:
+    """从 first 开始构建一个完整节点（记录锚点，展开别名与合并键）"""
+    kind = first[0]
+    if kind == "SCALAR":
+        if first[2]:
+            anchors[first[2]] = first[1]
+        return first[1]
+    if kind == "ALIAS":
+        if first[1] not in anchors:
+            raise YAMLStreamError(f"未定义的锚点：*{first[1]}")
+        return anchors[first[1]]
+    if kind == "SEQ":
+        seq: List[Any] = []
+        if first[1]:
+            anchors[first[1]] = seq
+        for ev in events:
+            if ev[0] == "END":
+                return seq
+            seq.append(build(events, ev, anchors))
+        raise YAMLStreamError("序列未结束")
+    if kind == "MAP":
+        mapping: Dict[Any, Any] = {}
+        if first[1]:
+            anchors[first[1]] = mapping
+        for ev in events:
+            if ev[0] == "END":
+                return mapping
+            key = build(events, ev, anchors)
+            value = build(events, next(events), anchors)
+            if key == "<<" and not (ev[0] == "SCALAR" and ev[3]):
+                for src in value if isinstance(value, list) else [value]:
+                    for k, v in src.items():
+                        mapping.setdefault(k, v)
+            else:
+                mapping[key] = value
+        raise YAMLStreamError("映射未结束")
+    raise YAMLStreamError(f"意外的事件：{first}")
+
+
+def skip(events: Iterator[Event], first: Event, anchors: Dict[str, Any]) -> None:
+    """跳过一个节点；其中带锚点的子节点仍会构建，以便后续别名引用"""
+    if first[0] in ("SCALAR", "ALIAS"):
+        if first[0] == "SCALAR" and first[2]:
+            anchors[first[2]] = first[1]
+        return
+    if first[1]:
+        build(events, first, anchors)
+        return
+    for ev in events:
+        if ev[0] == "END":
+            return
+        skip(events, ev, anchors)
+
+
+def load(fh: IO[str]) -> Any:
+    """构建完整文档（用于小文件，如拆分模式的模块片段）"""
+    events = iter_events(fh)
+    first = next(events, None)
+    return None if first is None else build(events, first, {})
+
+
+def load_sections(fh: IO[str], keys: Tuple[str, ...]) -> Dict[str, Any]:
+    """只构建顶层映射中指定键的子树，其余部分流式跳过"""
+    events = iter_events(fh)
+    anchors: Dict[str, Any] = {}
+    out: Dict[str, Any] = {}
+    first = next(events, None)
+    if first is None or first[0] != "MAP":
+        return out
+    for ev in events:
+        if ev[0] == "END":
+            break
+        key = build(events, ev, anchors)
+        value_ev = next(events)
+        if key in keys:
+            out[key] = build(events, value_ev, anchors)
+        else:
+            skip(events, value_ev, anchors)
+    return out
+
+
+def iter_path_items(fh: IO[str]) -> Iterator[Tuple[str, Any]]:
+    """流式遍历顶层 paths：逐个产出 (path, path item)，每次只构建一个 path item"""
+    events = iter_events(fh)
+    anchors: Dict[str, Any] = {}
+    first = next(events, None)
+    if first is None or first[0] != "MAP":
+        return
+    for ev in events:
+        if ev[0] == "END":
+            return
+        key = build(events, ev, anchors)
+        value_ev = next(events)
+        if key != "paths" or value_ev[0] != "MAP":
+            skip(events, value_ev, anchors)
+            continue
+        if value_ev[1]:
+            anchors[value_ev[1]] = {}
+        for path_ev in events:
+            if path_ev[0] == "END":
+                break
+            path = build(events, path_ev, anchors)
+            yield str(path), build(events, next(events), anchors)
+